@@ -0,0 +1,99 @@
+"""Measure per-frame overhead and allocations of the pipeline's audio and result types
+
+Compares the slotted, memoryview-backed AudioData and TurnResult against the
+pydantic models and per-turn dicts they replaced, at streaming frame rates.
+
+Usage:
+    python -m benchmarks.frame_overhead --sessions 100 --seconds 10 --frame-ms 20
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from voice_pipeline.core.models import AudioData, TranscriptionResult, TurnResult
+
+class PydanticAudioData(BaseModel):
+    """The previous AudioData model, kept here as the baseline"""
+    data: bytes
+    sample_rate: int = 16000
+    channels: int = 1
+    format: str = "wav"
+
+class PydanticTranscriptionResult(BaseModel):
+    """The previous TranscriptionResult model, kept here as the baseline"""
+    text: str
+    segments: List[Dict[str, Any]] = []
+    language: Optional[str] = None
+    language_probability: Optional[float] = None
+    confidence: Optional[float] = None
+    error: Optional[str] = None
+
+def pydantic_frame(frame: bytes):
+    audio = PydanticAudioData(data=frame, format="raw")
+    result = {
+        "success": False,
+        "transcription": PydanticTranscriptionResult(text="", language="en"),
+        "llm_response": None,
+        "audio_response": None,
+        "turn_complete": True,
+        "endpointing_delay": 0.0,
+        "timings": {},
+    }
+    return audio.data[:160], result
+
+def slotted_frame(frame: bytes):
+    audio = AudioData(frame, format="raw")
+    result = TurnResult()
+    result.transcription = TranscriptionResult(text="", language="en")
+    return audio.data[:160], result
+
+def measure(handler: Callable[[bytes], Any], frames: List[bytes]) -> Dict[str, float]:
+    """Run a handler over every frame, returning time and allocation figures"""
+    started = time.perf_counter()
+    for frame in frames:
+        handler(frame)
+    elapsed = time.perf_counter() - started
+
+    # Allocation figures come from a second pass so tracing does not skew the timing
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [handler(frame) for frame in frames[:1000]]
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return {
+        "us_per_frame": elapsed / len(frames) * 1e6,
+        "bytes_per_frame": allocated / min(len(frames), 1000),
+        "blocks_per_frame": blocks / min(len(frames), 1000),
+        "peak_kb": peak / 1024,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100, help="Concurrent streaming sessions")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Seconds of audio per session")
+    parser.add_argument("--frame-ms", type=int, default=20, help="Frame duration")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    frame_bytes = args.sample_rate * args.frame_ms // 1000 * 2
+    frames_per_second = 1000 / args.frame_ms * args.sessions
+    frames = [bytes(frame_bytes)] * int(frames_per_second * args.seconds)
+
+    print(f"{len(frames)} frames of {frame_bytes} bytes ({frames_per_second:.0f} frames/s)")
+    print(f"{'':<10}{'us/frame':>10}{'B/frame':>10}{'blocks':>8}{'peak KB':>10}{'CPU at rate':>13}")
+    for name, handler in (("pydantic", pydantic_frame), ("slotted", slotted_frame)):
+        figures = measure(handler, frames)
+        cpu = figures["us_per_frame"] * frames_per_second / 1e6
+        print(f"{name:<10}{figures['us_per_frame']:>10.2f}{figures['bytes_per_frame']:>10.0f}"
+              f"{figures['blocks_per_frame']:>8.1f}{figures['peak_kb']:>10.0f}{cpu:>12.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,50 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import os
+import asyncio
+import hmac
 import uuid
 import logging
 import json
-from typing import Dict
+import threading
+from typing import Awaitable, Callable, Dict, Optional
 from dotenv import load_dotenv
-from starlette.websockets import WebSocketState
+from pydantic import ValidationError
 import uvicorn
 
 from voice_pipeline import (
     VoicePipelineAgent,
-    AudioData,
     ConversationContext,
     create_llm,
     create_stt,
     create_tts,
     SimpleEndpointingVAD,
-    EOUTurnDetector
+    EOUTurnDetector,
+    SessionStore,
+    SQLiteSessionBackend,
+    AdmissionController,
+    SessionQueue,
+    SessionAccounting,
+    SessionBudget,
+    ProfileController,
+    SessionRecorder,
+    SynthesisOptions,
+    FillerCache,
+    TurnResult,
+    OutputPlan,
+    AudioConditioner,
+    ConditionedSTT,
+    LongFormSTT,
+    limiter_stats,
+    load_tuning,
+    LoopMonitor,
+    SamplingProfiler
 )
+from voice_pipeline.core.diagnostics import MAX_PROFILE_DURATION, MAX_PROFILE_INTERVAL, MIN_PROFILE_INTERVAL
 from voice_pipeline.api.models import VoiceConfig, AssistantConfig
+from voice_pipeline.api.outbox import Outbox
+from voice_pipeline.api.protocol import JSONChannel, ProtocolError, accept_channel
 
 # Load environment variables
 load_dotenv()
@@ -51,7 +76,46 @@ if not CARTESIA_API_KEY:
     logger.warning("CARTESIA_API_KEY not found in environment variables")
 
 # Create component instances
-stt = create_stt("whisper", model_size="large")
+STT_HOST_SOCKET = os.getenv("STT_HOST_SOCKET")
+WORKER_ID = os.getenv("WORKER_ID", "main")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Whisper settings measured on this host by python -m voice_pipeline.tune, if any
+stt_tuning = load_tuning(os.getenv("STT_TUNING_FILE", "stt_tuning.json"))
+STT_WORKERS = int(os.getenv("STT_WORKERS", stt_tuning.num_workers if stt_tuning else 1))
+
+# Step STT down to cheaper decode profiles under load (set STT_PROFILES="" to disable)
+default_profiles = stt_tuning.register() if stt_tuning else ["accurate", "balanced", "fast"]
+stt_profiles = [name for name in os.getenv("STT_PROFILES", ",".join(default_profiles)).split(",") if name]
+stt_controller = ProfileController(
+    profiles=stt_profiles,
+    max_queue_wait=float(os.getenv("STT_MAX_QUEUE_WAIT", 1.0)),
+    max_rtf=float(os.getenv("STT_MAX_RTF", 0.5))
+) if stt_profiles else None
+if STT_HOST_SOCKET:
+    # Sharded deployment: decode on the shared model host instead of loading Whisper per worker
+    stt = create_stt("remote", socket_path=STT_HOST_SOCKET)
+else:
+    stt = create_stt("whisper",
+                     model_size=stt_tuning.model_size if stt_tuning else "large",
+                     compute_type=stt_tuning.compute_type if stt_tuning else "int8",
+                     beam_size=stt_tuning.beam_size if stt_tuning else 5,
+                     controller=stt_controller,
+                     num_workers=STT_WORKERS,
+                     cpu_threads=int(os.getenv("STT_CPU_THREADS", stt_tuning.cpu_threads if stt_tuning else 0)))
+if os.getenv("STT_CONDITIONING", "1").lower() in ("1", "true", "yes"):
+    # Trim silence and long pauses so Whisper decodes less audio per turn
+    stt = ConditionedSTT(stt, AudioConditioner(
+        max_pause=float(os.getenv("STT_MAX_PAUSE", 0.4)),
+        noise_gate=os.getenv("STT_NOISE_GATE", "").lower() in ("1", "true", "yes")
+    ))
+if os.getenv("STT_LONGFORM", "1").lower() in ("1", "true", "yes"):
+    # Decode long uploads as concurrent chunks, streaming segments as they finish
+    stt = LongFormSTT(
+        stt,
+        min_duration=float(os.getenv("STT_LONGFORM_MIN_DURATION", 30.0)),
+        max_concurrency=int(os.getenv("STT_LONGFORM_CONCURRENCY", 4 if STT_HOST_SOCKET else STT_WORKERS))
+    )
 # llm = create_llm("openai",api_key=OPENAI_API_KEY, model="gpt-4o")
 llm = create_llm("llama",api_key=LLAMA_API_KEY)
 tts = create_tts("cartesia", 
@@ -60,21 +124,309 @@ tts = create_tts("cartesia",
 vad = SimpleEndpointingVAD()
 turn_detector = EOUTurnDetector()
 
+# Conversation contexts survive disconnects in a bounded, disk-backed store
+session_store = SessionStore(
+    backend=SQLiteSessionBackend(os.getenv("SESSION_DB_PATH", "sessions.db")),
+    max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", 1000)),
+    max_bytes=int(os.getenv("SESSION_MAX_BYTES", 64 * 1024 * 1024)),
+    idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT", 1800)),
+    retention=float(os.getenv("SESSION_RETENTION", 7 * 24 * 3600))
+)
+
+# Per-worker admission limits so overload degrades gracefully
+admission = AdmissionController(
+    max_sessions=int(os.getenv("MAX_SESSIONS", 100)),
+    max_inflight_turns=int(os.getenv("MAX_INFLIGHT_TURNS", 8)),
+    max_queued_messages=int(os.getenv("MAX_QUEUED_MESSAGES", 8)),
+    max_audio_age=float(os.getenv("MAX_QUEUED_AUDIO_AGE", 10.0)),
+    max_queued_audio_bytes=int(os.getenv("MAX_QUEUED_AUDIO_BYTES", 24 * 1024 * 1024)),
+    retry_after=int(os.getenv("RETRY_AFTER_SECONDS", 5))
+)
+
+# Per-session memory caps, so one client cannot grow the worker for everyone
+accounting = SessionAccounting(
+    max_frame_bytes=int(os.getenv("SESSION_MAX_FRAME_BYTES", 10 * 1024 * 1024)),
+    max_rejected_frames=int(os.getenv("SESSION_MAX_REJECTED_FRAMES", 3)),
+    max_history_messages=int(os.getenv("SESSION_MAX_HISTORY_MESSAGES", 200)),
+    max_history_bytes=int(os.getenv("SESSION_MAX_HISTORY_BYTES", 256 * 1024)),
+    max_session_bytes=int(os.getenv("SESSION_MAX_MEMORY_BYTES", 48 * 1024 * 1024))
+)
+
+# Opt-in capture of sessions for replay-based performance testing
+RECORD_SESSIONS_DIR = os.getenv("RECORD_SESSIONS_DIR")
+
+# Optional acknowledgement clips played while the LLM is slow to answer
+FILLER_AUDIO = os.getenv("FILLER_AUDIO", "").lower() in ("1", "true", "yes")
+FILLER_THRESHOLD = float(os.getenv("FILLER_THRESHOLD", 0.8))
+FILLER_LANGUAGES = [lang for lang in os.getenv("FILLER_LANGUAGES", "en").split(",") if lang]
+filler_cache = FillerCache(tts) if FILLER_AUDIO else None
+
+# Outbound frames a session may queue before the pipeline waits for a slow client
+OUTBOX_SIZE = int(os.getenv("OUTBOX_SIZE", 32))
+
+# Seconds a turn's LLM and TTS calls may spend queueing for and retrying rate-limited providers
+TURN_BUDGET = float(os.getenv("TURN_BUDGET", 10.0))
+
 # Store active connections and their agents
 active_agents: Dict[str, VoicePipelineAgent] = {}
 
+# Event-loop lag and blocking-call detection (set LOOP_MONITOR=0 to disable)
+loop_monitor = LoopMonitor(
+    interval=float(os.getenv("LOOP_LAG_INTERVAL", 0.1)),
+    slow_callback=float(os.getenv("LOOP_SLOW_CALLBACK", 0.25))
+) if os.getenv("LOOP_MONITOR", "1").lower() in ("1", "true", "yes") else None
+
+# On-demand sampling profiler, started and collected through /admin/profile
+profiler = SamplingProfiler()
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Start sampling event-loop lag on the server's loop"""
+    if loop_monitor:
+        loop_monitor.start()
+
+@app.on_event("startup")
+async def start_session_maintenance():
+    """Start the background task that evicts idle sessions"""
+    asyncio.create_task(session_store.run_maintenance())
+
+@app.on_event("startup")
+async def warm_filler_cache():
+    """Synthesize filler clips for the default voice without delaying startup"""
+    if filler_cache:
+        asyncio.create_task(filler_cache.warm(SynthesisOptions(language=lang) for lang in FILLER_LANGUAGES))
+
+async def reject_connection(websocket: WebSocket):
+    """Turn away a connection this worker has no capacity for"""
+    logger.warning("Rejecting connection: session limit reached")
+    body = {"type": "error", "message": "Server overloaded", "retry_after": admission.retry_after}
+    
+    # Prefer a plain HTTP 503 when the server supports websocket denial responses
+    if "websocket.http.response" in websocket.scope.get("extensions", {}):
+        await websocket.send_denial_response(JSONResponse(
+            body, status_code=503, headers={"Retry-After": str(admission.retry_after)}
+        ))
+    else:
+        await websocket.accept()
+        await websocket.send_json(body)
+        await websocket.close(code=1013)  # Try Again Later
+
+# Control events are handled ahead of queued audio and text
+CONTROL_EVENTS = {"config", "history"}
+
+def close_session(outbox: Outbox, queue: SessionQueue, budget: SessionBudget, reason: str):
+    """End a session that went over its memory limits once its last frames are sent"""
+    if budget.closed:
+        return
+    budget.closed = reason
+    logger.warning(f"Closing session {budget.session_id}: {reason}")
+    outbox.send_control({"type": "error", "message": reason})
+    queue.close()
+
+async def read_messages(channel: JSONChannel,
+                        queue: SessionQueue,
+                        outbox: Outbox,
+                        budget: SessionBudget,
+                        cancel_turn: Callable[[], bool],
+                        recorder: Optional[SessionRecorder] = None):
+    """Read inbound frames into the session queue until the client disconnects
+    
+    Reading continues while a turn runs, so a "cancel" event or a
+    disconnect stops the turn straight away, and config and history
+    events are queued ahead of pending audio and text.
+    """
+    try:
+        while True:
+            message = await channel.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            # Refuse oversized frames before decoding them
+            frame = message.get("bytes") or message.get("text") or ""
+            if not budget.check_frame(len(frame)):
+                if budget.too_many_rejected_frames:
+                    close_session(outbox, queue, budget, budget.exceeded())
+                    cancel_turn()
+                    break
+                outbox.send_control({
+                    "type": "error",
+                    "message": "Frame too large",
+                    "max_frame_bytes": budget.max_frame_bytes
+                })
+                continue
+            
+            try:
+                decoded = channel.decode(message)
+            except (ProtocolError, ValueError) as e:
+                outbox.send_control({"type": "error", "message": f"Invalid message: {str(e)}"})
+                continue
+            if decoded is None:
+                continue
+            kind, payload = decoded
+            
+            if recorder:
+                if kind == "audio":
+                    recorder.record_audio(payload)
+                elif kind == "event":
+                    recorder.record_text(json.dumps(payload))
+                else:
+                    recorder.record_text(payload)
+            
+            if kind == "event" and payload.get("type") == "cancel":
+                outbox.send_control({"type": "cancel", "cancelled": cancel_turn()})
+                continue
+            
+            priority = kind == "event" and payload.get("type") in CONTROL_EVENTS
+            if not queue.put_nowait(kind, payload, priority=priority):
+                if queue.closed:
+                    break
+                if queue.finished:
+                    # The worker is draining; queued input is still answered before the session moves
+                    outbox.send_control({"type": "error", "message": "Server restarting"})
+                    continue
+                outbox.send_control({
+                    "type": "error",
+                    "message": "Too many queued messages",
+                    "retry_after": admission.retry_after
+                })
+            
+            reason = budget.exceeded()
+            if reason:
+                close_session(outbox, queue, budget, reason)
+                cancel_turn()
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        queue.close()
+        if not channel.connected:
+            cancel_turn()
+
+async def send_filler(outbox: Outbox, event: Dict, turn_id: int):
+    """Send a filler clip, announced first so the client can tell it from the response"""
+    if not outbox.connected:
+        return
+    
+    await outbox.send_event({"type": "filler", "text": event["text"]}, turn_id)
+    await outbox.send_audio(event["audio"], turn_id, filler=True)
+
+async def send_turn_response(outbox: Outbox,
+                             agent: VoicePipelineAgent,
+                             result: TurnResult,
+                             turn_id: int,
+                             plan: OutputPlan = OutputPlan.BOTH):
+    """Send the parts of the response to a completed turn that the plan asks for"""
+    detected_language = result.language
+    
+    # Keep responding in the detected language
+    if result.llm_response and detected_language:
+        lang_prompt = f"Respond in {detected_language} language. "
+        if not agent.chat_ctx.system_prompt.startswith(lang_prompt):
+            agent.update_system_prompt(lang_prompt + agent.chat_ctx.system_prompt)
+    
+    # Send text response
+    if result.llm_response and plan.shows_text:
+        await outbox.send_event({
+            "type": "text_response",
+            "text": result.llm_response.text
+        }, turn_id)
+    
+    # Send audio response (synthesized in the detected language), unless it was streamed
+    if result.audio_response and not result.audio_streamed:
+        await outbox.send_audio(result.audio_response, turn_id)
+
 @app.websocket("/ws/assistant")
 async def websocket_assistant(websocket: WebSocket):
     """WebSocket endpoint for the voice assistant"""
-    await websocket.accept()
+    if not admission.try_admit():
+        await reject_connection(websocket)
+        return
     
-    # Generate a unique ID for this connection
-    connection_id = str(uuid.uuid4())
+    queue = admission.create_queue()
+    try:
+        await run_session(websocket, queue)
+    finally:
+        admission.release(queue)
+
+async def run_session(websocket: WebSocket, queue: SessionQueue):
+    """Run an admitted voice assistant session until the client disconnects"""
+    channel = await accept_channel(websocket)
+    outbox = Outbox(channel, maxsize=OUTBOX_SIZE)
+    outbox.start()
+    reader = None
+    recorder = None
+    
+    # Resume an existing session if the client passed its ID, otherwise start a new one
+    session_id = websocket.query_params.get("session_id")
+    initial_ctx = await session_store.get(session_id) if session_id else None
+    resumed = initial_ctx is not None
+    
+    if not session_id:
+        session_id = str(uuid.uuid4())
     
     # Create initial conversation context
-    initial_ctx = ConversationContext(
-        system_prompt="You are a helpful voice assistant. Keep responses concise and conversational."
-    )
+    if initial_ctx is None:
+        initial_ctx = ConversationContext(
+            system_prompt="You are a helpful voice assistant. Keep responses concise and conversational."
+        )
+    
+    # Numbers user turns so clients can match events and audio to them
+    turn_id = 0
+    
+    # Outputs wanted for spoken turns, set with the "output" config key
+    audio_plan = OutputPlan.BOTH
+    pending_plan = audio_plan
+    
+    async def on_agent_event(kind: str, event: Dict):
+        if kind == "filler":
+            await send_filler(outbox, event, turn_id)
+        elif kind == "text_delta":
+            await outbox.send_event({"type": "text_delta", **event}, turn_id)
+        elif kind == "transcription":
+            await outbox.send_event({"type": "transcription", **event}, turn_id)
+        elif kind == "transcript_segments":
+            await outbox.send_event({"type": "transcript_segments", **event}, turn_id)
+        elif kind == "audio":
+            await outbox.send_audio(event["audio"], turn_id, final=event["final"])
+    
+    # The turn in progress, which a "cancel" event or a disconnect stops
+    current_turn: Optional[asyncio.Task] = None
+    
+    def cancel_turn() -> bool:
+        if current_turn is None or current_turn.done():
+            return False
+        current_turn.cancel()
+        return True
+    
+    async def run_turn(turn: Awaitable[TurnResult]) -> Optional[TurnResult]:
+        """Run a turn as its own task, returning None if it was cancelled"""
+        nonlocal current_turn
+        
+        async def admitted() -> TurnResult:
+            async with admission.turn():
+                return await turn
+        
+        current_turn = asyncio.ensure_future(admitted())
+        try:
+            await asyncio.wait({current_turn})
+        except asyncio.CancelledError:
+            current_turn.cancel()
+            raise
+        if current_turn.cancelled():
+            logger.info(f"Turn {turn_id} of session {session_id} cancelled")
+            return None
+        return current_turn.result()
+    
+    async def answer_pending_turn():
+        """Respond to held-back speech without waiting for more"""
+        result = await run_turn(agent.complete_pending_turn())
+        if result is None:
+            return
+        budget.hold(result)
+        if recorder:
+            recorder.record_turn(result)
+        await send_turn_response(outbox, agent, result, turn_id, pending_plan)
+        await session_store.put(session_id, agent.chat_ctx)
     
     # Create the voice pipeline agent
     agent = VoicePipelineAgent(
@@ -85,167 +437,336 @@ async def websocket_assistant(websocket: WebSocket):
         turn_detector=turn_detector,
         min_endpointing_delay=0.5,
         max_endpointing_delay=5.0,
-        chat_ctx=initial_ctx
+        chat_ctx=initial_ctx,
+        filler=filler_cache,
+        filler_threshold=FILLER_THRESHOLD,
+        on_event=on_agent_event,
+        session_id=session_id,
+        turn_budget=TURN_BUDGET,
+        transcript_segments=False,
+        stream_audio=outbox.streams_audio
     )
     
     # Store agent
-    active_agents[connection_id] = agent
+    active_agents[session_id] = agent
+    budget = accounting.create_budget(session_id, queue, agent.chat_ctx)
     
-    logger.info(f"New voice assistant connection: {connection_id}")
+    logger.info(f"New voice assistant connection: {session_id} (resumed: {resumed})")
     
     try:
+        await outbox.send_event({
+            "type": "session",
+            "session_id": session_id,
+            "resumed": resumed,
+            "message_count": len(agent.chat_ctx.messages)
+        })
+        
+        if RECORD_SESSIONS_DIR:
+            recorder = SessionRecorder(RECORD_SESSIONS_DIR, session_id)
+        
+        # Keep reading the socket while turns run, so control messages and disconnects act at once
+        reader = asyncio.create_task(read_messages(channel, queue, outbox, budget, cancel_turn, recorder))
+        
+        loop = asyncio.get_running_loop()
+        turn_deadline = None
+        
         while True:
-            # Receive message
-            message = await websocket.receive()
+            # Between turns, drop the last response from the account, trim history and enforce the caps
+            budget.release()
+            reason = budget.exceeded()
+            if reason:
+                close_session(outbox, queue, budget, reason)
+                break
+            
+            # Receive message, unless a held-back turn's endpointing delay runs out first
+            timeout = None if turn_deadline is None else max(0.0, turn_deadline - loop.time())
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                turn_deadline = None
+                await answer_pending_turn()
+                continue
+            
+            if message is None:
+                # A draining worker answers held-back speech rather than dropping it with the session
+                if queue.finished and agent.has_pending_turn and outbox.connected:
+                    await answer_pending_turn()
+                break
+            kind, payload = message
             
             # Handle different message types
-            if "bytes" in message:
+            if kind == "audio":
                 # Audio data case
-                audio_data = message["bytes"]
-                logger.info(f"Received audio data: {len(audio_data)} bytes")
+                audio = payload
+                logger.info(f"Received audio data: {len(audio.data)} bytes")
+                
+                # Speech after a completed turn starts a new one
+                if not agent.has_pending_turn:
+                    turn_id += 1
+                    pending_plan = audio_plan
                 
                 # Process audio through pipeline
-                audio = AudioData(data=audio_data, format="wav")
-                result = await agent.process_audio(audio)
+                result = await run_turn(agent.process_audio(audio, pending_plan))
+                if result is None:
+                    continue
+                budget.hold(result)
+                if recorder:
+                    recorder.record_turn(result)
                 
-                # Get detected language from STT result
-                detected_language = None
-                if result["transcription"] and hasattr(result["transcription"], "language"):
-                    detected_language = result["transcription"].language
-                    logger.info(f"Detected language: {detected_language}")
+                # The transcription event was sent by the agent before the response started
+                if result.transcription:
+                    logger.info(f"Detected language: {result.transcription.language}")
                 
-                # Send transcription result
-                if result["transcription"]:
-                    await websocket.send_json({
-                        "type": "transcription",
-                        "text": result["transcription"].text,
-                        "language": detected_language
-                    })
+                # Wait for more speech if the user sounds mid-sentence
+                if result.turn_complete:
+                    turn_deadline = None
+                    await send_turn_response(outbox, agent, result, turn_id, pending_plan)
+                else:
+                    turn_deadline = loop.time() + result.endpointing_delay
                 
-                # Send text response with detected language
-                if result["llm_response"]:
-                    # Update LLM system prompt with language preference
-                    if detected_language:
-                        lang_prompt = f"Respond in {detected_language} language. "
-                        agent.update_system_prompt(lang_prompt + agent.chat_ctx.system_prompt)
+                await session_store.put(session_id, agent.chat_ctx)
                     
-                    await websocket.send_json({
-                        "type": "text_response",
-                        "text": result["llm_response"].text
-                    })
+            elif kind == "event":
+                # Event message for configuration or commands
+                data = payload
                 
-                # Send audio response with detected language
-                if result["audio_response"] and websocket.client_state == WebSocketState.CONNECTED:
-                    if detected_language and hasattr(agent.tts, "set_language"):
-                        agent.tts.set_language(detected_language)
-                        
-                    await websocket.send({
-                        "type": "websocket.send", 
-                        "bytes": result["audio_response"].audio, 
-                        "subprotocol": f"audio/{result['audio_response'].format}"
-                    })
+                # Handle configuration updates
+                if data.get("type") == "config":
+                    config_data = data.get("config", {})
                     
-            elif "text" in message:
-                # Text message for configuration or commands
-                text_data = message["text"]
-                
-                try:
-                    data = json.loads(text_data)
+                    # Update this session's voice settings first, so invalid ones reject the whole config
+                    if "voice" in config_data:
+                        voice_data = config_data["voice"]
+                        try:
+                            agent.update_tts_options(**{
+                                key: voice_data[key]
+                                for key in ("voice_id", "language", "speed", "format")
+                                if key in voice_data
+                            })
+                        except ValidationError as e:
+                            await outbox.send_event({
+                                "type": "error",
+                                "message": "Invalid voice settings",
+                                "errors": [
+                                    {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                                    for error in e.errors()
+                                ]
+                            })
+                            continue
+                        except ValueError as e:
+                            await outbox.send_event({
+                                "type": "error",
+                                "message": "Invalid voice settings",
+                                "errors": [{"field": "format", "message": str(e)}]
+                            })
+                            continue
                     
-                    # Handle configuration updates
-                    if data.get("type") == "config":
-                        config_data = data.get("config", {})
-                        
-                        # Update system prompt if provided
-                        if "system_prompt" in config_data:
-                            agent.update_system_prompt(config_data["system_prompt"])
-                            
-                        # Update voice settings if provided
-                        if "voice" in config_data and hasattr(agent.tts, "voice_id"):
-                            voice_data = config_data["voice"]
-                            if "voice_id" in voice_data:
-                                agent.tts.voice_id = voice_data["voice_id"]
+                    # Change which outputs later spoken turns produce
+                    audio_plan = OutputPlan.from_message(config_data, audio_plan)
+                    
+                    # Update system prompt if provided
+                    if "system_prompt" in config_data:
+                        agent.update_system_prompt(config_data["system_prompt"])
                         
-                        await websocket.send_json({
-                            "type": "config_updated",
+                    await session_store.put(session_id, agent.chat_ctx)
+                    await outbox.send_event({
+                        "type": "config_updated",
+                        "success": True
+                    })
+                    
+                # Handle conversation history commands
+                elif data.get("type") == "history":
+                    action = data.get("action")
+                    if action == "clear":
+                        agent.clear_conversation()
+                        await session_store.put(session_id, agent.chat_ctx)
+                        await outbox.send_event({
+                            "type": "history_cleared",
                             "success": True
                         })
+                    elif action == "get":
+                        history = agent.chat_ctx.messages
+                        await outbox.send_event({
+                            "type": "history",
+                            "data": [{"role": msg.role, "content": msg.content} for msg in history]
+                        })
                         
-                    # Handle conversation history commands
-                    elif data.get("type") == "history":
-                        action = data.get("action")
-                        if action == "clear":
-                            agent.clear_conversation()
-                            await websocket.send_json({
-                                "type": "history_cleared",
-                                "success": True
-                            })
-                        elif action == "get":
-                            history = agent.chat_ctx.messages
-                            await websocket.send_json({
-                                "type": "history",
-                                "data": [{"role": msg.role, "content": msg.content} for msg in history]
-                            })
-                            
-                    # Handle text-only input (no audio)
-                    elif data.get("type") == "text_input":
-                        user_input = data.get("text", "")
-                        if user_input:
-                            # Process text through pipeline
-                            result = await agent.process_text(user_input)
-                            
-                            # Send text response
-                            if result["llm_response"]:
-                                await websocket.send_json({
-                                    "type": "text_response",
-                                    "text": result["llm_response"].text
-                                })
-                            
-                            # Send audio response if requested
-                            if data.get("tts", True) and result["audio_response"]:
-                                await websocket.send({
-                                    "type": "websocket.send", 
-                                    "bytes": result["audio_response"].audio, 
-                                    "subprotocol": f"audio/{result['audio_response'].format}"
-                                })
+                # Handle text-only input (no audio)
+                elif data.get("type") == "text_input":
+                    user_input = data.get("text", "")
+                    if user_input:
+                        # Process text through pipeline
+                        turn_id += 1
+                        plan = OutputPlan.from_message(data, OutputPlan.BOTH)
+                        result = await run_turn(agent.process_text(user_input, plan))
+                        if result is None:
+                            continue
+                        budget.hold(result)
+                        if recorder:
+                            recorder.record_turn(result)
+                        turn_deadline = None
+                        await session_store.put(session_id, agent.chat_ctx)
+                        
+                        # Send the text and audio the plan asks for
+                        if result.llm_response and plan.shows_text:
+                            await outbox.send_event({
+                                "type": "text_response",
+                                "text": result.llm_response.text
+                            }, turn_id)
+                        if result.audio_response and not result.audio_streamed:
+                            await outbox.send_audio(result.audio_response, turn_id)
+            
+            elif kind == "text":
+                # Handle plain text input, which is only ever answered in text
+                user_input = payload
+                turn_id += 1
+                result = await run_turn(agent.process_text(user_input, OutputPlan.TEXT))
+                if result is None:
+                    continue
+                budget.hold(result)
+                if recorder:
+                    recorder.record_turn(result)
+                turn_deadline = None
+                await session_store.put(session_id, agent.chat_ctx)
                 
-                except json.JSONDecodeError:
-                    # Handle plain text input
-                    user_input = text_data
-                    result = await agent.process_text(user_input)
-                    
-                    # Send text response
-                    if result["llm_response"]:
-                        await websocket.send_json({
-                            "type": "text_response",
-                            "text": result["llm_response"].text
-                        })
+                # Send text response
+                if result.llm_response:
+                    await outbox.send_event({
+                        "type": "text_response",
+                        "text": result.llm_response.text
+                    }, turn_id)
+        
+        # A draining worker hands the session back to the front to migrate it, once its input is answered
+        if queue.finished and not budget.closed:
+            await session_store.put(session_id, agent.chat_ctx)
+            await outbox.drain()
+            await websocket.close(code=1012)  # Service Restart
+        elif budget.closed:
+            await outbox.drain()
+            await websocket.close(code=1008)  # Policy Violation
     
     except WebSocketDisconnect:
-        logger.info(f"WebSocket disconnected: {connection_id}")
+        logger.info(f"WebSocket disconnected: {session_id}")
     except Exception as e:
         logger.error(f"Error in WebSocket connection: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
-        try:
-            await websocket.send_json({"type": "error", "message": str(e)})
-        except:
-            pass
+        outbox.send_control({"type": "error", "message": str(e)})
     finally:
-        # Clean up
-        if connection_id in active_agents:
-            del active_agents[connection_id]
+        cancel_turn()
+        if reader is not None:
+            reader.cancel()
+        await outbox.drain()
+        if recorder is not None:
+            recorder.close()
+        accounting.release(budget)
+        
+        # Clean up, keeping the conversation available for a reconnect
+        if active_agents.get(session_id) is agent:
+            del active_agents[session_id]
+        try:
+            await session_store.put(session_id, agent.chat_ctx)
+        except Exception as e:
+            logger.error(f"Failed to persist session {session_id}: {str(e)}")
 
 @app.get("/")
 async def root():
     return {
         "message": "Voice Assistant API is running",
         "endpoints": {
-            "ws_assistant": "/ws/assistant"
+            "ws_assistant": "/ws/assistant",
+            "load": "/load",
+            "health": "/health"
         }
     }
 
+@app.get("/load")
+async def load():
+    """Current load figures for upstream balancers"""
+    return {
+        "worker": WORKER_ID,
+        **admission.load(),
+        "session_store": session_store.stats(),
+        "stt": stt.stats(),
+        "providers": limiter_stats(),
+        "loop": loop_monitor.stats() if loop_monitor else None,
+        "session_memory": accounting.load()
+    }
+
+@app.get("/health")
+async def health():
+    """Report 503 while the worker is full so balancers route around it"""
+    if not admission.accepting:
+        return JSONResponse(
+            {"status": "overloaded", "retry_after": admission.retry_after},
+            status_code=503,
+            headers={"Retry-After": str(admission.retry_after)}
+        )
+    return {"status": "ok"}
+
+def check_admin(request: Request):
+    """Reject admin requests without the configured ADMIN_TOKEN; with none set, admin endpoints are off"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/drain")
+async def drain(request: Request):
+    """Stop admitting sessions and close active ones once their queued input is answered"""
+    check_admin(request)
+    admission.drain()
+    return {"worker": WORKER_ID, "draining": True, "sessions": len(active_agents)}
+
+@app.post("/admin/undrain")
+async def undrain(request: Request):
+    """Admit sessions again after a drain; sessions already closing still move"""
+    check_admin(request)
+    admission.undrain()
+    return {"worker": WORKER_ID, "draining": False, "sessions": len(active_agents)}
+
+@app.get("/admin/sessions")
+async def session_usage(request: Request):
+    """Memory held by each active session, largest first"""
+    check_admin(request)
+    return {"worker": WORKER_ID, "totals": accounting.load(), "sessions": accounting.sessions()}
+
+@app.get("/admin/loop")
+async def loop_report(request: Request):
+    """Event-loop lag and the stacks of recent calls that blocked the loop"""
+    check_admin(request)
+    return {
+        "worker": WORKER_ID,
+        "loop": loop_monitor.stats() if loop_monitor else None,
+        "blocked": list(loop_monitor.reports) if loop_monitor else [],
+        "profiler": profiler.stats()
+    }
+
+@app.post("/admin/profile/start")
+async def start_profile(request: Request,
+                        interval: float = Query(0.005, ge=MIN_PROFILE_INTERVAL, le=MAX_PROFILE_INTERVAL),
+                        seconds: float = Query(60.0, gt=0, le=MAX_PROFILE_DURATION),
+                        threads: str = "all"):
+    """Start sampling stacks of every thread, or of the event loop's with threads=loop
+    
+    Out-of-range interval or seconds values are rejected with 422.
+    """
+    check_admin(request)
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    loop_thread = threading.get_ident() if threads == "loop" else None
+    profiler.start(interval=interval, max_duration=seconds, thread_id=loop_thread)
+    return {"worker": WORKER_ID, **profiler.stats()}
+
+@app.post("/admin/profile/stop")
+async def stop_profile(request: Request):
+    """Stop the profiler and return folded stacks for flamegraph.pl or speedscope"""
+    check_admin(request)
+    return PlainTextResponse(profiler.stop())
+
 # Only run the server when this script is executed directly (not imported)
+# For a multi-process deployment sharing one STT model, run
+# `python -m voice_pipeline.deploy --workers N` instead
 if __name__ == "__main__":
     # Get port from environment variable (Render sets this)
     port = int(os.getenv("PORT", 8000))
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import groq
+import httpx
+import openai
+import pytest
+
+from voice_pipeline.components.llm.groq_llama import GroqLlamaLLM
+from voice_pipeline.components.llm.openai import OpenAILLM
+from voice_pipeline.core.models import ConversationContext
+from voice_pipeline.core.ratelimit import ProviderLimiter
+
+REPLY = "Hello there."
+
+def completion() -> dict:
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": REPLY}}],
+    }
+
+def stream_body() -> bytes:
+    lines = []
+    for piece in ("Hello", " there."):
+        chunk = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "test",
+            "choices": [{"index": 0, "finish_reason": None, "delta": {"content": piece}}],
+        }
+        lines.append(f"data: {json.dumps(chunk)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode()
+
+def handler(request: httpx.Request) -> httpx.Response:
+    headers = {"x-ratelimit-remaining-requests": "99"}
+    if json.loads(request.content).get("stream"):
+        return httpx.Response(200, content=stream_body(), headers={**headers, "content-type": "text/event-stream"})
+    return httpx.Response(200, json=completion(), headers=headers)
+
+def openai_llm() -> OpenAILLM:
+    llm = OpenAILLM(api_key="test", limiter=ProviderLimiter("openai:test"))
+    llm.client = openai.AsyncOpenAI(
+        api_key="test", max_retries=0, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    return llm
+
+def groq_llm() -> GroqLlamaLLM:
+    llm = GroqLlamaLLM(api_key="test", limiter=ProviderLimiter("groq:test"))
+    llm.client = groq.AsyncGroq(
+        api_key="test", max_retries=0, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    return llm
+
+def context() -> ConversationContext:
+    ctx = ConversationContext()
+    ctx.add_message("user", "Hi")
+    return ctx
+
+@pytest.mark.parametrize("make_llm", [openai_llm, groq_llm])
+def test_generate_response(make_llm):
+    response = asyncio.run(make_llm().generate_response(context()))
+    assert response.text == REPLY
+
+@pytest.mark.parametrize("make_llm", [openai_llm, groq_llm])
+def test_stream_response(make_llm):
+    async def collect():
+        return [delta async for delta in make_llm().stream_response(context())]
+
+    assert "".join(asyncio.run(collect())) == REPLY
@@ -0,0 +1,83 @@
+import asyncio
+
+import msgpack
+import pytest
+from starlette.websockets import WebSocketState
+
+from voice_pipeline.api.protocol import (
+    AUDIO, CODECS, EVENT, FLAG_FILLER, FLAG_FINAL, HEADER, BinaryChannel, JSONChannel, ProtocolError,
+    decode_frame, encode_frame
+)
+from voice_pipeline.core.models import TTSResult
+
+class FakeWebSocket:
+    def __init__(self):
+        self.client_state = WebSocketState.CONNECTED
+        self.sent = []
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+def test_frame_round_trip():
+    data = encode_frame(AUDIO, b"payload", turn_id=7, seq=42, codec=CODECS["opus"], flags=FLAG_FINAL)
+    frame = decode_frame(data)
+    assert (frame.type, frame.flags, frame.codec, frame.turn_id, frame.seq) == (AUDIO, FLAG_FINAL, CODECS["opus"], 7, 42)
+    assert bytes(frame.payload) == b"payload"
+
+def test_decode_event_and_audio():
+    channel = BinaryChannel(FakeWebSocket())
+    event = {"type": "text_input", "text": "hello"}
+    assert channel.decode({"bytes": encode_frame(EVENT, msgpack.packb(event))}) == ("event", event)
+
+    kind, audio = channel.decode({"bytes": encode_frame(AUDIO, b"\x01\x02", codec=CODECS["mp3"])})
+    assert kind == "audio"
+    assert audio.format == "mp3"
+    assert bytes(audio.data) == b"\x01\x02"
+
+def test_rejects_unsupported_version():
+    data = HEADER.pack(2, EVENT, 0, CODECS["msgpack"], 0, 0) + msgpack.packb({})
+    with pytest.raises(ProtocolError, match="version"):
+        decode_frame(data)
+
+def test_rejects_unknown_codec():
+    data = HEADER.pack(1, AUDIO, 0, 99, 0, 0) + b"x"
+    with pytest.raises(ProtocolError, match="codec"):
+        decode_frame(data)
+
+def test_rejects_short_frames_and_text_messages():
+    channel = BinaryChannel(FakeWebSocket())
+    with pytest.raises(ProtocolError, match="too short"):
+        channel.decode({"bytes": b"\x01\x01"})
+    with pytest.raises(ProtocolError, match="Text messages"):
+        channel.decode({"text": "{}"})
+    with pytest.raises(ProtocolError, match="maps"):
+        channel.decode({"bytes": encode_frame(EVENT, msgpack.packb([1, 2]))})
+
+def test_send_numbers_frames_and_sets_flags():
+    websocket = FakeWebSocket()
+    channel = BinaryChannel(websocket)
+
+    async def send():
+        await channel.send_event({"type": "session", "session_id": "abc"}, turn_id=3)
+        await channel.send_audio(TTSResult(audio=b"filler", format="mp3"), turn_id=3, filler=True)
+        await channel.send_audio(TTSResult(audio=b"part", format="wav"), turn_id=3, final=False)
+        await channel.send_audio(TTSResult(audio=b"", format="wav"), turn_id=3)
+
+    asyncio.run(send())
+    frames = [decode_frame(data) for data in websocket.sent]
+    assert [frame.seq for frame in frames] == [1, 2, 3, 4]
+    assert all(frame.turn_id == 3 for frame in frames)
+    assert msgpack.unpackb(frames[0].payload) == {"type": "session", "session_id": "abc"}
+    assert frames[1].flags == FLAG_FINAL | FLAG_FILLER
+    assert frames[2].flags == 0 and frames[2].codec == CODECS["wav"]
+    assert frames[3].flags == FLAG_FINAL
+
+def test_json_channel_decodes_legacy_messages():
+    channel = JSONChannel(FakeWebSocket())
+    assert channel.decode({"text": '{"type": "config"}'}) == ("event", {"type": "config"})
+    assert channel.decode({"text": "hello"}) == ("text", "hello")
+    kind, audio = channel.decode({"bytes": b"RIFF"})
+    assert kind == "audio" and audio.format == "wav"
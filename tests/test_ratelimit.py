@@ -0,0 +1,38 @@
+import pytest
+
+from voice_pipeline.core.ratelimit import TokenBucket
+
+def test_bucket_starts_full_and_refills_at_its_rate():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    assert bucket.wait_time(60, now) == 0.0
+
+    bucket.take(60, now)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(1, now + 1.0) == 0.0
+
+def test_refill_stops_at_capacity():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    bucket.take(30, now)
+    assert bucket.wait_time(60, now + 3600) == 0.0
+    assert bucket.level == 60
+
+def test_requests_larger_than_the_bucket_wait_for_a_full_one():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    bucket.take(60, now)
+    assert bucket.wait_time(1000, now) == pytest.approx(60.0)
+
+    bucket.take(1000, now + 60)
+    assert bucket.level == pytest.approx(0.0)
+
+def test_update_follows_provider_headers():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated
+    bucket.update(limit=100, remaining=40, reset=30, now=now)
+    assert bucket.capacity == 100
+    assert bucket.level == 40
+    assert bucket.rate == pytest.approx(2.0)
+    assert bucket.wait_time(50, now) == pytest.approx(5.0)
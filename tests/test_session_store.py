@@ -0,0 +1,72 @@
+import asyncio
+
+from voice_pipeline.core.models import ConversationContext
+from voice_pipeline.session.store import SessionStore, SQLiteSessionBackend
+
+def context(*messages: str) -> ConversationContext:
+    ctx = ConversationContext()
+    for message in messages:
+        ctx.add_message("user", message)
+    return ctx
+
+def contents(ctx: ConversationContext):
+    return [message.content for message in ctx.messages]
+
+def test_lru_evicts_least_recently_used():
+    store = SessionStore(max_sessions=2)
+
+    async def run():
+        await store.put("a", context("a"))
+        await store.put("b", context("b"))
+        await store.get("a")
+        await store.put("c", context("c"))
+        return [await store.get(session_id) for session_id in ("a", "b", "c")]
+
+    a, b, c = asyncio.run(run())
+    assert contents(a) == ["a"] and b is None and contents(c) == ["c"]
+    assert store.stats()["sessions"] == 2
+    assert store.stats()["evictions"] == 1
+
+def test_byte_bound_keeps_newest_entry():
+    size = len(context("x" * 100).model_dump_json())
+    store = SessionStore(max_bytes=size * 2)
+
+    async def run():
+        for session_id in ("a", "b", "c"):
+            await store.put(session_id, context("x" * 100))
+        await store.put("big", context("x" * 1000))
+
+    asyncio.run(run())
+    assert store.stats()["sessions"] == 1
+    assert store.stats()["bytes"] > size * 2
+
+def test_resume_from_sqlite_after_eviction(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SessionStore(SQLiteSessionBackend(path), max_sessions=1)
+
+    async def run():
+        await store.put("a", context("first", "second"))
+        await store.put("b", context("other"))
+        resumed = await store.get("a")
+        restarted = await SessionStore(SQLiteSessionBackend(path)).get("a")
+        return resumed, restarted
+
+    resumed, restarted = asyncio.run(run())
+    assert contents(resumed) == ["first", "second"]
+    assert contents(restarted) == ["first", "second"]
+
+def test_get_returns_newer_context_saved_by_another_worker(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    worker_a = SessionStore(SQLiteSessionBackend(path))
+    worker_b = SessionStore(SQLiteSessionBackend(path))
+
+    async def run():
+        await worker_a.put("s", context("on a"))
+        moved = await worker_b.get("s")
+        moved.add_message("user", "on b")
+        await worker_b.put("s", moved)
+        return await worker_a.get("s"), await worker_a.get("s")
+
+    first, second = asyncio.run(run())
+    assert contents(first) == ["on a", "on b"]
+    assert first is not second
@@ -0,0 +1,49 @@
+import asyncio
+
+import numpy as np
+
+from voice_pipeline.components.turn_detector.eou import EOUTurnDetector
+from voice_pipeline.core.models import AudioData
+from voice_pipeline.core.utils import encode_wav
+
+# Audio the detector cannot analyse, so only the transcript counts
+NO_AUDIO = AudioData(b"", format="raw")
+
+def delay(detector: EOUTurnDetector, transcript: str, audio: AudioData = NO_AUDIO) -> float:
+    return asyncio.run(detector.endpointing_delay(audio, transcript, min_delay=0.5, max_delay=5.0))
+
+def speech(seconds: float, silence: float = 0.0, sample_rate: int = 16000) -> AudioData:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * 180 * t)
+    samples = np.concatenate([tone, np.zeros(int(silence * sample_rate))]).astype(np.float32)
+    return AudioData(encode_wav(samples, sample_rate), sample_rate=sample_rate)
+
+def test_text_logit_orders_finished_above_unfinished():
+    detector = EOUTurnDetector()
+    scores = [
+        detector.text_logit(text)
+        for text in ("What time is it?", "what time is it", "I want to go to the", "so I was thinking um")
+    ]
+    assert scores == sorted(scores, reverse=True)
+    assert detector.text_logit("") < 0
+    assert detector.text_logit("yes") > detector.text_logit("maybe")
+
+def test_delay_grows_as_the_turn_sounds_less_finished():
+    detector = EOUTurnDetector()
+    finished = delay(detector, "What is the weather like today?")
+    unpunctuated = delay(detector, "what is the weather like today")
+    dangling = delay(detector, "I want to go to the")
+    hesitating = delay(detector, "so I was thinking um")
+
+    assert finished == 0.0
+    assert 0.5 <= unpunctuated < dangling < hesitating <= 5.0
+
+def test_confident_turns_skip_the_minimum_delay():
+    assert delay(EOUTurnDetector(), "Thanks.") == 0.0
+    assert delay(EOUTurnDetector(complete_threshold=1.0), "Thanks.") >= 0.5
+
+def test_trailing_silence_counts_toward_the_delay():
+    detector = EOUTurnDetector()
+    without = delay(detector, "what is the weather like today", speech(1.0))
+    with_silence = delay(detector, "what is the weather like today", speech(1.0, silence=0.6))
+    assert with_silence < without
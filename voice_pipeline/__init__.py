@@ -9,15 +9,34 @@ from voice_pipeline.core.interfaces import (
 
 # Import data models
 from voice_pipeline.core.models import (
-    AudioData, TranscriptionResult, LLMResponse, TTSResult, 
-    Message, ConversationContext
+    AudioData, TranscriptionResult, Segments, LLMResponse, TTSResult, 
+    SynthesisOptions, TurnResult, OutputPlan, Message, ConversationContext
 )
 
+# Import provider rate limiting
+from voice_pipeline.core.ratelimit import ProviderLimiter, RateLimitExceeded, limiter_for, limiter_stats
+
+# Import runtime diagnostics
+from voice_pipeline.core.diagnostics import LoopMonitor, SamplingProfiler
+
+# Import session management
+from voice_pipeline.session.store import SessionStore, SQLiteSessionBackend
+from voice_pipeline.session.admission import AdmissionController, SessionQueue
+from voice_pipeline.session.budget import SessionAccounting, SessionBudget
+from voice_pipeline.replay.recorder import SessionRecorder
+
 # Import main agent class
 from voice_pipeline.pipeline.agent import VoicePipelineAgent
+from voice_pipeline.pipeline.filler import FillerCache
 
 # Import component implementations
 from voice_pipeline.components.stt.whisper import FasterWhisperSTT
+from voice_pipeline.components.stt.remote import RemoteSTT
+from voice_pipeline.components.stt.profiles import (
+    DecodeProfile, ProfileController, PROFILES, WhisperTuning, load_tuning
+)
+from voice_pipeline.components.stt.conditioning import AudioConditioner, ConditionedSTT
+from voice_pipeline.components.stt.longform import LongFormSTT
 from voice_pipeline.components.llm.openai import OpenAILLM
 # from voice_pipeline.components.llm.anthropic import AnthropicLLM  # Add more LLM imports
 from voice_pipeline.components.tts.cartesia import CartesiaTTS
@@ -37,8 +56,8 @@ def create_llm(model_name: str, api_key: str, **kwargs) -> LLMInterface:
         LLMInterface: Configured LLM component
     """
     llm_models = {
-        'openai': lambda: OpenAILLM(api_key=api_key, model=kwargs.get('model', 'gpt-4')),
-        'llama': lambda: GroqLlamaLLM(api_key=api_key),
+        'openai': lambda: OpenAILLM(api_key=api_key, model=kwargs.get('model', 'gpt-4'), limiter=kwargs.get('limiter')),
+        'llama': lambda: GroqLlamaLLM(api_key=api_key, limiter=kwargs.get('limiter')),
         # Add more LLM providers here
     }
     
@@ -59,7 +78,19 @@ def create_stt(model_name: str, api_key: str = None, **kwargs) -> STTInterface:
         STTInterface: Configured STT component
     """
     stt_models = {
-        'whisper': lambda: FasterWhisperSTT(model_size=kwargs.get('model_size', 'base')),
+        'whisper': lambda: FasterWhisperSTT(
+            model_size=kwargs.get('model_size', 'base'),
+            compute_type=kwargs.get('compute_type', 'int8'),
+            beam_size=kwargs.get('beam_size', 5),
+            controller=kwargs.get('controller'),
+            num_workers=kwargs.get('num_workers', 1),
+            cpu_threads=kwargs.get('cpu_threads', 0),
+            word_timestamps=kwargs.get('word_timestamps', False)
+        ),
+        'remote': lambda: RemoteSTT(
+            socket_path=kwargs['socket_path'],
+            pool_size=kwargs.get('pool_size', 4)
+        ),
     }
     
     if model_name.lower() not in stt_models:
@@ -79,8 +110,8 @@ def create_tts(model_name: str, api_key: str, **kwargs) -> TTSInterface:
         TTSInterface: Configured TTS component
     """
     tts_models = {
-        'cartesia': lambda: CartesiaTTS(api_key=api_key),
-        'elevenlabs': lambda: ElevenLabsTTS(api_key=api_key),
+        'cartesia': lambda: CartesiaTTS(api_key=api_key, limiter=kwargs.get('limiter')),
+        'elevenlabs': lambda: ElevenLabsTTS(api_key=api_key, limiter=kwargs.get('limiter')),
     }
     
     if model_name.lower() not in tts_models:
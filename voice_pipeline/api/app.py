@@ -16,7 +16,8 @@ from voice_pipeline import (
     create_whisper_stt,
     create_cartesia_tts,
     SimpleEndpointingVAD,
-    EOUTurnDetector
+    EOUTurnDetector,
+    OutputPlan
 )
 from voice_pipeline.api.models import VoiceConfig, AssistantConfig
 
@@ -103,25 +104,25 @@ async def websocket_assistant(websocket: WebSocket):
                 result = await agent.process_audio(audio)
                 
                 # Send transcription result
-                if result["transcription"]:
+                if result.transcription:
                     await websocket.send_json({
                         "type": "transcription",
-                        "text": result["transcription"].text
+                        "text": result.transcription.text
                     })
                 
                 # Send text response
-                if result["llm_response"]:
+                if result.llm_response:
                     await websocket.send_json({
                         "type": "text_response",
-                        "text": result["llm_response"].text
+                        "text": result.llm_response.text
                     })
                 
                 # Send audio response
-                if result["audio_response"] and websocket.client_state == WebSocketState.CONNECTED:
+                if result.audio_response and websocket.client_state == WebSocketState.CONNECTED:
                     await websocket.send({
                         "type": "websocket.send", 
-                        "bytes": result["audio_response"].audio, 
-                        "subprotocol": f"audio/{result['audio_response'].format}"
+                        "bytes": result.audio_response.audio, 
+                        "subprotocol": f"audio/{result.audio_response.format}"
                     })
                     
             elif "text" in message:
@@ -171,33 +172,34 @@ async def websocket_assistant(websocket: WebSocket):
                         user_input = data.get("text", "")
                         if user_input:
                             # Process text through pipeline
-                            result = await agent.process_text(user_input)
+                            plan = OutputPlan.TEXT if data.get("tts") is False else OutputPlan.BOTH
+                            result = await agent.process_text(user_input, plan)
                             
                             # Send text response
-                            if result["llm_response"]:
+                            if result.llm_response:
                                 await websocket.send_json({
                                     "type": "text_response",
-                                    "text": result["llm_response"].text
+                                    "text": result.llm_response.text
                                 })
                             
                             # Send audio response if requested
-                            if data.get("tts", True) and result["audio_response"]:
+                            if result.audio_response:
                                 await websocket.send({
                                     "type": "websocket.send", 
-                                    "bytes": result["audio_response"].audio, 
-                                    "subprotocol": f"audio/{result['audio_response'].format}"
+                                    "bytes": result.audio_response.audio, 
+                                    "subprotocol": f"audio/{result.audio_response.format}"
                                 })
                 
                 except json.JSONDecodeError:
                     # Handle plain text input
                     user_input = text_data
-                    result = await agent.process_text(user_input)
+                    result = await agent.process_text(user_input, OutputPlan.TEXT)
                     
                     # Send text response
-                    if result["llm_response"]:
+                    if result.llm_response:
                         await websocket.send_json({
                             "type": "text_response",
-                            "text": result["llm_response"].text
+                            "text": result.llm_response.text
                         })
     
     except WebSocketDisconnect:
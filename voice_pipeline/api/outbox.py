@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from voice_pipeline.api.protocol import JSONChannel
+from voice_pipeline.core.models import TTSResult
+
+logger = logging.getLogger(__name__)
+
+class Outbox:
+    """The single writer of a session's outbound frames
+
+    Everything sent to the client goes through send_event, send_audio or
+    send_control, which only queue the frame; one writer task (run) sends
+    them in order, so frames from the reader, the pipeline and agent
+    callbacks never interleave on the socket and sequence numbers follow
+    send order. The queue holds at most maxsize frames, after which
+    send_event and send_audio wait for the client to catch up. Control
+    frames (acknowledgements, errors) skip ahead of queued response frames
+    and never wait, so the reader can answer without blocking.
+
+    Outbox has the sending interface of a channel and can stand in for one.
+    """
+
+    def __init__(self, channel: JSONChannel, maxsize: int = 32):
+        self.channel = channel
+        self.maxsize = maxsize
+        self._control: Deque[Tuple[Any, ...]] = deque()
+        self._frames: Deque[Tuple[Any, ...]] = deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._closed = False
+        self._writer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._control) + len(self._frames)
+
+    @property
+    def connected(self) -> bool:
+        return not self._closed and self.channel.connected
+
+    @property
+    def streams_audio(self) -> bool:
+        return self.channel.streams_audio
+
+    async def send_event(self, event: Dict[str, Any], turn_id: int = 0):
+        await self._put(("event", event, turn_id))
+
+    async def send_audio(self, audio: TTSResult, turn_id: int = 0, filler: bool = False, final: bool = True):
+        await self._put(("audio", audio, turn_id, filler, final))
+
+    def send_control(self, event: Dict[str, Any], turn_id: int = 0):
+        """Queue an event ahead of response frames, without waiting for space"""
+        if self._closed:
+            return
+        self._control.append(("event", event, turn_id))
+        self._ready.set()
+
+    async def _put(self, frame: Tuple[Any, ...]):
+        while len(self._frames) >= self.maxsize and not self._closed:
+            self._space.clear()
+            await self._space.wait()
+        if self._closed:
+            return
+        self._frames.append(frame)
+        self._ready.set()
+
+    async def run(self):
+        """Send queued frames until closed and drained, or until sending fails"""
+        try:
+            while True:
+                if not self._control and not self._frames:
+                    if self._closed:
+                        return
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                frame = self._control.popleft() if self._control else self._frames.popleft()
+                self._space.set()
+                if frame[0] == "audio":
+                    await self.channel.send_audio(frame[1], frame[2], filler=frame[3], final=frame[4])
+                else:
+                    await self.channel.send_event(frame[1], frame[2])
+        except Exception as e:
+            logger.info(f"Stopped sending: {str(e)}")
+        finally:
+            self._closed = True
+            self._control.clear()
+            self._frames.clear()
+            self._space.set()
+
+    def start(self):
+        """Start the writer task"""
+        self._writer = asyncio.ensure_future(self.run())
+
+    def close(self):
+        """Stop accepting frames; run returns once the queued ones are sent"""
+        self._closed = True
+        self._ready.set()
+        self._space.set()
+
+    async def drain(self, timeout: float = 5.0):
+        """Close, and wait up to timeout seconds for the queued frames to be sent"""
+        self.close()
+        if self._writer is None:
+            return
+        done, _ = await asyncio.wait({self._writer}, timeout=timeout)
+        if not done:
+            self._writer.cancel()
@@ -0,0 +1,166 @@
+"""Websocket message framing for the assistant
+
+Clients that offer the SUBPROTOCOL when connecting get the binary protocol:
+every websocket message is a binary frame made of a fixed 12-byte header
+followed by the payload.
+
+    version  u8   protocol version, currently 1
+    type     u8   EVENT or AUDIO
+    flags    u8   FLAG_* bits
+    codec    u8   payload encoding, one of CODECS
+    turn_id  u32  turn the frame belongs to, 0 for session-level messages
+    seq      u32  sequence number, counted per connection and direction
+
+EVENT payloads are msgpack maps with the same fields as the JSON messages
+of the legacy protocol; AUDIO payloads are raw encoded audio. The session
+ID is sent once, in the "session" event.
+
+Other clients keep the legacy protocol: JSON text messages, and bare
+binary messages for audio.
+"""
+import json
+import struct
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+
+import msgpack
+from fastapi import WebSocket
+from starlette.websockets import WebSocketState
+
+from voice_pipeline.core.models import AudioData, TTSResult
+
+SUBPROTOCOL = "voice-pipeline.v1"
+VERSION = 1
+HEADER = struct.Struct("<BBBBII")
+
+# Frame types
+EVENT = 1
+AUDIO = 2
+
+# Frame flags
+FLAG_FINAL = 0x01   # Last audio frame of the turn's response
+FLAG_FILLER = 0x02  # Filler audio played while the response is prepared
+
+CODECS = {"msgpack": 0, "wav": 1, "mp3": 2, "raw": 3, "opus": 4}
+CODEC_NAMES = {code: name for name, code in CODECS.items()}
+
+# What a channel decodes an inbound message into: ("audio", AudioData),
+# ("event", dict) or ("text", str) for plain text input
+Inbound = Tuple[str, Union[AudioData, Dict[str, Any], str]]
+
+class ProtocolError(ValueError):
+    """Raised for frames that do not follow the binary protocol"""
+
+class Frame(NamedTuple):
+    type: int
+    flags: int
+    codec: int
+    turn_id: int
+    seq: int
+    payload: memoryview
+
+def encode_frame(frame_type: int,
+                payload: bytes,
+                turn_id: int = 0,
+                seq: int = 0,
+                codec: int = CODECS["msgpack"],
+                flags: int = 0) -> bytes:
+    """Build one binary frame"""
+    return HEADER.pack(VERSION, frame_type, flags, codec, turn_id, seq) + payload
+
+def decode_frame(data: Union[bytes, memoryview]) -> Frame:
+    """Split a binary frame into its header fields and a view of its payload"""
+    if len(data) < HEADER.size:
+        raise ProtocolError(f"Frame too short: {len(data)} bytes")
+
+    version, frame_type, flags, codec, turn_id, seq = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ProtocolError(f"Unsupported protocol version: {version}")
+    if codec not in CODEC_NAMES:
+        raise ProtocolError(f"Unknown codec: {codec}")
+    return Frame(frame_type, flags, codec, turn_id, seq, memoryview(data)[HEADER.size:])
+
+class JSONChannel:
+    """Legacy protocol: JSON text events and bare binary audio"""
+    subprotocol: Optional[str] = None
+    # Whether a response's audio can be sent in several frames as it is synthesized
+    streams_audio = False
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+
+    @property
+    def connected(self) -> bool:
+        return self.websocket.client_state == WebSocketState.CONNECTED
+
+    def decode(self, message: Dict[str, Any]) -> Optional[Inbound]:
+        """Decode a received ASGI message, or return None to ignore it"""
+        if message.get("bytes") is not None:
+            return "audio", AudioData(message["bytes"], format="wav")
+        if message.get("text") is None:
+            return None
+
+        try:
+            data = json.loads(message["text"])
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict):
+            return "event", data
+        return "text", message["text"]
+
+    async def send_event(self, event: Dict[str, Any], turn_id: int = 0):
+        """Send a JSON event"""
+        if turn_id:
+            event = {**event, "turn_id": turn_id}
+        await self.websocket.send_json(event)
+
+    async def send_audio(self, audio: TTSResult, turn_id: int = 0, filler: bool = False, final: bool = True):
+        """Send a complete audio clip; legacy clients play each binary message as one"""
+        if self.connected:
+            await self.websocket.send_bytes(audio.audio)
+
+class BinaryChannel(JSONChannel):
+    """Binary protocol: every message is a framed EVENT or AUDIO payload"""
+    subprotocol = SUBPROTOCOL
+    streams_audio = True
+
+    def __init__(self, websocket: WebSocket):
+        super().__init__(websocket)
+        self._seq = 0
+
+    def decode(self, message: Dict[str, Any]) -> Optional[Inbound]:
+        """Decode a received ASGI message, or return None to ignore it"""
+        if message.get("bytes") is None:
+            raise ProtocolError("Text messages are not allowed on the binary protocol")
+
+        frame = decode_frame(message["bytes"])
+        if frame.type == AUDIO:
+            return "audio", AudioData(frame.payload, format=CODEC_NAMES[frame.codec])
+        if frame.type == EVENT:
+            event = msgpack.unpackb(frame.payload, raw=False)
+            if not isinstance(event, dict):
+                raise ProtocolError("Event payloads must be maps")
+            return "event", event
+        raise ProtocolError(f"Unknown frame type: {frame.type}")
+
+    async def send_event(self, event: Dict[str, Any], turn_id: int = 0):
+        """Send a msgpack event frame"""
+        await self._send(EVENT, msgpack.packb(event, use_bin_type=True), turn_id, CODECS["msgpack"], 0)
+
+    async def send_audio(self, audio: TTSResult, turn_id: int = 0, filler: bool = False, final: bool = True):
+        """Send an audio frame, final unless more of the same response follows"""
+        if self.connected:
+            flags = (FLAG_FINAL if final else 0) | (FLAG_FILLER if filler else 0)
+            await self._send(AUDIO, audio.audio, turn_id, CODECS.get(audio.format, CODECS["raw"]), flags)
+
+    async def _send(self, frame_type: int, payload: bytes, turn_id: int, codec: int, flags: int):
+        self._seq += 1
+        await self.websocket.send_bytes(encode_frame(frame_type, payload, turn_id, self._seq, codec, flags))
+
+async def accept_channel(websocket: WebSocket) -> JSONChannel:
+    """Accept the websocket, using the binary protocol if the client offered it"""
+    if SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        channel = BinaryChannel(websocket)
+    else:
+        channel = JSONChannel(websocket)
+    await websocket.accept(subprotocol=channel.subprotocol)
+    return channel
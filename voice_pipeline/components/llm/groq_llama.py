@@ -1,19 +1,28 @@
 import logging
 import groq
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, Optional
 
 from voice_pipeline.core.interfaces import LLMInterface
 from voice_pipeline.core.models import ConversationContext, LLMResponse
+from voice_pipeline.core.ratelimit import ProviderLimiter, estimate_tokens, limiter_for, parse_response
 
 logger = logging.getLogger(__name__)
 
 class GroqLlamaLLM(LLMInterface):
     """Implementation of LLM using Groq API for Llama models"""
     
-    def __init__(self, api_key: str, model: str = "meta-llama/llama-4-scout-17b-16e-instruct"):
-        """Initialize with Groq API key and model"""
-        self.client = groq.Groq(api_key=api_key)
+    def __init__(self,
+                api_key: str,
+                model: str = "meta-llama/llama-4-scout-17b-16e-instruct",
+                limiter: Optional[ProviderLimiter] = None):
+        """Initialize with Groq API key and model
+        
+        Calls go through the limiter shared by every client of the same API
+        key, which also owns retries, so the SDK's own retries are disabled.
+        """
+        self.client = groq.AsyncGroq(api_key=api_key, max_retries=0)
         self.model = model
+        self.limiter = limiter or limiter_for("groq", api_key, requests_per_minute=30, tokens_per_minute=30000)
     
     async def generate_response(self, 
                               context: ConversationContext,
@@ -22,12 +31,17 @@ class GroqLlamaLLM(LLMInterface):
         try:
             messages = context.get_messages()
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=300
-            )
+            async def create():
+                raw = await self.client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=300
+                )
+                self.limiter.observe_headers(raw.headers)
+                return await parse_response(raw)
+            
+            response = await self.limiter.call(create, tokens=estimate_tokens(messages, 300))
             
             if response.choices and len(response.choices) > 0:
                 assistant_message = response.choices[0].message.content
@@ -38,4 +52,41 @@ class GroqLlamaLLM(LLMInterface):
                 
         except Exception as e:
             logger.error(f"Error getting LLM response: {str(e)}")
-            return LLMResponse(text=f"I'm sorry, there was an error processing your request.")
\ No newline at end of file
+            return LLMResponse(text=f"I'm sorry, there was an error processing your request.")
+    
+    async def stream_response(self,
+                              context: ConversationContext,
+                              temperature: float = 0.7) -> AsyncIterator[str]:
+        """Stream the response from the Groq API as text deltas"""
+        messages = context.get_messages()
+        
+        # Failures are only retried until the stream opens; nothing has been sent by then
+        async def open_stream():
+            raw = await self.client.chat.completions.with_raw_response.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=300,
+                stream=True
+            )
+            self.limiter.observe_headers(raw.headers)
+            return await parse_response(raw)
+        
+        streamed = False
+        try:
+            stream = await self.limiter.call(open_stream, tokens=estimate_tokens(messages, 300))
+            
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    streamed = True
+                    yield chunk.choices[0].delta.content
+                    
+        except Exception as e:
+            logger.error(f"Error streaming LLM response: {str(e)}")
+            if not streamed:
+                yield "I'm sorry, there was an error processing your request."
+            return
+        
+        if not streamed:
+            logger.error("Empty response from Groq")
+            yield "I'm sorry, I couldn't generate a response."
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from voice_pipeline.core.interfaces import STTInterface
+from voice_pipeline.core.models import AudioData, TranscriptionResult
+from voice_pipeline.core.utils import decode_pcm16, decode_wav, encode_wav, frame_rms
+
+logger = logging.getLogger(__name__)
+
+class TimeMap:
+    """Maps times in conditioned audio back to times in the original clip
+
+    Conditioned audio is a concatenation of spans cut from the original;
+    each span is stored as its start in both timelines and its length.
+    """
+    __slots__ = ("starts", "original_starts", "lengths")
+
+    def __init__(self, starts: np.ndarray, original_starts: np.ndarray, lengths: np.ndarray):
+        self.starts = starts
+        self.original_starts = original_starts
+        self.lengths = lengths
+
+    @classmethod
+    def identity(cls, duration: float) -> "TimeMap":
+        return cls(np.zeros(1), np.zeros(1), np.array([duration]))
+
+    @property
+    def duration(self) -> float:
+        return float(self.lengths.sum())
+
+    def to_original(self, times, end: bool = False) -> np.ndarray:
+        """Map conditioned times (seconds) to original times
+
+        A time on the boundary between two spans maps to the start of the
+        later span, or to the end of the earlier one when end is True.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if not len(self.starts):
+            return times
+
+        index = np.searchsorted(self.starts, times, side="left" if end else "right") - 1
+        index = np.clip(index, 0, len(self.starts) - 1)
+        offset = np.clip(times - self.starts[index], 0.0, self.lengths[index])
+        return self.original_starts[index] + offset
+
+class AudioConditioner:
+    """Shortens and cleans up a clip before STT
+
+    Leading and trailing silence is cut and internal pauses longer than
+    max_pause are shortened to max_pause, keeping some padding around speech
+    so word onsets survive. Speech is then brought to a target level, after an
+    optional spectral noise gate. Everything runs on whole-clip NumPy arrays.
+    """
+
+    def __init__(self,
+                silence_threshold_db: float = -45.0,
+                frame_ms: int = 20,
+                padding: float = 0.15,
+                max_pause: float = 0.4,
+                min_speech: float = 0.1,
+                target_level_db: float = -20.0,
+                max_gain_db: float = 20.0,
+                noise_gate: bool = False,
+                noise_reduction_db: float = 12.0):
+        """Initialize the conditioner
+
+        Args:
+            silence_threshold_db: Frames quieter than this (dBFS RMS) count as silence
+            frame_ms: Analysis frame length
+            padding: Seconds of audio kept either side of speech
+            max_pause: Internal pauses are shortened to this many seconds
+            min_speech: Clips with less audio than this left are treated as silent
+            target_level_db: RMS level of speech after gain normalization (dBFS)
+            max_gain_db: Upper bound on the normalization gain
+            noise_gate: Apply a spectral noise gate before trimming
+            noise_reduction_db: Attenuation the noise gate applies to noise-only bins
+        """
+        self.silence_threshold_db = silence_threshold_db
+        self.frame_ms = frame_ms
+        self.padding = padding
+        self.max_pause = max_pause
+        self.min_speech = min_speech
+        self.target_level_db = target_level_db
+        self.max_gain_db = max_gain_db
+        self.noise_gate = noise_gate
+        self.noise_reduction_db = noise_reduction_db
+
+    def condition(self, samples: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, TimeMap]:
+        """Return the conditioned samples and the map back to original time"""
+        if self.noise_gate:
+            samples = self._gate_noise(samples)
+
+        frame_size = max(1, sample_rate * self.frame_ms // 1000)
+        rms = frame_rms(samples, frame_size)
+        if not len(rms):
+            return samples, TimeMap.identity(len(samples) / sample_rate)
+
+        voiced = 20.0 * np.log10(rms + 1e-10) > self.silence_threshold_db
+        if not voiced.any():
+            return samples[:0], TimeMap(np.zeros(0), np.zeros(0), np.zeros(0))
+
+        keep = self._frames_to_keep(voiced, sample_rate / frame_size)
+
+        # Spans of kept frames, in samples; a trailing partial frame goes with the last frame
+        edges = np.diff(np.concatenate(([False], keep, [False])).astype(np.int8))
+        span_starts = np.flatnonzero(edges == 1) * frame_size
+        span_ends = np.flatnonzero(edges == -1) * frame_size
+        if span_ends[-1] == len(keep) * frame_size:
+            span_ends[-1] = len(samples)
+
+        mask = np.repeat(keep, frame_size)
+        mask = np.concatenate((mask, np.full(len(samples) - len(mask), keep[-1])))
+        conditioned = samples[mask] * self._gain(samples, rms[voiced])
+
+        lengths = span_ends - span_starts
+        time_map = TimeMap(
+            (np.cumsum(lengths) - lengths) / sample_rate,
+            span_starts / sample_rate,
+            lengths / sample_rate
+        )
+        return conditioned.astype(np.float32), time_map
+
+    def _frames_to_keep(self, voiced: np.ndarray, frames_per_second: float) -> np.ndarray:
+        """Pad speech frames and decide how much of each internal pause to keep"""
+        pad = int(round(self.padding * frames_per_second))
+        keep = np.convolve(voiced, np.ones(2 * pad + 1), "same") > 0 if pad else voiced.copy()
+
+        # Silent runs between the first and last speech frames
+        edges = np.diff(np.concatenate(([True], keep, [True])).astype(np.int8))
+        pause_starts = np.flatnonzero(edges == -1)
+        pause_ends = np.flatnonzero(edges == 1)
+        interior = (pause_starts > 0) & (pause_ends < len(keep))
+
+        max_frames = max(1, int(round(self.max_pause * frames_per_second)))
+        head = max_frames // 2
+        for start, end in zip(pause_starts[interior], pause_ends[interior]):
+            if end - start <= max_frames:
+                keep[start:end] = True
+            else:
+                keep[start:start + head] = True
+                keep[end - (max_frames - head):end] = True
+        return keep
+
+    def _gain(self, samples: np.ndarray, voiced_rms: np.ndarray) -> float:
+        """Gain that brings speech to the target level without clipping"""
+        level = float(np.sqrt(np.mean(voiced_rms * voiced_rms)))
+        gain = min(10 ** (self.target_level_db / 20) / max(level, 1e-10), 10 ** (self.max_gain_db / 20))
+        peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+        if peak * gain > 0.99:
+            gain = 0.99 / peak
+        return gain
+
+    def _gate_noise(self, samples: np.ndarray, n_fft: int = 512) -> np.ndarray:
+        """Attenuate spectral bins that sit near the clip's noise floor"""
+        hop = n_fft // 2
+        if len(samples) < n_fft:
+            return samples
+
+        # Pad so every original sample lies where the half-overlapping windows sum to one
+        tail = (-(len(samples) + 2 * hop - n_fft)) % hop
+        padded = np.pad(samples, (hop, hop + tail))
+        window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop] * window
+        spectrum = np.fft.rfft(frames, axis=1)
+        magnitude = np.abs(spectrum)
+
+        # The quietest frames of each bin estimate the noise floor
+        noise = np.percentile(magnitude, 10, axis=0)
+        floor = 10 ** (-self.noise_reduction_db / 20)
+        spectrum *= np.where(magnitude > 2.0 * noise, 1.0, floor)
+        filtered = np.fft.irfft(spectrum, n=n_fft, axis=1)
+
+        # Overlap-add the two halves of each frame
+        halves = np.zeros((len(frames) + 1, hop), dtype=np.float32)
+        halves[:-1] += filtered[:, :hop]
+        halves[1:] += filtered[:, hop:]
+        return halves.ravel()[hop:hop + len(samples)]
+
+class ConditionedSTT(STTInterface):
+    """Conditions audio with an AudioConditioner before passing it to another STT
+
+    Segment and word timestamps in the result are mapped back to the
+    original clip. Clips that are silent after conditioning are not sent to
+    the wrapped STT at all. Formats other than WAV and raw 16-bit PCM are
+    passed through unchanged.
+    """
+
+    def __init__(self, stt: STTInterface, conditioner: Optional[AudioConditioner] = None):
+        """Initialize with the STT to wrap and the conditioning settings"""
+        self.stt = stt
+        self.conditioner = conditioner or AudioConditioner()
+        self._input_seconds = 0.0
+        self._output_seconds = 0.0
+        self._skipped = 0
+
+    async def transcribe(self,
+                         audio_data: AudioData,
+                         language: Optional[str] = None,
+                         segments: bool = True) -> TranscriptionResult:
+        """Condition the audio, transcribe it and remap the timestamps"""
+        try:
+            conditioned = await asyncio.to_thread(self._condition, audio_data)
+        except Exception as e:
+            logger.warning(f"Audio conditioning failed, transcribing the original clip: {str(e)}")
+            conditioned = None
+        if conditioned is None:
+            return await self.stt.transcribe(audio_data, language=language, segments=segments)
+
+        audio, time_map, input_seconds = conditioned
+        self._input_seconds += input_seconds
+        self._output_seconds += time_map.duration
+        if audio is None:
+            self._skipped += 1
+            return TranscriptionResult(text="", language=language)
+
+        result = await self.stt.transcribe(audio, language=language, segments=segments)
+        result.segments = result.segments.map_times(time_map.to_original, partial(time_map.to_original, end=True))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the wrapped STT's figures and how much audio conditioning removed"""
+        removed = 1.0 - self._output_seconds / self._input_seconds if self._input_seconds else 0.0
+        return {
+            **self.stt.stats(),
+            "conditioning": {
+                "input_seconds": round(self._input_seconds, 3),
+                "output_seconds": round(self._output_seconds, 3),
+                "removed_ratio": round(removed, 3),
+                "skipped_clips": self._skipped,
+            }
+        }
+
+    def _condition(self, audio_data: AudioData) -> Optional[Tuple[Optional[AudioData], TimeMap, float]]:
+        """Decode and condition a clip on a worker thread, or return None to pass it through"""
+        if audio_data.format == "wav":
+            samples, sample_rate = decode_wav(audio_data.data)
+        elif audio_data.format == "raw" and audio_data.channels == 1:
+            samples, sample_rate = decode_pcm16(audio_data.data), audio_data.sample_rate
+        else:
+            return None
+
+        conditioned, time_map = self.conditioner.condition(samples, sample_rate)
+        input_seconds = len(samples) / sample_rate
+        if len(conditioned) < self.conditioner.min_speech * sample_rate:
+            return None, time_map, input_seconds
+
+        audio = AudioData(encode_wav(conditioned, sample_rate), sample_rate=sample_rate, format="wav")
+        return audio, time_map, input_seconds
@@ -0,0 +1,64 @@
+import logging
+from typing import Optional
+
+from voice_pipeline.core.models import TranscriptionResult
+
+logger = logging.getLogger(__name__)
+
+class LanguagePrior:
+    """Per-session language hint for STT
+
+    Once language identification reports a language with enough confidence,
+    that language is passed to later decodes so the detection pass is
+    skipped. Detection runs again every redetect_every hinted utterances, or
+    straight away when a hinted decode comes back with low confidence, which
+    usually means the speaker switched language.
+    """
+
+    def __init__(self,
+                language: Optional[str] = None,
+                detection_threshold: float = 0.8,
+                min_decode_confidence: float = 0.4,
+                redetect_every: int = 10):
+        """Initialize the prior
+
+        Args:
+            language: Language already known for this session, if any
+            detection_threshold: Minimum language_probability to adopt a detected language
+            min_decode_confidence: Hinted decodes below this confidence trigger re-detection
+            redetect_every: Number of hinted utterances between detection passes
+        """
+        self.language = language
+        self.detection_threshold = detection_threshold
+        self.min_decode_confidence = min_decode_confidence
+        self.redetect_every = redetect_every
+        self._hinted_count = 0
+
+    def hint(self) -> Optional[str]:
+        """Return the language to decode with, or None to run detection"""
+        if self.language is None or self._hinted_count >= self.redetect_every:
+            return None
+        return self.language
+
+    def observe(self, result: TranscriptionResult, hint: Optional[str]):
+        """Update the prior from a transcription made with the given hint"""
+        if result.error or not result.text:
+            return
+
+        if hint is None:
+            self._hinted_count = 0
+            if result.language and (result.language_probability or 0.0) >= self.detection_threshold:
+                if result.language != self.language:
+                    logger.info(f"Session language set to {result.language}")
+                self.language = result.language
+            return
+
+        self._hinted_count += 1
+        if result.confidence is not None and result.confidence < self.min_decode_confidence:
+            logger.info(f"Low confidence decode with language {hint}, re-detecting next utterance")
+            self.language = None
+
+    def reset(self):
+        """Forget the session language"""
+        self.language = None
+        self._hinted_count = 0
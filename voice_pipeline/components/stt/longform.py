@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import math
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from voice_pipeline.core.interfaces import STTInterface
+from voice_pipeline.core.models import AudioData, Segments, TranscriptionResult
+from voice_pipeline.core.utils import decode_pcm16, decode_wav, encode_wav, frame_rms
+
+logger = logging.getLogger(__name__)
+
+class _Chunk(NamedTuple):
+    audio: AudioData
+    start: float      # Offset of the chunk in the clip
+    keep_from: float  # Segments centred in [keep_from, keep_to) belong to this chunk
+    keep_to: float
+
+def merge_transcriptions(parts: List[TranscriptionResult]) -> TranscriptionResult:
+    """Join partial results for consecutive stretches of a clip into one"""
+    detected = next((part for part in parts if part.language), None)
+    confidences = [part.confidence for part in parts if part.confidence is not None]
+    errors = [part.error for part in parts if part.error]
+    return TranscriptionResult(
+        text=" ".join(part.text for part in parts if part.text),
+        segments=Segments.concat([part.segments for part in parts]),
+        language=detected.language if detected else None,
+        language_probability=detected.language_probability if detected else None,
+        confidence=sum(confidences) / len(confidences) if confidences else None,
+        error="; ".join(errors) if errors else None
+    )
+
+class LongFormSTT(STTInterface):
+    """Transcribes long clips as chunks decoded concurrently
+
+    Clips shorter than min_duration go straight to the wrapped STT. Longer
+    WAV or raw PCM clips are cut at the quietest point in each stretch of
+    min_chunk to max_chunk seconds. Cuts that fall in speech rather than a
+    pause get overlap seconds of shared audio on either side, and segments
+    in the overlap are kept only by the chunk their midpoint falls in.
+
+    Chunks are decoded up to max_concurrency at a time, so this should
+    match the decode capacity behind the wrapped STT. If the language is not
+    known, the first chunk is decoded on its own and its language is used
+    for the rest.
+    """
+
+    def __init__(self,
+                stt: STTInterface,
+                min_duration: float = 30.0,
+                min_chunk: float = 10.0,
+                max_chunk: float = 20.0,
+                overlap: float = 1.0,
+                silence_threshold_db: float = -40.0,
+                frame_ms: int = 20,
+                max_concurrency: int = 4):
+        """Initialize the long-form wrapper
+
+        Args:
+            stt: STT used to decode each chunk
+            min_duration: Clips at least this long (seconds) are chunked
+            min_chunk: Shortest chunk to cut, except for the last one
+            max_chunk: Longest chunk to cut
+            overlap: Seconds of shared audio around cuts that fall in speech
+            silence_threshold_db: Level (dBFS RMS) below which a cut is in a pause
+            frame_ms: Analysis frame length for finding pauses
+            max_concurrency: Chunks decoded at the same time
+        """
+        self.stt = stt
+        self.min_duration = min_duration
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.overlap = overlap
+        self.silence_threshold_db = silence_threshold_db
+        self.frame_ms = frame_ms
+        self.max_concurrency = max_concurrency
+        self._clips = 0
+        self._chunks = 0
+
+    async def transcribe(self,
+                         audio_data: AudioData,
+                         language: Optional[str] = None,
+                         segments: bool = True) -> TranscriptionResult:
+        """Transcribe the whole clip, chunking it if it is long"""
+        parts = [part async for part in self.transcribe_stream(audio_data, language=language, segments=segments)]
+        return parts[0] if len(parts) == 1 else merge_transcriptions(parts)
+
+    async def transcribe_stream(self,
+                                audio_data: AudioData,
+                                language: Optional[str] = None,
+                                segments: bool = True) -> AsyncIterator[TranscriptionResult]:
+        """Yield each chunk's result in order as soon as it and all earlier chunks are done
+
+        Chunks are always decoded with segments, which are needed to drop
+        overlapping speech, so results for chunked clips include them.
+        """
+        try:
+            chunks = await asyncio.to_thread(self._split, audio_data)
+        except Exception as e:
+            logger.warning(f"Could not split audio for long-form transcription: {str(e)}")
+            chunks = None
+        if not chunks:
+            yield await self.stt.transcribe(audio_data, language=language, segments=segments)
+            return
+
+        self._clips += 1
+        self._chunks += len(chunks)
+        logger.info(f"Transcribing long clip as {len(chunks)} chunks")
+
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def decode(chunk: _Chunk, language: Optional[str]) -> TranscriptionResult:
+            async with slots:
+                result = await self.stt.transcribe(chunk.audio, language=language)
+            return self._place(result, chunk)
+
+        first = None
+        if language is None:
+            first = await decode(chunks[0], None)
+            language = first.language
+            chunks = chunks[1:]
+
+        tasks = [asyncio.ensure_future(decode(chunk, language)) for chunk in chunks]
+        try:
+            if first is not None:
+                yield first
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the wrapped STT's figures and the number of chunked clips"""
+        return {**self.stt.stats(), "longform": {"clips": self._clips, "chunks": self._chunks}}
+
+    def _split(self, audio_data: AudioData) -> Optional[List[_Chunk]]:
+        """Cut a long clip into chunks, or return None if it should be decoded whole"""
+        if audio_data.format == "wav":
+            samples, sample_rate = decode_wav(audio_data.data)
+        elif audio_data.format == "raw" and audio_data.channels == 1:
+            samples, sample_rate = decode_pcm16(audio_data.data), audio_data.sample_rate
+        else:
+            return None
+        if len(samples) < self.min_duration * sample_rate:
+            return None
+
+        frame_size = max(1, sample_rate * self.frame_ms // 1000)
+        frames_per_second = sample_rate / frame_size
+        level = 20.0 * np.log10(frame_rms(samples, frame_size) + 1e-10)
+
+        # Average over ~200ms so a cut lands in a pause rather than a quiet consonant
+        width = max(1, int(0.2 * frames_per_second))
+        smoothed = np.convolve(level, np.ones(width) / width, "same")
+
+        min_frames = int(self.min_chunk * frames_per_second)
+        max_frames = int(self.max_chunk * frames_per_second)
+        cuts: List[int] = []
+        start = 0
+        while len(level) - start > max_frames:
+            cut = start + min_frames + int(np.argmin(smoothed[start + min_frames:start + max_frames]))
+            cuts.append(cut)
+            start = cut
+
+        # Cut points in seconds, with the overlap each one needs
+        bounds = [0.0] + [cut / frames_per_second for cut in cuts] + [len(samples) / sample_rate]
+        margins = [0.0] + [
+            0.0 if smoothed[cut] < self.silence_threshold_db else self.overlap for cut in cuts
+        ] + [0.0]
+
+        chunks = []
+        for index in range(len(bounds) - 1):
+            start = bounds[index] - margins[index]
+            end = bounds[index + 1] + margins[index + 1]
+            pcm = samples[int(start * sample_rate):int(end * sample_rate)]
+            chunks.append(_Chunk(
+                audio=AudioData(encode_wav(pcm, sample_rate), sample_rate=sample_rate, format="wav"),
+                start=start,
+                keep_from=bounds[index] if index else -math.inf,
+                keep_to=bounds[index + 1] if index + 1 < len(bounds) - 1 else math.inf
+            ))
+        return chunks
+
+    def _place(self, result: TranscriptionResult, chunk: _Chunk) -> TranscriptionResult:
+        """Shift a chunk's timestamps into clip time and drop what belongs to a neighbour"""
+        if not result.segments:
+            return result
+
+        segments = result.segments.shift(chunk.start).select(chunk.keep_from, chunk.keep_to)
+        return TranscriptionResult(
+            text=" ".join(text.strip() for text in segments.texts()),
+            segments=segments,
+            language=result.language,
+            language_probability=result.language_probability,
+            confidence=result.confidence,
+            error=result.error
+        )
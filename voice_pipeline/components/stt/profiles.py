@@ -0,0 +1,172 @@
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+class DecodeProfile(BaseModel):
+    """Whisper model and decoding settings for one quality level"""
+    name: str
+    model_size: str
+    beam_size: int = 5
+    compute_type: str = "int8"
+    temperature: List[float] = Field(default_factory=lambda: [0.0, 0.2, 0.4, 0.6, 0.8, 1.0])
+    vad_filter: bool = False
+
+# Built-in profiles, from most accurate to cheapest
+PROFILES: Dict[str, DecodeProfile] = {
+    "accurate": DecodeProfile(name="accurate", model_size="large", beam_size=5),
+    "balanced": DecodeProfile(name="balanced", model_size="small", beam_size=3,
+                              temperature=[0.0, 0.4, 0.8], vad_filter=True),
+    "fast": DecodeProfile(name="fast", model_size="base", beam_size=1,
+                          temperature=[0.0], vad_filter=True),
+}
+
+# Whisper model families from smallest to largest
+MODEL_SIZES = ["tiny", "base", "small", "medium", "turbo", "large"]
+
+def model_rank(model_size: str) -> int:
+    """Position of a model in MODEL_SIZES, ignoring variants such as .en or -v3 (-1 if unknown)"""
+    name = model_size.split("/")[-1].replace("distil-", "").replace("faster-whisper-", "")
+    for rank, size in reversed(list(enumerate(MODEL_SIZES))):
+        if name.startswith(size):
+            return rank
+    return -1
+
+class WhisperTuning(BaseModel):
+    """Whisper deployment settings measured on this host by python -m voice_pipeline.tune"""
+    model_size: str
+    compute_type: str = "int8"
+    beam_size: int = 5
+    cpu_threads: int = 0
+    num_workers: int = 1
+    measured: Dict[str, float] = Field(default_factory=dict)
+    host: Dict[str, Any] = Field(default_factory=dict)
+
+    def profile(self) -> DecodeProfile:
+        return DecodeProfile(
+            name="tuned", model_size=self.model_size, beam_size=self.beam_size, compute_type=self.compute_type
+        )
+
+    def register(self) -> List[str]:
+        """Add the tuned settings to PROFILES as "tuned"
+
+        Returns the profile names to adapt over: the tuned profile, then the
+        built-in profiles that are cheaper than it.
+        """
+        tuned = self.profile()
+        PROFILES[tuned.name] = tuned
+        cost = (model_rank(tuned.model_size), tuned.beam_size)
+        return [tuned.name] + [
+            name for name, profile in PROFILES.items()
+            if name != tuned.name and (model_rank(profile.model_size), profile.beam_size) < cost
+        ]
+
+def load_tuning(path: Optional[str]) -> Optional[WhisperTuning]:
+    """Load a tuning file, or return None if there is none or it is invalid"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            tuning = WhisperTuning.model_validate_json(f.read())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring STT tuning file {path}: {str(e)}")
+        return None
+
+    logger.info(f"Loaded STT tuning from {path}: {tuning.model_size} ({tuning.compute_type}), "
+                f"beam {tuning.beam_size}, {tuning.num_workers} workers x {tuning.cpu_threads} threads")
+    return tuning
+
+class ProfileController:
+    """Moves STT decoding to cheaper profiles under load and back as load drops
+
+    Queue wait (time a decode waits for an STT worker) and real-time factor
+    (decode time / audio duration) are tracked as moving averages. Passing
+    either threshold steps down one profile; once both fall below
+    recover_ratio of their thresholds for min_dwell seconds, it steps back up.
+    """
+
+    def __init__(self,
+                profiles: Sequence[str] = ("accurate", "balanced", "fast"),
+                max_queue_wait: float = 1.0,
+                max_rtf: float = 0.5,
+                recover_ratio: float = 0.5,
+                smoothing: float = 0.3,
+                min_dwell: float = 10.0):
+        """Initialize the controller
+
+        Args:
+            profiles: Profile names ordered from most accurate to cheapest
+            max_queue_wait: Average queue wait in seconds that triggers a downgrade
+            max_rtf: Average real-time factor that triggers a downgrade
+            recover_ratio: Fraction of the thresholds load must fall below to upgrade
+            smoothing: Weight of the newest sample in the moving averages
+            min_dwell: Minimum seconds between profile changes
+        """
+        unknown = [name for name in profiles if name not in PROFILES]
+        if unknown:
+            raise ValueError(f"Unknown STT profiles: {unknown}. Available profiles: {list(PROFILES.keys())}")
+
+        self.profiles = [PROFILES[name] for name in profiles]
+        self.max_queue_wait = max_queue_wait
+        self.max_rtf = max_rtf
+        self.recover_ratio = recover_ratio
+        self.smoothing = smoothing
+        self.min_dwell = min_dwell
+        self._level = 0
+        self._queue_wait: Optional[float] = None
+        self._rtf: Optional[float] = None
+        self._changed_at = time.monotonic()
+
+    @property
+    def current(self) -> DecodeProfile:
+        """Profile new decodes should use"""
+        return self.profiles[self._level]
+
+    def observe(self, queue_wait: float, rtf: Optional[float]):
+        """Record one decode's queue wait and real-time factor"""
+        self._queue_wait = self._average(self._queue_wait, queue_wait)
+        if rtf is not None:
+            self._rtf = self._average(self._rtf, rtf)
+
+        if time.monotonic() - self._changed_at < self.min_dwell:
+            return
+
+        rtf_now = self._rtf or 0.0
+        if self._queue_wait > self.max_queue_wait or rtf_now > self.max_rtf:
+            self._step(+1)
+        elif (self._queue_wait < self.max_queue_wait * self.recover_ratio
+              and rtf_now < self.max_rtf * self.recover_ratio):
+            self._step(-1)
+
+    def stats(self) -> Dict[str, object]:
+        """Return the current profile and smoothed load figures"""
+        return {
+            "profile": self.current.name,
+            "queue_wait": round(self._queue_wait or 0.0, 3),
+            "rtf": round(self._rtf or 0.0, 3),
+        }
+
+    def _average(self, current: Optional[float], sample: float) -> float:
+        if current is None:
+            return sample
+        return (1 - self.smoothing) * current + self.smoothing * sample
+
+    def _step(self, direction: int):
+        level = min(max(self._level + direction, 0), len(self.profiles) - 1)
+        if level == self._level:
+            return
+
+        logger.warning(
+            f"STT profile {self.current.name} -> {self.profiles[level].name} "
+            f"(queue wait {self._queue_wait:.2f}s, rtf {self._rtf or 0.0:.2f})"
+        )
+        self._level = level
+        self._changed_at = time.monotonic()
+
+        # Samples taken under the old profile say little about the new one
+        self._queue_wait = None
+        self._rtf = None
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from voice_pipeline.core.interfaces import STTInterface
+from voice_pipeline.core.models import AudioData, TranscriptionResult
+from voice_pipeline.deploy.ipc import read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+class RemoteSTT(STTInterface):
+    """STT client for a shared model host on a local Unix socket
+
+    Lets several worker processes share one loaded Whisper model. Requests
+    go over a small pool of persistent connections, one request per
+    connection at a time.
+    """
+
+    def __init__(self, socket_path: str, pool_size: int = 4, timeout: float = 120.0):
+        """Initialize with the model host's socket path"""
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._idle: List[Connection] = []
+        self._slots = asyncio.Semaphore(pool_size)
+        self._host_stats: Dict[str, object] = {}
+
+    async def transcribe(self,
+                         audio_data: AudioData,
+                         language: Optional[str] = None,
+                         segments: bool = True) -> TranscriptionResult:
+        """Transcribe audio on the model host"""
+        header = {
+            "op": "transcribe",
+            "language": language,
+            "segments": segments,
+            "format": audio_data.format,
+            "sample_rate": audio_data.sample_rate,
+            "channels": audio_data.channels,
+        }
+
+        async with self._slots:
+            connection = None
+            try:
+                connection = self._idle.pop() if self._idle else await self._connect()
+                reader, writer = connection
+                await write_frame(writer, header, audio_data.data)
+                response, _ = await asyncio.wait_for(read_frame(reader), self.timeout)
+            except Exception as e:
+                logger.error(f"Error during remote transcription: {str(e)}")
+                if connection is not None:
+                    connection[1].close()
+                # A failed request usually means the host restarted, which leaves every pooled connection dead
+                for _, idle_writer in self._idle:
+                    idle_writer.close()
+                self._idle.clear()
+                return TranscriptionResult(text="", error=str(e))
+
+            self._idle.append(connection)
+
+        self._host_stats = response.pop("stats", self._host_stats)
+        return TranscriptionResult(**response)
+
+    def stats(self) -> Dict[str, object]:
+        """Return the model host's figures as of the last response"""
+        return {"remote": self.socket_path, **self._host_stats}
+
+    async def _connect(self) -> Connection:
+        return await asyncio.open_unix_connection(self.socket_path)
@@ -1,64 +1,169 @@
 import os
 import tempfile
 import uuid
+import asyncio
 import logging
-from typing import List
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from voice_pipeline.core.interfaces import STTInterface
-from voice_pipeline.core.models import AudioData, TranscriptionResult
+from voice_pipeline.core.models import AudioData, Segments, TranscriptionResult
 from voice_pipeline.core.utils import create_temp_file, cleanup_temp_file
+from voice_pipeline.components.stt.profiles import DecodeProfile, ProfileController
 
 logger = logging.getLogger(__name__)
 
 class FasterWhisperSTT(STTInterface):
-    """Implementation of STT using Faster Whisper"""
-    
-    def __init__(self, model_size="base", device="cpu", compute_type="int8"):
-        """Initialize with Whisper model settings"""
-        from faster_whisper import WhisperModel
-        logger.info(f"Loading Whisper model: {model_size}")
-        self.whisper_model = WhisperModel(model_size, device=device, compute_type=compute_type)
-        logger.info("Whisper model loaded successfully")
-    
-    async def transcribe(self, audio_data: AudioData) -> TranscriptionResult:
-        """Transcribe audio using Faster Whisper"""
+    """Implementation of STT using Faster Whisper
+
+    Decoding runs on a bounded pool of worker threads so it never blocks the
+    event loop. With a ProfileController, each decode uses the controller's
+    current profile and reports its queue wait and real-time factor back.
+    """
+
+    def __init__(self,
+                model_size="base",
+                device="cpu",
+                compute_type="int8",
+                controller: Optional[ProfileController] = None,
+                num_workers: int = 1,
+                cpu_threads: int = 0,
+                beam_size: int = 5,
+                word_timestamps: bool = False):
+        """Initialize with Whisper model settings
+
+        Args:
+            model_size: Model to use when no controller is given
+            device: Device to run inference on
+            compute_type: Quantization to use when no controller is given
+            controller: Optional load-adaptive profile controller
+            num_workers: Number of decodes that may run concurrently
+            cpu_threads: CTranslate2 threads per decode (0 for the library default)
+            beam_size: Beam size to use when no controller is given
+            word_timestamps: Decode word timings too, which costs an extra alignment pass
+        """
+        self.device = device
+        self.controller = controller
+        self.num_workers = num_workers
+        self.cpu_threads = cpu_threads
+        self.word_timestamps = word_timestamps
+        self.default_profile = DecodeProfile(
+            name="default", model_size=model_size, beam_size=beam_size, compute_type=compute_type
+        )
+        self._models: Dict[Tuple[str, str], object] = {}
+        self._executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="whisper")
+
+        # Load every model the controller may switch to up front, so a
+        # profile change under load doesn't stall on a model load
+        profiles = controller.profiles if controller else [self.default_profile]
+        for profile in profiles:
+            self._get_model(profile)
+
+    @property
+    def whisper_model(self):
+        """Model for the profile currently in use"""
+        return self._get_model(self._current_profile())
+
+    async def transcribe(self,
+                         audio_data: AudioData,
+                         language: Optional[str] = None,
+                         segments: bool = True) -> TranscriptionResult:
+        """Transcribe audio using Faster Whisper
+
+        Passing a known language skips Whisper's language identification pass.
+        """
+        temp_file = None
         try:
             # Save audio to temporary file
             temp_file = create_temp_file(audio_data.data)
-            
-            logger.info(f"Processing audio with Whisper model")
-            segments, info = self.whisper_model.transcribe(temp_file, beam_size=5)
-            
-            # Convert generator to list
-            segments_list = list(segments)
-            
-            # Process results
-            text = ""
-            segment_data = []
-            
-            for segment in segments_list:
-                text += segment.text + " "
-                segment_data.append({
-                    "id": segment.id,
-                    "start": segment.start,
-                    "end": segment.end,
-                    "text": segment.text,
-                    "words": [{"word": w.word, "start": w.start, "end": w.end, "prob": w.probability} 
-                             for w in (segment.words or [])]
-                })
-            
-            # Clean up
-            cleanup_temp_file(temp_file)
-            
+
+            profile = self._current_profile()
+            logger.info(f"Processing audio with Whisper profile {profile.name} (language hint: {language})")
+
+            submitted_at = time.monotonic()
+            loop = asyncio.get_running_loop()
+            decoded, info, started_at, finished_at = await loop.run_in_executor(
+                self._executor, self._decode, temp_file, profile, language, segments
+            )
+            text, segment_data, confidence = decoded
+
+            if self.controller is not None:
+                duration = getattr(info, "duration", 0.0)
+                rtf = (finished_at - started_at) / duration if duration else None
+                self.controller.observe(started_at - submitted_at, rtf)
+
             return TranscriptionResult(
-                text=text.strip(),
+                text=text,
                 segments=segment_data,
                 language=info.language,
-                language_probability=info.language_probability
+                language_probability=info.language_probability,
+                confidence=confidence
             )
-        
+
         except Exception as e:
             logger.error(f"Error during transcription: {str(e)}")
             import traceback
             logger.error(traceback.format_exc())
-            return TranscriptionResult(text="", error=str(e))
\ No newline at end of file
+            return TranscriptionResult(text="", error=str(e))
+
+        finally:
+            # Clean up
+            if temp_file:
+                cleanup_temp_file(temp_file)
+
+    def stats(self) -> Dict[str, object]:
+        """Return the active decode profile and load figures"""
+        if self.controller is None:
+            return {"profile": self.default_profile.name}
+        return self.controller.stats()
+
+    def _decode(self, audio_path: str, profile: DecodeProfile, language: Optional[str], keep_segments: bool):
+        """Run a full decode on a worker thread
+
+        Returns the text, the segments as columns (empty unless
+        keep_segments), and the confidence, so the per-segment objects
+        faster-whisper creates are dropped here, off the event loop.
+        """
+        started_at = time.monotonic()
+        segments, info = self._get_model(profile).transcribe(
+            audio_path,
+            beam_size=profile.beam_size,
+            temperature=profile.temperature,
+            vad_filter=profile.vad_filter,
+            language=language,
+            word_timestamps=self.word_timestamps and keep_segments
+        )
+
+        # Segments are generated lazily; consume them here
+        segments_list = list(segments)
+        text = " ".join(segment.text for segment in segments_list).strip()
+
+        # Geometric-mean token probability as a decode quality signal
+        confidence = None
+        if segments_list:
+            confidence = math.exp(sum(segment.avg_logprob for segment in segments_list) / len(segments_list))
+
+        columns = Segments.from_whisper(segments_list, words=self.word_timestamps) if keep_segments else None
+        return (text, columns, confidence), info, started_at, time.monotonic()
+
+    def _current_profile(self) -> DecodeProfile:
+        return self.controller.current if self.controller else self.default_profile
+
+    def _get_model(self, profile: DecodeProfile):
+        key = (profile.model_size, profile.compute_type)
+        model = self._models.get(key)
+        if model is None:
+            from faster_whisper import WhisperModel
+            logger.info(f"Loading Whisper model: {profile.model_size} ({profile.compute_type})")
+            model = WhisperModel(
+                profile.model_size,
+                device=self.device,
+                compute_type=profile.compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers
+            )
+            self._models[key] = model
+            logger.info("Whisper model loaded successfully")
+        return model
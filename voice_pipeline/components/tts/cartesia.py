@@ -1,10 +1,11 @@
 import logging
 import os
 from dotenv import load_dotenv
-from typing import List
+from typing import AsyncIterator, List, Optional
 
 from voice_pipeline.core.interfaces import TTSInterface
-from voice_pipeline.core.models import TTSResult
+from voice_pipeline.core.models import SynthesisOptions, TTSResult
+from voice_pipeline.core.ratelimit import ProviderLimiter, limiter_for
 from cartesia import AsyncCartesia
 
 # Load environment variables
@@ -15,35 +16,68 @@ voice_id: str = os.getenv('CARTESIA_VOICE_ID', '')  # Default to empty string if
 
 logger = logging.getLogger(__name__)
 
+# List of supported languages (add more as needed)
+SUPPORTED_LANGUAGES = {'en', 'es', 'fr', 'de', 'it'}
+
 class CartesiaTTS(TTSInterface):
-    """Implementation of TTS using Cartesia API"""
+    """Implementation of TTS using Cartesia API
+    
+    One instance is shared by all sessions in a process and keeps a single
+    warm client; per-session settings are passed to each synthesize call.
+    """
     
-    def __init__(self, api_key: str):
-        """Initialize with Cartesia API key"""
+    def __init__(self,
+                api_key: str,
+                default_voice_id: str = voice_id,
+                default_speed: float = 0.6,
+                limiter: Optional[ProviderLimiter] = None):
+        """Initialize with Cartesia API key and process-wide defaults
+        
+        Requests go through the limiter shared by every client of the same
+        API key, which also owns retries.
+        """
         self.api_key = api_key
+        self.default_voice_id = default_voice_id
+        self.default_speed = default_speed
         self.current_language = "en"  # default language
-        
+        self.limiter = limiter or limiter_for("cartesia", api_key, requests_per_minute=120)
+        self._client: Optional[AsyncCartesia] = None
+    
+    @property
+    def client(self) -> AsyncCartesia:
+        """Shared Cartesia client, created on first use"""
+        if self._client is None:
+            self._client = AsyncCartesia(api_key=self.api_key, max_retries=0)
+        return self._client
+    
     def set_language(self, language: str):
-        """Set the TTS language
+        """Set the default TTS language for calls that don't specify one
         
         Args:
             language: ISO language code (e.g., 'en', 'es', 'fr')
         """
         self.current_language = language
     
-    async def synthesize(self, 
-                        text: str, 
-                        voice_id: str = voice_id,
-                        language: str = None,
-                        speed: float = 0.6,
-                        pitch: float = 1.0) -> TTSResult:
+    async def synthesize(self, text: str, options: Optional[SynthesisOptions] = None) -> TTSResult:
         """Convert text to speech using Cartesia TTS API"""
+        options = options or SynthesisOptions()
+        
+        # Collect all chunks into a single audio buffer
+        audio_chunks = [chunk async for chunk in self.synthesize_stream(text, options)]
+        
+        return TTSResult(
+            audio=b''.join(audio_chunks),
+            format=options.format,
+            sample_rate=options.sample_rate
+        )
+    
+    async def synthesize_stream(self, text: str, options: Optional[SynthesisOptions] = None) -> AsyncIterator[bytes]:
+        """Stream speech from the Cartesia API as chunks arrive"""
         try:
-            # Use provided language or fall back to current_language
-            use_language = language or self.current_language
+            options = options or SynthesisOptions()
             
-            # List of supported languages (add more as needed)
-            SUPPORTED_LANGUAGES = {'en', 'es', 'fr', 'de', 'it'}
+            # Use provided language or fall back to current_language
+            use_language = options.language or self.current_language
             
             # Check if language is supported, if not default to 'en'
             base_language = use_language.split('-')[0] if '-' in use_language else use_language
@@ -51,47 +85,43 @@ class CartesiaTTS(TTSInterface):
                 logger.warning(f"Language '{use_language}' not supported, defaulting to English")
                 base_language = 'en'
             
-            # Initialize Cartesia client
-            client = AsyncCartesia(api_key=self.api_key)
-            
             # Map speed to string value if needed
+            speed = options.speed if options.speed is not None else self.default_speed
             speed_str = "normal"
             if speed < 0.8:
                 speed_str = "slow"
             elif speed > 1.2:
                 speed_str = "fast"
             
-            # Make TTS request and collect all chunks
-            audio_chunks = []
-            async for chunk in client.tts.bytes(
-                model_id="sonic-2",
-                transcript=text,
-                voice={
-                    "id": voice_id,
-                    "experimental_controls": {
-                        "speed": speed_str,
-                        "emotion": [],
+            # Make TTS request, retried until the first chunk arrives
+            def open_stream() -> AsyncIterator[bytes]:
+                return self.client.tts.bytes(
+                    model_id="sonic-2",
+                    transcript=text,
+                    voice={
+                        "id": options.voice_id or self.default_voice_id,
+                        "experimental_controls": {
+                            "speed": speed_str,
+                            "emotion": [],
+                        },
                     },
-                },
-                language=base_language,
-                output_format={
-                    "container": "mp3",
-                    "sample_rate": 44100,
-                },
-            ):
-                audio_chunks.append(chunk)
-            
-            # Combine all chunks into a single audio buffer
-            audio_bytes = b''.join(audio_chunks)
+                    language=base_language,
+                    output_format=self._output_format(options),
+                )
             
-            return TTSResult(
-                audio=audio_bytes,
-                format="mp3",
-                sample_rate=44100
-            )
-                    
+            async for chunk in self.limiter.stream(open_stream):
+                yield chunk
+        
         except Exception as e:
             logger.error(f"Error in TTS conversion: {str(e)}")
             import traceback
             logger.error(traceback.format_exc())
-            raise
\ No newline at end of file
+            raise
+    
+    def _output_format(self, options: SynthesisOptions) -> dict:
+        """Map requested output format to Cartesia's output_format parameter"""
+        if options.format == "mp3":
+            return {"container": "mp3", "sample_rate": options.sample_rate}
+        if options.format in ("wav", "raw"):
+            return {"container": options.format, "encoding": "pcm_s16le", "sample_rate": options.sample_rate}
+        raise ValueError(f"Unsupported output format: {options.format}")
@@ -1,11 +1,13 @@
 import logging
 import os
+import httpx
 from dotenv import load_dotenv
-from typing import List
+from typing import AsyncIterator, Optional
 
 from voice_pipeline.core.interfaces import TTSInterface
-from voice_pipeline.core.models import TTSResult
-from elevenlabs.client import ElevenLabs
+from voice_pipeline.core.models import SynthesisOptions, TTSResult
+from voice_pipeline.core.ratelimit import ProviderLimiter, limiter_for
+from elevenlabs.client import AsyncElevenLabs
 
 # Load environment variables
 load_dotenv()
@@ -15,36 +17,97 @@ voice_id: str = os.getenv('ELEVENLABS_VOICE_ID', '')  # Default to empty string
 
 logger = logging.getLogger(__name__)
 
+# List of supported languages (add more as needed)
+SUPPORTED_LANGUAGES = {'en', 'es', 'fr', 'de', 'it'}
+
+# Output formats the streaming endpoint offers: mp3 bitrate by sample rate, and PCM sample rates
+MP3_BITRATES = {22050: 32, 24000: 48, 44100: 128}
+PCM_SAMPLE_RATES = {8000, 16000, 22050, 24000, 32000, 44100, 48000}
+
 class ElevenLabsTTS(TTSInterface):
-    """Implementation of TTS using ElevenLabs API"""
+    """Implementation of TTS using ElevenLabs API
+    
+    One instance is shared by all sessions in a process and keeps a single
+    async client on a pooled HTTP client, so connections stay warm between
+    turns; per-session settings are passed to each call. Audio is always
+    streamed, and synthesize collects the stream.
     
-    def __init__(self, api_key: str):
-        """Initialize with ElevenLabs API key"""
+    The session language is enforced with language_code on models that
+    support it; multilingual_v2 models do not, and pick the language from
+    the text instead. There is no WAV output, and mp3 and raw PCM are only
+    available at the sample rates in MP3_BITRATES and PCM_SAMPLE_RATES.
+    """
+    
+    def __init__(self,
+                api_key: str,
+                default_voice_id: str = voice_id,
+                model_id: str = "eleven_multilingual_v2",
+                optimize_streaming_latency: Optional[int] = 3,
+                max_connections: int = 32,
+                limiter: Optional[ProviderLimiter] = None):
+        """Initialize with ElevenLabs API key and process-wide defaults
+        
+        Requests go through the limiter shared by every client of the same
+        API key, which also owns retries.
+        
+        Args:
+            api_key: ElevenLabs API key
+            default_voice_id: Voice used when a call does not specify one
+            model_id: Synthesis model
+            optimize_streaming_latency: ElevenLabs latency optimization level (0-4), or None for the default
+            max_connections: Size of the shared connection pool
+            limiter: Rate limiter, by default the shared one for this API key
+        """
         self.api_key = api_key
+        self.default_voice_id = default_voice_id
+        self.model_id = model_id
+        self.optimize_streaming_latency = optimize_streaming_latency
+        self.max_connections = max_connections
         self.current_language = "en"  # default language
-        self.client = ElevenLabs(api_key=api_key)
-        
+        self.limiter = limiter or limiter_for("elevenlabs", api_key, requests_per_minute=120)
+        self._client: Optional[AsyncElevenLabs] = None
+    
+    @property
+    def client(self) -> AsyncElevenLabs:
+        """Shared ElevenLabs client, created on first use"""
+        if self._client is None:
+            http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(60.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=120.0
+                )
+            )
+            self._client = AsyncElevenLabs(api_key=self.api_key, httpx_client=http_client)
+        return self._client
+    
     def set_language(self, language: str):
-        """Set the TTS language
+        """Set the default TTS language for calls that don't specify one
         
         Args:
             language: ISO language code (e.g., 'en', 'es', 'fr')
         """
         self.current_language = language
     
-    async def synthesize(self, 
-                        text: str, 
-                        voice_id: str = voice_id,
-                        language: str = None,
-                        speed: float = 0.6,
-                        pitch: float = 1.0) -> TTSResult:
+    async def synthesize(self, text: str, options: Optional[SynthesisOptions] = None) -> TTSResult:
         """Convert text to speech using ElevenLabs TTS API"""
+        options = options or SynthesisOptions()
+        audio_chunks = [chunk async for chunk in self.synthesize_stream(text, options)]
+        
+        return TTSResult(
+            audio=b''.join(audio_chunks),
+            format=options.format,
+            sample_rate=options.sample_rate
+        )
+    
+    async def synthesize_stream(self, text: str, options: Optional[SynthesisOptions] = None) -> AsyncIterator[bytes]:
+        """Stream speech from the ElevenLabs streaming endpoint as chunks arrive"""
         try:
-            # Use provided language or fall back to current_language
-            use_language = language or self.current_language
+            options = options or SynthesisOptions()
             
-            # List of supported languages (add more as needed)
-            SUPPORTED_LANGUAGES = {'en', 'es', 'fr', 'de', 'it'}
+            # Use provided language or fall back to current_language
+            use_language = options.language or self.current_language
             
             # Check if language is supported, if not default to 'en'
             base_language = use_language.split('-')[0] if '-' in use_language else use_language
@@ -52,26 +115,41 @@ class ElevenLabsTTS(TTSInterface):
                 logger.warning(f"Language '{use_language}' not supported, defaulting to English")
                 base_language = 'en'
             
-            # Generate audio using the new client API
-            audio_bytes = self.client.text_to_speech.convert(
-                text=text,
-                voice_id=voice_id,
-                model_id="eleven_multilingual_v2",
-                output_format="mp3_44100_128"
-            )
+            request = {}
+            if "multilingual_v2" not in self.model_id:
+                request["language_code"] = base_language.lower()
+            if options.speed is not None:
+                request["voice_settings"] = {"speed": options.speed}
+            if self.optimize_streaming_latency is not None:
+                request["optimize_streaming_latency"] = self.optimize_streaming_latency
             
-            # Convert generator to bytes
-            if hasattr(audio_bytes, '__iter__'):
-                audio_bytes = b''.join(audio_bytes)
+            def open_stream() -> AsyncIterator[bytes]:
+                return self.client.text_to_speech.stream(
+                    text=text,
+                    voice_id=options.voice_id or self.default_voice_id,
+                    model_id=self.model_id,
+                    output_format=self._output_format(options),
+                    request_options={"max_retries": 0},
+                    **request
+                )
             
-            return TTSResult(
-                audio=audio_bytes,
-                format="mp3",
-                sample_rate=44100
-            )
-                    
+            async for chunk in self.limiter.stream(open_stream):
+                yield chunk
+        
         except Exception as e:
             logger.error(f"Error in TTS conversion: {str(e)}")
             import traceback
             logger.error(traceback.format_exc())
-            raise 
\ No newline at end of file
+            raise
+    
+    def check_options(self, options: SynthesisOptions):
+        """Raise ValueError for a format or sample rate ElevenLabs cannot produce"""
+        self._output_format(options)
+    
+    def _output_format(self, options: SynthesisOptions) -> str:
+        """Map requested output format to ElevenLabs' output_format parameter"""
+        if options.format == "mp3" and options.sample_rate in MP3_BITRATES:
+            return f"mp3_{options.sample_rate}_{MP3_BITRATES[options.sample_rate]}"
+        if options.format == "raw" and options.sample_rate in PCM_SAMPLE_RATES:
+            return f"pcm_{options.sample_rate}"
+        raise ValueError(f"Unsupported output format on ElevenLabs: {options.format} at {options.sample_rate} Hz")
@@ -1,18 +1,187 @@
 import logging
+import math
+import re
+from typing import Optional, Tuple
+
+import numpy as np
+
 from voice_pipeline.core.interfaces import TurnDetectorInterface
 from voice_pipeline.core.models import AudioData
+from voice_pipeline.core.utils import decode_wav, frame_rms
 
 logger = logging.getLogger(__name__)
 
+# Trailing words that suggest the speaker is pausing rather than finished
+HESITATIONS = {"um", "uh", "er", "erm", "hmm", "mm", "uhm", "ah"}
+CONTINUATIONS = {
+    "and", "but", "or", "so", "because", "then", "if", "that", "which", "who",
+    "the", "a", "an", "to", "of", "with", "for", "in", "on", "at", "from",
+    "my", "your", "our", "their", "is", "are", "was", "like", "about", "i",
+}
+# Short replies that are complete on their own
+ACKNOWLEDGEMENTS = {
+    "yes", "no", "yeah", "yep", "nope", "ok", "okay", "sure", "thanks",
+    "thank you", "right", "exactly", "correct", "bye", "goodbye", "stop",
+}
+
+_WORD_RE = re.compile(r"[\w']+")
+
 class EOUTurnDetector(TurnDetectorInterface):
-    """End of Utterance based turn detector"""
+    """End of Utterance based turn detector
+    
+    Combines a lightweight text classifier on the transcript (does it read
+    like a finished sentence?), prosodic cues at the end of the audio
+    (falling energy and pitch) and the silence already trailing the audio
+    to pick an endpointing delay between the agent's minimum and maximum.
+    Utterances scored at least complete_threshold likely to be finished are
+    answered at once, without waiting out even the minimum delay.
+    """
     
-    def __init__(self):
-        """Initialize turn detector"""
-        pass
+    def __init__(self, frame_ms: int = 20, prosody_weight: float = 1.0, complete_threshold: float = 0.85):
+        """Initialize turn detector
+        
+        Args:
+            frame_ms: Analysis frame length in milliseconds
+            prosody_weight: Weight of prosodic cues relative to the text classifier
+            complete_threshold: Completion probability above which the turn ends without delay
+        """
+        self.frame_ms = frame_ms
+        self.prosody_weight = prosody_weight
+        self.complete_threshold = complete_threshold
     
-    async def is_turn_complete(self, audio_data: AudioData) -> bool:
+    async def is_turn_complete(self, audio_data: AudioData, transcript: str = "") -> bool:
         """Determine if user's turn is complete"""
-        # Placeholder implementation
-        # A real implementation would analyze for prosodic cues, etc.
-        return True
\ No newline at end of file
+        return await self.endpointing_delay(audio_data, transcript) == 0.0
+    
+    async def endpointing_delay(self,
+                                audio_data: AudioData,
+                                transcript: str = "",
+                                min_delay: float = 0.5,
+                                max_delay: float = 5.0) -> float:
+        """Seconds to keep waiting for more speech after this audio ends"""
+        trailing_silence, prosody = self._analyze_audio(audio_data)
+        
+        logit = self.text_logit(transcript) + self.prosody_weight * prosody
+        probability = 1.0 / (1.0 + math.exp(-logit))
+        if probability >= self.complete_threshold:
+            logger.debug(f"Turn completion p={probability:.2f}, complete")
+            return 0.0
+        
+        # Finished-sounding utterances get close to the minimum delay, while
+        # hesitations and dangling clauses get close to the maximum
+        delay = min_delay + (max_delay - min_delay) * (1.0 - probability) ** 2
+        remaining = max(0.0, delay - trailing_silence)
+        
+        logger.debug(
+            f"Turn completion p={probability:.2f}, delay={delay:.2f}s, "
+            f"trailing silence={trailing_silence:.2f}s"
+        )
+        return remaining
+    
+    def text_logit(self, transcript: str) -> float:
+        """Score how finished a transcript looks, as a log-odds value"""
+        text = transcript.strip().lower()
+        if not text:
+            return -1.0
+        
+        words = _WORD_RE.findall(text)
+        last_word = words[-1] if words else ""
+        logit = 0.3
+        
+        if text.endswith(("...", "…")):
+            logit -= 2.0
+        elif text[-1] in ".!?":
+            logit += 2.5
+        elif text[-1] in ",;:-":
+            logit -= 1.5
+        
+        if last_word in HESITATIONS:
+            logit -= 3.0
+        elif last_word in CONTINUATIONS:
+            logit -= 2.0
+        
+        if len(words) < 3:
+            if " ".join(words) in ACKNOWLEDGEMENTS:
+                logit += 1.5
+            else:
+                logit -= 0.5
+        
+        return logit
+    
+    def _analyze_audio(self, audio_data: AudioData) -> Tuple[float, float]:
+        """Return (trailing silence in seconds, prosodic finality score in [-1, 1])"""
+        if audio_data.format != "wav":
+            return 0.0, 0.0
+        
+        try:
+            samples, sample_rate = decode_wav(audio_data.data)
+        except Exception as e:
+            logger.debug(f"Skipping acoustic turn cues: {str(e)}")
+            return 0.0, 0.0
+        
+        frame_size = max(1, int(sample_rate * self.frame_ms / 1000))
+        energy = frame_rms(samples, frame_size)
+        if len(energy) == 0 or energy.max() <= 1e-4:
+            return 0.0, 0.0
+        
+        # Frames well above the noise floor count as voiced
+        noise_floor = np.percentile(energy, 10)
+        threshold = max(noise_floor * 3.0, energy.max() * 0.05, 1e-3)
+        voiced = np.flatnonzero(energy > threshold)
+        if len(voiced) == 0:
+            return 0.0, 0.0
+        
+        trailing_frames = len(energy) - 1 - voiced[-1]
+        trailing_silence = trailing_frames * self.frame_ms / 1000
+        
+        end = (voiced[-1] + 1) * frame_size
+        prosody = self._prosody_score(samples[:end], sample_rate, energy[voiced], frame_size)
+        return trailing_silence, prosody
+    
+    def _prosody_score(self,
+                       samples: np.ndarray,
+                       sample_rate: int,
+                       voiced_energy: np.ndarray,
+                       frame_size: int) -> float:
+        """Score falling energy and pitch at the end of speech as finality cues"""
+        tail_frames = max(1, int(0.3 * 1000 / self.frame_ms))
+        if len(voiced_energy) < tail_frames * 2:
+            return 0.0
+        
+        # Energy: trailing off relative to the utterance suggests an ending
+        ratio = voiced_energy[-tail_frames:].mean() / (np.median(voiced_energy) + 1e-9)
+        score = float(np.clip((1.0 - ratio) * 1.5, -1.0, 1.0))
+        
+        # Pitch: a falling contour over the final voiced stretch suggests an ending
+        window = samples[-tail_frames * frame_size * 2:]
+        half = len(window) // 2
+        f0_start = self._estimate_f0(window[:half], sample_rate)
+        f0_end = self._estimate_f0(window[half:], sample_rate)
+        if f0_start and f0_end:
+            slope = (f0_end - f0_start) / f0_start
+            score += float(np.clip(-slope * 4.0, -1.0, 1.0))
+            score /= 2.0
+        
+        return score
+    
+    @staticmethod
+    def _estimate_f0(samples: np.ndarray, sample_rate: int) -> Optional[float]:
+        """Estimate fundamental frequency by autocorrelation, or None if unvoiced"""
+        if len(samples) < sample_rate // 50:
+            return None
+        
+        samples = samples - samples.mean()
+        n = len(samples)
+        spectrum = np.fft.rfft(samples, 2 * n)
+        autocorr = np.fft.irfft(spectrum * np.conj(spectrum))[:n]
+        if autocorr[0] <= 0:
+            return None
+        
+        # Search the typical speaking range, 70-400 Hz
+        lo, hi = sample_rate // 400, min(n - 1, sample_rate // 70)
+        if hi <= lo:
+            return None
+        lag = lo + int(np.argmax(autocorr[lo:hi]))
+        if autocorr[lag] / autocorr[0] < 0.3:
+            return None
+        return sample_rate / lag
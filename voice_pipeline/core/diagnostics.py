@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Sampling faster than this holds the GIL often enough to starve the loop being measured
+MIN_PROFILE_INTERVAL = 0.001
+MAX_PROFILE_INTERVAL = 1.0
+# Longer profiles would let the stack counts grow without bound
+MAX_PROFILE_DURATION = 300.0
+
+def frame_name(frame) -> str:
+    """One frame of a folded stack: function (file:line), without the separators folded stacks use"""
+    code = frame.f_code
+    filename = "/".join(code.co_filename.split(os.sep)[-2:])
+    return f"{code.co_name} ({filename}:{frame.f_lineno})".replace(";", ":")
+
+def stack_frames(frame, limit: int = 64) -> List[str]:
+    """Frames from the outermost call down to frame"""
+    frames = []
+    while frame is not None and len(frames) < limit:
+        frames.append(frame_name(frame))
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+class LoopMonitor:
+    """Event-loop lag sampler with a watchdog that catches blocking calls in the act
+
+    A task sleeps for interval seconds at a time and records how late it
+    wakes up, which is how long the loop was busy with other callbacks.
+    Lag is summarised over the last window samples.
+
+    A watchdog thread checks that the task keeps waking up. When it has
+    not for slow_callback seconds, something is blocking the loop, and the
+    watchdog captures the loop thread's stack at that moment, which names
+    the blocking call (a sync client, a model running inline) rather than
+    just the callback that contained it. The last max_reports stalls are
+    kept with their stacks and how long they lasted.
+    """
+
+    def __init__(self,
+                 interval: float = 0.1,
+                 slow_callback: float = 0.25,
+                 window: int = 600,
+                 max_reports: int = 20):
+        self.interval = interval
+        self.slow_callback = slow_callback
+        self.lags: Deque[float] = deque(maxlen=window)
+        self.reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self.stalls = 0
+        self.loop_thread: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._stalled: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start sampling the running loop; call from the loop's thread"""
+        if self._task is not None:
+            return
+        self.loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self.lags.append(lag)
+            self._heartbeat = now
+
+            stalled = self._stalled
+            if stalled is not None:
+                stalled["duration"] = round(lag, 3)
+                self._stalled = None
+                logger.warning(f"Event loop blocked for {lag:.3f}s in {stalled['stack'][-1]}")
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked < self.slow_callback or self._stalled is not None:
+                continue
+
+            frame = sys._current_frames().get(self.loop_thread)
+            if frame is None:
+                continue
+            self.stalls += 1
+            self._stalled = {"at": time.time(), "duration": None, "stack": stack_frames(frame)}
+            self.reports.append(self._stalled)
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag over the sample window, in seconds"""
+        lags = np.array(self.lags) if self.lags else np.zeros(1)
+        return {
+            "lag_p50": round(float(np.percentile(lags, 50)), 4),
+            "lag_p99": round(float(np.percentile(lags, 99)), 4),
+            "lag_max": round(float(lags.max()), 4),
+            "stalls": self.stalls,
+        }
+
+class SamplingProfiler:
+    """Statistical profiler that samples thread stacks from a background thread
+
+    Sampling costs one stack walk per interval and nothing on the sampled
+    threads, so it can run against production traffic. Samples stop after
+    max_duration seconds in case the profile is never collected. Output is
+    in the folded format of flamegraph.pl and speedscope: one line per
+    distinct stack, frames separated by ";", then the sample count.
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.interval = 0.005
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005, max_duration: float = 60.0, thread_id: Optional[int] = None):
+        """Start sampling, of thread_id only or of every thread but this profiler's
+
+        Stacks of other threads are rooted at the thread's name, so decode
+        pool and provider client threads show up separately from the loop.
+        """
+        if not MIN_PROFILE_INTERVAL <= interval <= MAX_PROFILE_INTERVAL:
+            raise ValueError(f"interval must be between {MIN_PROFILE_INTERVAL} and {MAX_PROFILE_INTERVAL} seconds")
+        if not 0 < max_duration <= MAX_PROFILE_DURATION:
+            raise ValueError(f"max_duration must be positive and at most {MAX_PROFILE_DURATION} seconds")
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.counts = Counter()
+        self.samples = 0
+        self.interval = interval
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval, max_duration, thread_id), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and return the folded stacks"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.folded()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval": self.interval,
+            "started_at": self.started_at,
+        }
+
+    def _run(self, interval: float, max_duration: float, thread_id: Optional[int]):
+        own = threading.get_ident()
+        deadline = time.monotonic() + max_duration
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (thread_id is not None and ident != thread_id):
+                    continue
+                frames = stack_frames(frame)
+                if thread_id is None:
+                    frames.insert(0, names.get(ident, str(ident)).replace(";", ":"))
+                self.counts[";".join(frames)] += 1
+            self.samples += 1
@@ -1,8 +1,10 @@
 # Core interfaces for pipeline components
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from .models import AudioData, ConversationContext, LLMResponse, TranscriptionResult, TTSResult
+from .models import (
+    AudioData, ConversationContext, LLMResponse, SynthesisOptions, TranscriptionResult, TTSResult
+)
 
 class VADInterface(ABC):
     """Voice Activity Detection interface"""
@@ -21,9 +23,31 @@ class STTInterface(ABC):
     """Speech-to-Text interface"""
     
     @abstractmethod
-    async def transcribe(self, audio_data: AudioData) -> TranscriptionResult:
-        """Transcribe audio to text"""
+    async def transcribe(self,
+                         audio_data: AudioData,
+                         language: Optional[str] = None,
+                         segments: bool = True) -> TranscriptionResult:
+        """Transcribe audio to text
+        
+        Args:
+            audio_data: Audio to transcribe
+            language: Known language of the speech, or None to detect it
+            segments: Whether to return segment and word timings; when False
+                they may be left out
+        """
         pass
+    
+    async def transcribe_stream(self,
+                                audio_data: AudioData,
+                                language: Optional[str] = None,
+                                segments: bool = True) -> AsyncIterator[TranscriptionResult]:
+        """Transcribe audio, yielding partial results as they become available
+        
+        Each partial result covers the next stretch of the audio, in order,
+        with timestamps relative to the start of the whole clip. The default
+        yields the complete transcription at once.
+        """
+        yield await self.transcribe(audio_data, language=language, segments=segments)
 
 class LLMInterface(ABC):
     """Language Model interface"""
@@ -34,27 +58,69 @@ class LLMInterface(ABC):
                                temperature: float = 0.7) -> LLMResponse:
         """Generate a response based on conversation context"""
         pass
+    
+    async def stream_response(self,
+                              context: ConversationContext,
+                              temperature: float = 0.7) -> AsyncIterator[str]:
+        """Generate a response, yielding text deltas as they are produced
+        
+        The default yields the complete response at once.
+        """
+        response = await self.generate_response(context, temperature=temperature)
+        yield response.text
 
 class TTSInterface(ABC):
     """Text-to-Speech interface"""
     
     @abstractmethod
-    async def synthesize(self, text: str, language: str = None) -> TTSResult:
+    async def synthesize(self, text: str, options: Optional[SynthesisOptions] = None) -> TTSResult:
         """Synthesize speech from text
         
+        Implementations are shared across sessions, so per-session settings
+        arrive with each call rather than being stored on the instance.
+        
         Args:
             text: Text to synthesize
-            language: ISO language code (e.g., 'en', 'es', 'fr')
-            
+            options: Voice, language, speed and output format for this call
+        
         Returns:
             TTSResult: Audio synthesis result
         """
         pass
+    
+    async def synthesize_stream(self, text: str, options: Optional[SynthesisOptions] = None) -> AsyncIterator[bytes]:
+        """Synthesize speech, yielding encoded audio chunks as they are produced
+        
+        Concatenated, the chunks form the same clip synthesize returns. The
+        default yields the complete clip at once.
+        """
+        result = await self.synthesize(text, options)
+        yield result.audio
+    
+    def check_options(self, options: SynthesisOptions):
+        """Raise ValueError if this provider cannot synthesize with the options
+        
+        Called when a session changes its options, so unsupported settings
+        are refused up front instead of failing every later call. The
+        default accepts anything SynthesisOptions validates.
+        """
+        pass
 
 class TurnDetectorInterface(ABC):
     """Turn detection interface"""
     
     @abstractmethod
-    async def is_turn_complete(self, audio_data: AudioData) -> bool:
+    async def is_turn_complete(self, audio_data: AudioData, transcript: str = "") -> bool:
         """Determine if the user's turn is complete"""
-        pass
\ No newline at end of file
+        pass
+    
+    async def endpointing_delay(self,
+                                audio_data: AudioData,
+                                transcript: str = "",
+                                min_delay: float = 0.5,
+                                max_delay: float = 5.0) -> float:
+        """Seconds to keep waiting for more speech after this audio ends
+        
+        Returns 0 when the turn is already complete.
+        """
+        return 0.0 if await self.is_turn_complete(audio_data, transcript) else min_delay
\ No newline at end of file
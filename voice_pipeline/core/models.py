@@ -1,34 +1,393 @@
-from typing import Any, Dict, List, Optional
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Literal, Optional, Union
+import logging
 import uuid
+import numpy as np
 from pydantic import BaseModel, Field
 
-class AudioData(BaseModel):
-    """Data class for audio data"""
-    data: bytes
-    sample_rate: int = 16000
-    channels: int = 1
-    format: str = "wav"
-    
-class TranscriptionResult(BaseModel):
-    """Data class for transcription results"""
-    text: str
-    segments: List[Dict[str, Any]] = []
-    language: Optional[str] = None
-    language_probability: Optional[float] = None
-    confidence: Optional[float] = None
-    error: Optional[str] = None
+logger = logging.getLogger(__name__)
+
+class _Record:
+    """Base for the slotted records passed between pipeline stages
+    
+    These stay off pydantic because they are created for every frame and
+    turn; validation happens at the API edges instead.
+    """
+    __slots__ = ()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the fields as a plain dict"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and self.to_dict() == other.to_dict()
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+    
+class AudioData(_Record):
+    """Audio data, held as a view over the caller's buffer without copying"""
+    __slots__ = ("data", "sample_rate", "channels", "format")
+    
+    def __init__(self,
+                data: Union[bytes, bytearray, memoryview],
+                sample_rate: int = 16000,
+                channels: int = 1,
+                format: str = "wav"):
+        self.data = data if isinstance(data, memoryview) else memoryview(data)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.format = format
+    
+class Segments:
+    """Transcript segments stored as columns
+    
+    Start and end times (and word probabilities) are NumPy arrays and the
+    texts share one string, so a transcript costs a handful of objects
+    however many segments it has. Word timings are stored the same way, in
+    words, only when the STT was asked for them; word_index[i] to
+    word_index[i + 1] are segment i's words. Indexing or iterating builds
+    the familiar segment dicts on demand, with id being the position.
+    """
+    __slots__ = ("start", "end", "prob", "text_buffer", "bounds", "words", "word_index")
+    
+    def __init__(self,
+                start: np.ndarray,
+                end: np.ndarray,
+                text_buffer: str,
+                bounds: np.ndarray,
+                prob: Optional[np.ndarray] = None,
+                words: Optional["Segments"] = None,
+                word_index: Optional[np.ndarray] = None):
+        self.start = start
+        self.end = end
+        self.text_buffer = text_buffer
+        self.bounds = bounds
+        self.prob = prob
+        self.words = words
+        self.word_index = word_index
+    
+    @classmethod
+    def empty(cls) -> "Segments":
+        return cls.from_columns([], [], [])
+    
+    @classmethod
+    def from_columns(cls,
+                     texts: List[str],
+                     start: Any,
+                     end: Any,
+                     prob: Any = None) -> "Segments":
+        """Build from a list of texts and sequences of times"""
+        return cls(
+            np.asarray(start, dtype=np.float64),
+            np.asarray(end, dtype=np.float64),
+            "".join(texts),
+            _offsets([len(text) for text in texts]),
+            prob=None if prob is None else np.asarray(prob, dtype=np.float64)
+        )
+    
+    @classmethod
+    def from_whisper(cls, segments: List[Any], words: bool = False) -> "Segments":
+        """Build from faster-whisper segments, with their words if they were decoded"""
+        result = cls.from_columns(
+            [segment.text for segment in segments],
+            [segment.start for segment in segments],
+            [segment.end for segment in segments]
+        )
+        if words:
+            decoded = [word for segment in segments for word in (segment.words or [])]
+            result.words = cls.from_columns(
+                [word.word for word in decoded],
+                [word.start for word in decoded],
+                [word.end for word in decoded],
+                [word.probability for word in decoded]
+            )
+            result.word_index = _offsets([len(segment.words or []) for segment in segments])
+        return result
+    
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "Segments":
+        """Build from segment dicts as produced by iterating"""
+        result = cls.from_columns(
+            [record["text"] for record in records],
+            [record["start"] for record in records],
+            [record["end"] for record in records]
+        )
+        if any("words" in record for record in records):
+            decoded = [word for record in records for word in record.get("words", [])]
+            result.words = cls.from_columns(
+                [word["word"] for word in decoded],
+                [word["start"] for word in decoded],
+                [word["end"] for word in decoded],
+                [word.get("prob") for word in decoded]
+            )
+            result.word_index = _offsets([len(record.get("words", [])) for record in records])
+        return result
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Segments":
+        """Inverse of to_dict"""
+        return cls(
+            np.asarray(data["start"], dtype=np.float64),
+            np.asarray(data["end"], dtype=np.float64),
+            data["text"],
+            np.asarray(data["bounds"], dtype=np.int64),
+            prob=None if data.get("prob") is None else np.asarray(data["prob"], dtype=np.float64),
+            words=None if data.get("words") is None else cls.from_dict(data["words"]),
+            word_index=None if data.get("word_index") is None else np.asarray(data["word_index"], dtype=np.int64)
+        )
+    
+    @classmethod
+    def coerce(cls, segments: Union["Segments", List[Dict[str, Any]], Dict[str, Any], None]) -> "Segments":
+        """Accept segments in any of their forms: columns, dicts, or to_dict output"""
+        if segments is None:
+            return cls.empty()
+        if isinstance(segments, Segments):
+            return segments
+        if isinstance(segments, dict):
+            return cls.from_dict(segments)
+        return cls.from_records(segments)
+    
+    @staticmethod
+    def concat(parts: List["Segments"]) -> "Segments":
+        """Join segments of consecutive stretches of audio"""
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return Segments.empty()
+        if len(parts) == 1:
+            return parts[0]
+        
+        result = Segments(
+            np.concatenate([part.start for part in parts]),
+            np.concatenate([part.end for part in parts]),
+            "".join(part.text_buffer for part in parts),
+            _offsets([length for part in parts for length in np.diff(part.bounds)]),
+            prob=np.concatenate([part.prob for part in parts]) if all(part.prob is not None for part in parts) else None
+        )
+        if all(part.words is not None for part in parts):
+            result.words = Segments.concat([part.words for part in parts])
+            result.word_index = _offsets([count for part in parts for count in np.diff(part.word_index)])
+        return result
+    
+    def __len__(self) -> int:
+        return len(self.start)
+    
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        
+        item = {"id": index, "start": float(self.start[index]), "end": float(self.end[index]), "text": self.text(index)}
+        if self.prob is not None:
+            item["prob"] = float(self.prob[index])
+        if self.words is not None:
+            item["words"] = [
+                {"word": self.words.text(j), "start": float(self.words.start[j]), "end": float(self.words.end[j]),
+                 "prob": float(self.words.prob[j])}
+                for j in range(self.word_index[index], self.word_index[index + 1])
+            ]
+        return item
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[index] for index in range(len(self)))
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Segments) and self.to_dict() == other.to_dict()
+    
+    def __repr__(self) -> str:
+        return f"Segments({len(self)} segments{', with words' if self.words is not None else ''})"
+    
+    def text(self, index: int) -> str:
+        return self.text_buffer[self.bounds[index]:self.bounds[index + 1]]
+    
+    def texts(self) -> Iterator[str]:
+        return (self.text(index) for index in range(len(self)))
+    
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Segment dicts, for sending to clients"""
+        return list(self)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Columns as plain lists, for JSON or msgpack"""
+        return {
+            "start": self.start.tolist(),
+            "end": self.end.tolist(),
+            "text": self.text_buffer,
+            "bounds": self.bounds.tolist(),
+            "prob": None if self.prob is None else self.prob.tolist(),
+            "words": None if self.words is None else self.words.to_dict(),
+            "word_index": None if self.word_index is None else self.word_index.tolist(),
+        }
     
-class LLMResponse(BaseModel):
+    def map_times(self, start: Callable[[np.ndarray], np.ndarray], end: Callable[[np.ndarray], np.ndarray]) -> "Segments":
+        """Segments with start and end times, word times included, passed through the given functions"""
+        return Segments(
+            start(self.start),
+            end(self.end),
+            self.text_buffer,
+            self.bounds,
+            prob=self.prob,
+            words=None if self.words is None else self.words.map_times(start, end),
+            word_index=self.word_index
+        )
+    
+    def shift(self, offset: float) -> "Segments":
+        return self.map_times(lambda times: times + offset, lambda times: times + offset)
+    
+    def select(self, keep_from: float, keep_to: float) -> "Segments":
+        """Segments, and words within them, whose midpoint is in [keep_from, keep_to)"""
+        def kept(segments: Segments) -> np.ndarray:
+            middle = (segments.start + segments.end) / 2
+            return (middle >= keep_from) & (middle < keep_to)
+        
+        indices = np.flatnonzero(kept(self))
+        result = Segments.from_columns(
+            [self.text(index) for index in indices],
+            self.start[indices],
+            self.end[indices],
+            None if self.prob is None else self.prob[indices]
+        )
+        if self.words is not None:
+            word_kept = kept(self.words)
+            ranges = [np.arange(self.word_index[index], self.word_index[index + 1]) for index in indices]
+            ranges = [word_range[word_kept[word_range]] for word_range in ranges]
+            chosen = np.concatenate(ranges) if ranges else np.zeros(0, dtype=np.int64)
+            result.words = Segments.from_columns(
+                [self.words.text(index) for index in chosen],
+                self.words.start[chosen],
+                self.words.end[chosen],
+                self.words.prob[chosen]
+            )
+            result.word_index = _offsets([len(word_range) for word_range in ranges])
+        return result
+    
+def _offsets(lengths: List[int]) -> np.ndarray:
+    """Cumulative offsets, starting at 0, of consecutive items of the given lengths"""
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    if len(lengths):
+        np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+class TranscriptionResult(_Record):
+    """Data class for transcription results
+    
+    segments may be given as Segments, a list of segment dicts or the
+    output of Segments.to_dict, and is always held as Segments.
+    """
+    __slots__ = ("text", "segments", "language", "language_probability", "confidence", "error")
+    
+    def __init__(self,
+                text: str,
+                segments: Union[Segments, List[Dict[str, Any]], Dict[str, Any], None] = None,
+                language: Optional[str] = None,
+                language_probability: Optional[float] = None,
+                confidence: Optional[float] = None,
+                error: Optional[str] = None):
+        self.text = text
+        self.segments = Segments.coerce(segments)
+        self.language = language
+        self.language_probability = language_probability
+        self.confidence = confidence
+        self.error = error
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the fields as a plain dict, with segments as columns"""
+        return {**super().to_dict(), "segments": self.segments.to_dict()}
+    
+class LLMResponse(_Record):
     """Data class for LLM responses"""
-    text: str
-    response_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    metadata: Dict[str, Any] = {}
+    __slots__ = ("text", "response_id", "metadata")
+    
+    def __init__(self,
+                text: str,
+                response_id: Optional[str] = None,
+                metadata: Optional[Dict[str, Any]] = None):
+        self.text = text
+        self.response_id = response_id or str(uuid.uuid4())
+        self.metadata = metadata if metadata is not None else {}
     
-class TTSResult(BaseModel):
+class TTSResult(_Record):
     """Data class for TTS results"""
-    audio: bytes
-    format: str = "mp3"
-    sample_rate: int = 44100
+    __slots__ = ("audio", "format", "sample_rate")
+    
+    def __init__(self, audio: bytes, format: str = "mp3", sample_rate: int = 44100):
+        self.audio = audio
+        self.format = format
+        self.sample_rate = sample_rate
+    
+class TurnResult(_Record):
+    """Outcome of one agent call, with per-stage timings in seconds"""
+    __slots__ = (
+        "success", "transcription", "llm_response", "audio_response", "language",
+        "turn_complete", "endpointing_delay", "filler", "audio_streamed", "timings"
+    )
+    
+    def __init__(self):
+        self.success = False
+        self.transcription: Optional[TranscriptionResult] = None
+        self.llm_response: Optional[LLMResponse] = None
+        self.audio_response: Optional[TTSResult] = None
+        self.language: Optional[str] = None
+        self.turn_complete = True
+        self.endpointing_delay = 0.0
+        self.filler: Optional[str] = None
+        self.audio_streamed = False  # audio_response was already sent chunk by chunk
+        self.timings: Dict[str, float] = {}
+    
+class OutputPlan(str, Enum):
+    """What a turn must produce; stages nothing needs are skipped
+    
+    AUDIO still runs the LLM, since the reply text is what gets spoken, but
+    the caller does not need it sent. TRANSCRIPT stops after STT.
+    """
+    TRANSCRIPT = "transcript"
+    TEXT = "text"
+    AUDIO = "audio"
+    BOTH = "both"
+    
+    @property
+    def responds(self) -> bool:
+        """Whether the LLM runs"""
+        return self is not OutputPlan.TRANSCRIPT
+    
+    @property
+    def speaks(self) -> bool:
+        """Whether TTS runs"""
+        return self in (OutputPlan.AUDIO, OutputPlan.BOTH)
+    
+    @property
+    def shows_text(self) -> bool:
+        """Whether the reply text is sent to the client"""
+        return self in (OutputPlan.TEXT, OutputPlan.BOTH)
+    
+    @classmethod
+    def from_message(cls, data: Dict[str, Any], default: "OutputPlan") -> "OutputPlan":
+        """Read the outputs a client message asks for from its "output" field
+        
+        The older "tts": false flag still means text only.
+        """
+        if "output" in data:
+            try:
+                return cls(data["output"])
+            except ValueError:
+                logger.warning(f"Unknown output plan: {data['output']}")
+                return default
+        if data.get("tts") is False:
+            return cls.TEXT
+        return default
+    
+class SynthesisOptions(BaseModel):
+    """Per-session speech synthesis settings, passed with every synthesize call
+    
+    Unset fields fall back to the provider's process-wide defaults.
+    """
+    voice_id: Optional[str] = None
+    language: Optional[str] = None
+    speed: Optional[float] = Field(default=None, gt=0.0, le=4.0)
+    format: Literal["mp3", "wav", "raw"] = "mp3"
+    sample_rate: int = Field(default=44100, ge=8000, le=48000)
     
 class Message(BaseModel):
     """Data class for conversation messages"""
@@ -44,7 +403,7 @@ class ConversationContext(BaseModel):
     def add_message(self, role: str, content: str):
         """Add a message to the conversation history"""
         self.messages.append(Message(role=role, content=content))
-        
+    
     def get_messages(self, include_system: bool = True) -> List[Dict[str, str]]:
         """Get all messages in the format expected by most LLM APIs"""
         result = []
@@ -53,9 +412,34 @@ class ConversationContext(BaseModel):
         
         for msg in self.messages:
             result.append({"role": msg.role, "content": msg.content})
-            
+        
         return result
     
     def clear(self):
         """Clear conversation history"""
-        self.messages = []
\ No newline at end of file
+        self.messages = []
+    
+    def size(self) -> int:
+        """Bytes of text held by the system prompt and history"""
+        return len(self.system_prompt.encode()) + sum(len(msg.content.encode()) for msg in self.messages)
+    
+    def trim(self, max_messages: Optional[int] = None, max_bytes: Optional[int] = None) -> int:
+        """Drop the oldest messages until the history is within the limits
+        
+        Once anything is dropped, the remaining history starts with a user
+        message, so exchanges are dropped whole. Returns the number of messages dropped.
+        """
+        sizes = [len(msg.content.encode()) for msg in self.messages]
+        total = sum(sizes)
+        start = 0
+        while start < len(sizes) and (
+            (max_messages is not None and len(sizes) - start > max_messages)
+            or (max_bytes is not None and total > max_bytes)
+            or (start and self.messages[start].role != "user")
+        ):
+            total -= sizes[start]
+            start += 1
+        
+        if start:
+            self.messages = self.messages[start:]
+        return start
\ No newline at end of file
@@ -0,0 +1,349 @@
+import asyncio
+import contextvars
+import hashlib
+import inspect
+import logging
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Mapping, NamedTuple, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "ConnectTimeout"}
+
+class RateLimitExceeded(Exception):
+    """Raised when a provider call cannot be made within the turn's latency budget"""
+
+class ProviderCall(NamedTuple):
+    """Who a provider call is made for and when it must be done by"""
+    session_id: Optional[str]
+    deadline: Optional[float]  # time.monotonic() value
+
+# Set by the agent for the duration of a turn, so providers can queue fairly and respect the budget
+current_call: contextvars.ContextVar[Optional[ProviderCall]] = contextvars.ContextVar("current_call", default=None)
+
+class TokenBucket:
+    """Continuously refilling allowance of requests or tokens per minute"""
+    __slots__ = ("capacity", "rate", "level", "updated")
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken; requests larger than the bucket wait for a full one"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def update(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float], now: float):
+        """Align with the provider's own accounting from rate-limit headers
+
+        The provider restores limit - remaining within reset seconds, which
+        gives the refill rate whatever window the limit is defined over.
+        """
+        self._refill(now)
+        if limit:
+            self.capacity = limit
+        if remaining is not None:
+            self.level = min(remaining, self.capacity)
+        if limit and remaining is not None and reset and limit > remaining:
+            self.rate = (limit - remaining) / reset
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+class _Waiter:
+    __slots__ = ("future", "tokens")
+
+    def __init__(self, future: asyncio.Future, tokens: int):
+        self.future = future
+        self.tokens = tokens
+
+class ProviderLimiter:
+    """Client-side rate limiting and retries for one provider API key
+
+    Calls take a request, and optionally an estimate of tokens, from token
+    buckets that start at the configured per-minute limits and then follow
+    the provider's rate-limit headers. When the buckets are empty, callers
+    queue per session and are served round-robin, so one busy session
+    cannot starve the others. Failed calls that are worth retrying are
+    retried with jittered exponential backoff, or after the provider's
+    Retry-After, as long as the turn's deadline allows.
+    """
+
+    def __init__(self,
+                name: str,
+                requests_per_minute: float = 60,
+                tokens_per_minute: Optional[float] = None,
+                max_retries: int = 3,
+                base_backoff: float = 0.25,
+                max_backoff: float = 8.0,
+                default_budget: float = 15.0):
+        """Initialize the limiter
+
+        Args:
+            name: Name used in logs and stats
+            requests_per_minute: Initial request allowance
+            tokens_per_minute: Initial token allowance, or None to not meter tokens
+            max_retries: Retries per call after the first attempt
+            base_backoff: Upper bound of the first jittered backoff, doubled per retry
+            max_backoff: Cap on any single backoff
+            default_budget: Seconds a call may take when no turn deadline is set
+        """
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.default_budget = default_budget
+        self._queues: "OrderedDict[Optional[str], Deque[_Waiter]]" = OrderedDict()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._blocked_until = 0.0
+        self._calls = 0
+        self._retries = 0
+        self._rejected = 0
+        self._queued_seconds = 0.0
+
+    async def call(self, fn: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Make a provider call under the limits, retrying within the turn's budget
+
+        Args:
+            fn: Makes one attempt; called again for each retry
+            tokens: Estimated tokens the call will use
+        """
+        context = current_call.get()
+        session_id = context.session_id if context else None
+        deadline = context.deadline if context and context.deadline else time.monotonic() + self.default_budget
+
+        attempt = 0
+        while True:
+            await self.acquire(session_id, tokens, deadline)
+            try:
+                return await fn()
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                headers = _error_headers(e)
+                if headers:
+                    self.observe_headers(headers)
+
+                retryable = status in RETRYABLE_STATUS or type(e).__name__ in RETRYABLE_ERRORS
+                if not retryable or attempt >= self.max_retries:
+                    raise
+
+                delay = _retry_after(headers) if headers else None
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+                if status == 429:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                if time.monotonic() + delay >= deadline:
+                    raise RateLimitExceeded(f"{self.name}: out of turn budget after {attempt + 1} attempts") from e
+
+                attempt += 1
+                self._retries += 1
+                logger.warning(f"{self.name} call failed ({status or type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def stream(self, open_stream: Callable[[], Any], tokens: int = 0) -> AsyncIterator[Any]:
+        """Make a streaming provider call, retrying until its first item arrives
+
+        open_stream returns an async iterator, or an awaitable of one, for a
+        new attempt. Errors after the first item are raised to the caller,
+        since part of the response has already been passed on.
+        """
+        async def first_item():
+            stream = open_stream()
+            if inspect.isawaitable(stream):
+                stream = await stream
+            stream = stream.__aiter__()
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await _close(stream)
+                raise
+
+        stream, first = await self.call(first_item, tokens=tokens)
+        try:
+            if first is None:
+                return
+            yield first
+            async for item in stream:
+                yield item
+        finally:
+            await _close(stream)
+
+    async def acquire(self, session_id: Optional[str], tokens: int, deadline: float):
+        """Wait for this session's turn to make a request, up to the deadline"""
+        if not self._queues and self._wait_time(tokens) == 0:
+            self._take(tokens)
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens)
+        self._queues.setdefault(session_id, deque()).append(waiter)
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter.future, max(0.0, deadline - queued_at))
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise RateLimitExceeded(f"{self.name}: no capacity within the turn budget") from None
+        finally:
+            self._queued_seconds += time.monotonic() - queued_at
+
+    def observe_headers(self, headers: Mapping[str, str]):
+        """Adapt the buckets to the provider's x-ratelimit-* and retry-after headers"""
+        headers = {key.lower(): value for key, value in headers.items()}
+        now = time.monotonic()
+
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            if bucket is None:
+                continue
+            limit = _number(headers.get(f"x-ratelimit-limit-{kind}"))
+            remaining = _number(headers.get(f"x-ratelimit-remaining-{kind}"))
+            reset = _duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if limit is not None or remaining is not None:
+                bucket.update(limit, remaining, reset, now)
+
+        retry_after = _retry_after(headers)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current allowances and queueing figures"""
+        now = time.monotonic()
+        self.requests._refill(now)
+        figures = {
+            "requests_per_minute": round(self.requests.rate * 60, 1),
+            "requests_available": round(self.requests.level, 1),
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "calls": self._calls,
+            "retries": self._retries,
+            "rejected": self._rejected,
+            "queued_seconds": round(self._queued_seconds, 3),
+            "blocked_for": round(max(0.0, self._blocked_until - now), 3),
+        }
+        if self.tokens is not None:
+            self.tokens._refill(now)
+            figures["tokens_per_minute"] = round(self.tokens.rate * 60)
+            figures["tokens_available"] = round(self.tokens.level)
+        return figures
+
+    async def _dispatch(self):
+        """Grant queued requests round-robin across sessions as capacity frees up"""
+        try:
+            while self._queues:
+                session_id, queue = next(iter(self._queues.items()))
+                while queue and queue[0].future.done():
+                    queue.popleft()
+                if not queue:
+                    del self._queues[session_id]
+                    continue
+
+                waiter = queue[0]
+                wait = self._wait_time(waiter.tokens)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+
+                queue.popleft()
+                self._take(waiter.tokens)
+                waiter.future.set_result(None)
+                if queue:
+                    self._queues.move_to_end(session_id)
+                else:
+                    del self._queues[session_id]
+        finally:
+            self._dispatcher = None
+
+    def _wait_time(self, tokens: int) -> float:
+        now = time.monotonic()
+        wait = max(self._blocked_until - now, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return max(0.0, wait)
+
+    def _take(self, tokens: int):
+        now = time.monotonic()
+        self._calls += 1
+        self.requests.take(1, now)
+        if self.tokens is not None and tokens:
+            self.tokens.take(tokens, now)
+
+# One limiter per provider and API key, shared by every component using that key
+_limiters: Dict[Tuple[str, str], ProviderLimiter] = {}
+
+def limiter_for(provider: str, api_key: Optional[str], **settings) -> ProviderLimiter:
+    """Return the shared limiter for a provider API key, creating it with settings on first use"""
+    digest = hashlib.sha256((api_key or "").encode()).hexdigest()[:8]
+    key = (provider, digest)
+    if key not in _limiters:
+        _limiters[key] = ProviderLimiter(f"{provider}:{digest}", **settings)
+    return _limiters[key]
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Figures for every provider limiter in the process"""
+    return {limiter.name: limiter.stats() for limiter in _limiters.values()}
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Rough token cost of a chat completion: prompt characters / 4 plus the completion cap"""
+    return sum(len(message.get("content") or "") for message in messages) // 4 + max_tokens
+
+async def parse_response(raw: Any) -> Any:
+    """Parse an SDK raw response, whose parse() is sync in some SDKs and async in others"""
+    parsed = raw.parse()
+    if inspect.isawaitable(parsed):
+        parsed = await parsed
+    return parsed
+
+async def _close(stream: AsyncIterator[Any]):
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+def _error_headers(error: Exception) -> Optional[Mapping[str, str]]:
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    return headers
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    headers = {key.lower(): value for key, value in headers.items()}
+    if "retry-after-ms" in headers:
+        milliseconds = _number(headers["retry-after-ms"])
+        return milliseconds / 1000 if milliseconds is not None else None
+    return _number(headers.get("retry-after"))
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def _duration(value: Optional[str]) -> Optional[float]:
+    """Parse reset durations such as "1s", "6m0s", "20ms" or plain seconds"""
+    if value is None:
+        return None
+    seconds = _number(value)
+    if seconds is not None:
+        return seconds
+
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    return sum(float(amount) * units[unit] for amount, unit in parts) if parts else None
@@ -1,7 +1,12 @@
+import io
 import os
 import tempfile
 import uuid
+import wave
 import logging
+from typing import Tuple
+
+import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,4 +32,49 @@ def cleanup_temp_file(filepath: str) -> bool:
     except Exception as e:
         logger.error(f"Failed to remove temporary file {filepath}: {e}")
         return False
-    return False
\ No newline at end of file
+    return False
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """Decode PCM WAV bytes into mono float32 samples in [-1, 1] and the sample rate"""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        frames = wav.readframes(wav.getnframes())
+    
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width} bytes")
+    
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    
+    return samples, sample_rate
+
+def decode_pcm16(data: bytes) -> np.ndarray:
+    """Decode raw little-endian 16-bit mono PCM into float32 samples in [-1, 1]"""
+    return np.frombuffer(data, dtype="<i2", count=len(data) // 2).astype(np.float32) / 32768.0
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Encode mono float samples in [-1, 1] as 16-bit PCM WAV bytes"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+def frame_rms(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """Return the RMS energy of consecutive non-overlapping frames"""
+    n_frames = len(samples) // frame_size
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:n_frames * frame_size].reshape(n_frames, frame_size)
+    return np.sqrt(np.mean(frames * frames, axis=1))
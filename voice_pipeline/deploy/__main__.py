@@ -0,0 +1,30 @@
+"""Run the assistant as a sharded multi-process deployment
+
+Usage:
+    python -m voice_pipeline.deploy --workers 4 --port 8000
+"""
+import argparse
+import logging
+import os
+
+from voice_pipeline.deploy.supervisor import Supervisor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--app", default="server:app", help="Import string of the worker app")
+    parser.add_argument("--runtime-dir", default=os.getenv("RUNTIME_DIR", "/tmp/voice-pipeline"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Supervisor(
+        app=args.app,
+        workers=args.workers,
+        runtime_dir=args.runtime_dir,
+        admin_token=os.getenv("ADMIN_TOKEN")
+    ).run(host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+import msgpack
+import websockets
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+from voice_pipeline.api.protocol import EVENT, SUBPROTOCOL, encode_frame
+
+logger = logging.getLogger(__name__)
+
+# Close code a worker uses when it is draining and the session should move
+CLOSE_SERVICE_RESTART = 1012
+CLOSE_TRY_AGAIN_LATER = 1013
+
+class Worker:
+    """A worker process serving the assistant app on a Unix socket"""
+
+    def __init__(self, worker_id: str, socket_path: str):
+        self.worker_id = worker_id
+        self.socket_path = socket_path
+        self.draining = False
+        self.alive = True
+
+    @property
+    def available(self) -> bool:
+        return self.alive and not self.draining
+
+class SessionRouter:
+    """Pins sessions to workers by rendezvous hashing of the session ID
+
+    Every session has a stable preference order over workers, so a
+    reconnecting client lands on the same worker, and draining a worker
+    only moves the sessions that were pinned to it.
+    """
+
+    def __init__(self, workers: List[Worker]):
+        self.workers = {worker.worker_id: worker for worker in workers}
+
+    def rank(self, session_id: str) -> List[Worker]:
+        """Available workers in the session's order of preference"""
+        def score(worker: Worker) -> bytes:
+            return hashlib.blake2b(f"{session_id}/{worker.worker_id}".encode(), digest_size=8).digest()
+
+        return sorted((w for w in self.workers.values() if w.available), key=score, reverse=True)
+
+class _Carry:
+    """A client message taken off the queue but not yet delivered upstream"""
+    __slots__ = ("message",)
+
+    def __init__(self):
+        self.message: Optional[Dict[str, Any]] = None
+
+async def _read_client(websocket: WebSocket, inbound: asyncio.Queue):
+    """Queue client frames until the client disconnects"""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            await inbound.put(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await inbound.put(None)
+
+async def _forward_to_worker(inbound: asyncio.Queue, carry: _Carry, upstream):
+    """Send queued client frames to the worker, closing it when the client leaves"""
+    while True:
+        if carry.message is None:
+            carry.message = await inbound.get()
+            if carry.message is None:
+                await upstream.close()
+                return
+
+        message = carry.message
+        await upstream.send(message["bytes"] if message.get("bytes") is not None else message["text"])
+        carry.message = None
+
+def create_front_app(router: SessionRouter, admin_token: Optional[str] = None) -> FastAPI:
+    """Create the front app that accepts websockets and proxies them to workers"""
+    app = FastAPI(title="Voice Assistant Front")
+
+    def check_admin(request: Request):
+        if not admin_token:
+            raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+        if not hmac.compare_digest(request.headers.get("x-admin-token", ""), admin_token):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    def get_worker(worker_id: str) -> Worker:
+        worker = router.workers.get(worker_id)
+        if worker is None:
+            raise HTTPException(status_code=404, detail=f"Unknown worker: {worker_id}")
+        return worker
+
+    @app.websocket("/ws/assistant")
+    async def proxy_assistant(websocket: WebSocket):
+        """Proxy a client session to its pinned worker, migrating it if the worker drains"""
+        # Assign the session ID here so the worker choice is stable from the first connect
+        session_id = websocket.query_params.get("session_id") or str(uuid.uuid4())
+        subprotocol = SUBPROTOCOL if SUBPROTOCOL in websocket.scope.get("subprotocols", []) else None
+        await websocket.accept(subprotocol=subprotocol)
+
+        inbound: asyncio.Queue = asyncio.Queue(maxsize=64)
+        carry = _Carry()
+        reader = asyncio.create_task(_read_client(websocket, inbound))
+
+        try:
+            while not reader.done() or not inbound.empty():
+                upstream = await _connect_upstream(router, session_id, subprotocol)
+                if upstream is None:
+                    error = {"type": "error", "message": "No workers available", "retry_after": 5}
+                    if subprotocol:
+                        await websocket.send_bytes(encode_frame(EVENT, msgpack.packb(error)))
+                    else:
+                        await websocket.send_json(error)
+                    await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+                    return
+
+                forward = asyncio.create_task(_forward_to_worker(inbound, carry, upstream))
+                try:
+                    async for message in upstream:
+                        if isinstance(message, bytes):
+                            await websocket.send_bytes(message)
+                        else:
+                            await websocket.send_text(message)
+                except websockets.ConnectionClosed:
+                    pass
+                finally:
+                    forward.cancel()
+                    await upstream.close()
+
+                if upstream.close_code != CLOSE_SERVICE_RESTART:
+                    break
+                logger.info(f"Worker draining, migrating session {session_id}")
+
+            await websocket.close()
+        except Exception as e:
+            logger.error(f"Proxy error for session {session_id}: {str(e)}")
+            try:
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+        finally:
+            reader.cancel()
+
+    @app.get("/load")
+    async def load():
+        """Aggregate load figures across workers"""
+        workers = {}
+        for worker in router.workers.values():
+            figures: Dict[str, Any] = {"draining": worker.draining, "alive": worker.alive}
+            try:
+                async with _worker_client(worker) as client:
+                    figures.update((await client.get("/load")).json())
+            except Exception as e:
+                figures["error"] = str(e)
+            workers[worker.worker_id] = figures
+
+        return {
+            "accepting": any(w.available for w in router.workers.values()),
+            "sessions": sum(w.get("sessions", 0) for w in workers.values()),
+            "inflight_turns": sum(w.get("inflight_turns", 0) for w in workers.values()),
+            "workers": workers,
+        }
+
+    @app.get("/health")
+    async def health():
+        """Report 503 when no worker can take new sessions"""
+        if not any(w.available for w in router.workers.values()):
+            return JSONResponse({"status": "unavailable"}, status_code=503)
+        return {"status": "ok"}
+
+    @app.post("/admin/workers/{worker_id}/drain")
+    async def drain_worker(worker_id: str, request: Request):
+        """Stop routing to a worker and move its sessions to the others"""
+        check_admin(request)
+        worker = get_worker(worker_id)
+
+        worker.draining = True
+        async with _worker_client(worker) as client:
+            response = await client.post("/admin/drain", headers={"x-admin-token": admin_token})
+        return {"worker": worker_id, "draining": True, "worker_response": response.json()}
+
+    @app.post("/admin/workers/{worker_id}/undrain")
+    async def undrain_worker(worker_id: str, request: Request):
+        """Route sessions to a drained worker again
+
+        A drained worker that has since exited is restarted by the
+        supervisor once it is no longer marked draining.
+        """
+        check_admin(request)
+        worker = get_worker(worker_id)
+
+        worker_response = None
+        try:
+            async with _worker_client(worker) as client:
+                response = await client.post("/admin/undrain", headers={"x-admin-token": admin_token})
+            worker_response = response.json()
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not reach {worker_id} to undrain it: {str(e)}")
+        worker.draining = False
+        return {"worker": worker_id, "draining": False, "worker_response": worker_response}
+
+    return app
+
+async def _connect_upstream(router: SessionRouter, session_id: str, subprotocol: Optional[str] = None):
+    """Open a websocket to the first worker in the session's preference order that accepts"""
+    for worker in router.rank(session_id):
+        try:
+            return await websockets.unix_connect(
+                worker.socket_path,
+                f"ws://localhost/ws/assistant?session_id={session_id}",
+                subprotocols=[subprotocol] if subprotocol else None,
+                max_size=None
+            )
+        except Exception as e:
+            logger.warning(f"Worker {worker.worker_id} refused session {session_id}: {str(e)}")
+    return None
+
+def _worker_client(worker: Worker) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(uds=worker.socket_path),
+        base_url="http://worker",
+        timeout=5.0
+    )
@@ -0,0 +1,23 @@
+import asyncio
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+# Frame layout: header length and body length, then a JSON header and a raw body
+FRAME = struct.Struct("<II")
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes]:
+    """Read one frame, raising asyncio.IncompleteReadError at end of stream"""
+    header_len, body_len = FRAME.unpack(await reader.readexactly(FRAME.size))
+    header = json.loads(await reader.readexactly(header_len))
+    body = await reader.readexactly(body_len) if body_len else b""
+    return header, body
+
+async def write_frame(writer: asyncio.StreamWriter, header: Dict[str, Any], body: bytes = b""):
+    """Write one frame and wait for the transport to drain"""
+    encoded = json.dumps(header).encode()
+    writer.write(FRAME.pack(len(encoded), len(body)))
+    writer.write(encoded)
+    if body:
+        writer.write(body)
+    await writer.drain()
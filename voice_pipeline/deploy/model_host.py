@@ -0,0 +1,103 @@
+"""Shared STT model host serving transcription requests over a Unix socket
+
+Usage:
+    python -m voice_pipeline.deploy.model_host --socket /tmp/voice-pipeline/stt.sock
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from voice_pipeline.components.stt.profiles import ProfileController, load_tuning
+from voice_pipeline.components.stt.whisper import FasterWhisperSTT
+from voice_pipeline.core.models import AudioData
+from voice_pipeline.deploy.ipc import read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+class ModelHost:
+    """Serves one loaded STT model to every worker process on the box"""
+
+    def __init__(self, stt: FasterWhisperSTT, socket_path: str):
+        self.stt = stt
+        self.socket_path = socket_path
+
+    async def serve(self):
+        """Listen on the socket until cancelled"""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        logger.info(f"STT model host listening on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests from one worker connection in order"""
+        try:
+            while True:
+                try:
+                    header, body = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                if header.get("op") == "transcribe":
+                    audio = AudioData(
+                        data=body,
+                        format=header.get("format", "wav"),
+                        sample_rate=header.get("sample_rate", 16000),
+                        channels=header.get("channels", 1)
+                    )
+                    result = await self.stt.transcribe(
+                        audio, language=header.get("language"), segments=header.get("segments", True)
+                    )
+                    response = result.to_dict()
+                else:
+                    response = {"text": "", "error": f"Unknown operation: {header.get('op')}"}
+
+                response["stats"] = self.stt.stats()
+                await write_frame(writer, response)
+        except Exception as e:
+            logger.error(f"Model host connection failed: {str(e)}")
+        finally:
+            writer.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    # Settings from python -m voice_pipeline.tune become the defaults
+    tuning = load_tuning(os.getenv("STT_TUNING_FILE", "stt_tuning.json"))
+    default_profiles = tuning.register() if tuning else ["accurate", "balanced", "fast"]
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", required=True, help="Unix socket path to listen on")
+    parser.add_argument("--model-size", default=os.getenv("STT_MODEL_SIZE", tuning.model_size if tuning else "large"))
+    parser.add_argument("--compute-type", default=tuning.compute_type if tuning else "int8")
+    parser.add_argument("--beam-size", type=int, default=tuning.beam_size if tuning else 5)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("STT_WORKERS", tuning.num_workers if tuning else 1)),
+                        help="Number of concurrent decodes")
+    parser.add_argument("--cpu-threads", type=int,
+                        default=int(os.getenv("STT_CPU_THREADS", tuning.cpu_threads if tuning else 0)))
+    parser.add_argument("--profiles", default=os.getenv("STT_PROFILES", ",".join(default_profiles)),
+                        help="Comma-separated decode profiles, empty to disable adaptation")
+    args = parser.parse_args()
+
+    profiles = [name for name in args.profiles.split(",") if name]
+    controller = ProfileController(
+        profiles=profiles,
+        max_queue_wait=float(os.getenv("STT_MAX_QUEUE_WAIT", 1.0)),
+        max_rtf=float(os.getenv("STT_MAX_RTF", 0.5))
+    ) if profiles else None
+
+    stt = FasterWhisperSTT(
+        model_size=args.model_size,
+        compute_type=args.compute_type,
+        beam_size=args.beam_size,
+        controller=controller,
+        num_workers=args.workers,
+        cpu_threads=args.cpu_threads
+    )
+    asyncio.run(ModelHost(stt, args.socket).serve())
+
+if __name__ == "__main__":
+    main()
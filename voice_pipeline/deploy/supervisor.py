@@ -0,0 +1,153 @@
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+from voice_pipeline.deploy.front import SessionRouter, Worker, create_front_app
+
+logger = logging.getLogger(__name__)
+
+class Supervisor:
+    """Runs a sharded deployment: one STT model host, N workers and a front
+
+    The model host loads Whisper once and serves it over a Unix socket.
+    Workers run the assistant app on their own Unix sockets with STT pointed
+    at the host, and share the on-disk session store. The front accepts
+    client websockets and pins each session to a worker. The model host and
+    workers that exit unexpectedly are restarted.
+    """
+
+    def __init__(self,
+                app: str = "server:app",
+                workers: int = 2,
+                runtime_dir: str = "/tmp/voice-pipeline",
+                admin_token: Optional[str] = None):
+        """Initialize the supervisor
+
+        Args:
+            app: Import string of the worker ASGI app
+            workers: Number of worker processes
+            runtime_dir: Directory for Unix sockets
+            admin_token: Token required by admin endpoints
+        """
+        self.app = app
+        self.runtime_dir = runtime_dir
+        self.admin_token = admin_token
+        self.model_socket = os.path.join(runtime_dir, "stt.sock")
+        self.router = SessionRouter([
+            Worker(f"worker-{i}", os.path.join(runtime_dir, f"worker-{i}.sock"))
+            for i in range(workers)
+        ])
+        self._model_host: Optional[subprocess.Popen] = None
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._stopping = threading.Event()
+
+    def run(self, host: str = "0.0.0.0", port: int = 8000):
+        """Start every process and serve the front until interrupted"""
+        self.start()
+        try:
+            front = create_front_app(self.router, admin_token=self.admin_token)
+            uvicorn.run(front, host=host, port=port, log_level="info")
+        finally:
+            self.stop()
+
+    def start(self):
+        """Start the model host and the workers, waiting for their sockets"""
+        os.makedirs(self.runtime_dir, exist_ok=True)
+
+        # Model loading dominates startup; wait for it before starting workers
+        self._start_model_host()
+        self._wait_for_socket(self.model_socket, self._model_host, timeout=600)
+
+        for worker in self.router.workers.values():
+            self._start_worker(worker)
+        for worker in self.router.workers.values():
+            self._wait_for_socket(worker.socket_path, self._processes[worker.worker_id], timeout=60)
+
+        threading.Thread(target=self._monitor, name="supervisor", daemon=True).start()
+
+    def stop(self):
+        """Terminate all child processes"""
+        self._stopping.set()
+        processes: List[subprocess.Popen] = list(self._processes.values())
+        if self._model_host:
+            processes.append(self._model_host)
+
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _start_model_host(self):
+        self._model_host = self._spawn(
+            [sys.executable, "-m", "voice_pipeline.deploy.model_host", "--socket", self.model_socket],
+            self.model_socket
+        )
+
+    def _start_worker(self, worker: Worker):
+        env = {
+            **os.environ,
+            "STT_HOST_SOCKET": self.model_socket,
+            "WORKER_ID": worker.worker_id,
+        }
+        self._processes[worker.worker_id] = self._spawn(
+            [sys.executable, "-m", "uvicorn", self.app, "--uds", worker.socket_path, "--log-level", "info"],
+            worker.socket_path,
+            env
+        )
+        worker.alive = True
+
+    def _spawn(self, command: List[str], socket_path: str, env: Optional[dict] = None) -> subprocess.Popen:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        logger.info(f"Starting: {' '.join(command)}")
+        return subprocess.Popen(command, env=env)
+
+    def _wait_for_socket(self, path: str, process: subprocess.Popen, timeout: float):
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(path):
+            if process.poll() is not None:
+                raise RuntimeError(f"Process exited before creating {path}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Timed out waiting for {path}")
+            time.sleep(0.2)
+
+    def _monitor(self):
+        """Restart the model host if it exits, and workers that exit unless they are draining
+
+        A drained worker that exited is restarted once the front undrains it.
+        """
+        while not self._stopping.wait(2.0):
+            # Workers cannot transcribe without the host; they reconnect once its socket is back
+            if self._model_host.poll() is not None:
+                logger.warning(f"Model host exited with {self._model_host.returncode}, restarting")
+                self._start_model_host()
+                try:
+                    self._wait_for_socket(self.model_socket, self._model_host, timeout=600)
+                except RuntimeError as e:
+                    logger.error(str(e))
+
+            for worker in self.router.workers.values():
+                process = self._processes[worker.worker_id]
+                if process.poll() is None:
+                    continue
+
+                worker.alive = False
+                if worker.draining:
+                    continue
+
+                logger.warning(f"{worker.worker_id} exited with {process.returncode}, restarting")
+                self._start_worker(worker)
+                try:
+                    self._wait_for_socket(worker.socket_path, self._processes[worker.worker_id], timeout=60)
+                except RuntimeError as e:
+                    logger.error(str(e))
+                    worker.alive = False
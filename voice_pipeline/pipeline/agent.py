@@ -1,11 +1,21 @@
+import asyncio
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable
 
 from voice_pipeline.core.interfaces import (
     VADInterface, STTInterface, LLMInterface, TTSInterface, TurnDetectorInterface
 )
-from voice_pipeline.core.models import AudioData, ConversationContext
+from voice_pipeline.core.models import (
+    AudioData, ConversationContext, LLMResponse, OutputPlan, SynthesisOptions, TranscriptionResult, TTSResult,
+    TurnResult
+)
+from voice_pipeline.core.ratelimit import ProviderCall, current_call
 from voice_pipeline.components.turn_detector.eou import EOUTurnDetector
+from voice_pipeline.components.stt.language import LanguagePrior
+from voice_pipeline.components.stt.longform import merge_transcriptions
+from voice_pipeline.pipeline.coalesce import coalesce_deltas
+from voice_pipeline.pipeline.filler import FillerCache
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +30,38 @@ class VoicePipelineAgent:
                 turn_detector: TurnDetectorInterface = None,
                 min_endpointing_delay: float = 0.5,
                 max_endpointing_delay: float = 5.0,
-                chat_ctx: ConversationContext = None):
-        """Initialize the voice pipeline agent with components"""
+                chat_ctx: ConversationContext = None,
+                tts_options: SynthesisOptions = None,
+                filler: FillerCache = None,
+                filler_threshold: float = 0.8,
+                on_event: Callable[[str, Dict[str, Any]], Awaitable[None]] = None,
+                delta_interval: float = 0.05,
+                delta_max_chars: int = 64,
+                session_id: Optional[str] = None,
+                turn_budget: float = 10.0,
+                transcript_segments: bool = True,
+                stream_audio: bool = False):
+        """Initialize the voice pipeline agent with components
+        
+        With an on_event callback, each spoken turn's transcript is emitted as
+        a "transcription" event as soon as STT and turn detection are done,
+        ahead of the response. The LLM response is streamed and emitted
+        as "text_delta" events, batched by delta_interval and delta_max_chars.
+        If a filler cache is also given, a cached acknowledgement clip is
+        emitted as a "filler" event whenever no response text has arrived
+        within filler_threshold seconds.
+        
+        Provider calls made while responding are queued fairly by session_id
+        and retried only while they can finish within turn_budget seconds.
+        
+        Pass transcript_segments=False when only transcript text is used, so
+        the STT can skip building segment and word timings.
+        
+        With stream_audio and an on_event callback, each synthesized chunk is
+        emitted as an "audio" event as soon as it arrives, followed by an
+        empty final one; the joined clip is still returned in the result,
+        which has audio_streamed set so it is not sent again.
+        """
         self.vad = vad
         self.stt = stt
         self.llm = llm
@@ -30,78 +70,320 @@ class VoicePipelineAgent:
         self.min_endpointing_delay = min_endpointing_delay
         self.max_endpointing_delay = max_endpointing_delay
         self.chat_ctx = chat_ctx or ConversationContext()
+        self.tts_options = tts_options or SynthesisOptions()
+        self.filler = filler
+        self.filler_threshold = filler_threshold
+        self.on_event = on_event
+        self.delta_interval = delta_interval
+        self.delta_max_chars = delta_max_chars
+        self.session_id = session_id
+        self.turn_budget = turn_budget
+        self.transcript_segments = transcript_segments
+        self.stream_audio = stream_audio
+        
+        # Sticky STT language for this session, kept across reconnects
+        self.language_prior = LanguagePrior(language=self.chat_ctx.metadata.get("language"))
+        
+        # Speech from an unfinished turn, waiting for the user to continue
+        self._pending_text = ""
+        self._pending_language: Optional[str] = None
+        self._pending_plan = OutputPlan.BOTH
+    
+    @property
+    def has_pending_turn(self) -> bool:
+        """Whether transcribed speech is waiting for the end of the user's turn"""
+        return bool(self._pending_text)
+    
+    async def process_audio(self, audio_data: AudioData, plan: OutputPlan = OutputPlan.BOTH) -> TurnResult:
+        """Process audio end-to-end: from speech to response audio
+        
+        If the turn detector judges the user is still mid-turn, the transcript
+        is held back and the result has turn_complete set to False, along with
+        the endpointing_delay to wait for more audio before calling
+        complete_pending_turn.
+        
+        The plan says which outputs the caller needs; with
+        OutputPlan.TRANSCRIPT the turn ends after STT and never enters the
+        conversation.
+        """
+        result = TurnResult()
         
-    async def process_audio(self, audio_data: AudioData) -> Dict[str, Any]:
-        """Process audio end-to-end: from speech to response audio"""
-        result = {
-            "success": False,
-            "transcription": None,
-            "llm_response": None,
-            "audio_response": None,
-        }
+        # Step 1: Transcribe audio, skipping language detection once the session language is known
+        language_hint = self.language_prior.hint()
+        started = time.perf_counter()
+        transcription = await self._transcribe(audio_data, language_hint)
+        result.timings["stt"] = time.perf_counter() - started
+        result.transcription = transcription
         
-        # Step 1: Transcribe audio
-        transcription = await self.stt.transcribe(audio_data)
-        result["transcription"] = transcription
+        self.language_prior.observe(transcription, language_hint)
+        if self.language_prior.language:
+            self.chat_ctx.metadata["language"] = self.language_prior.language
         
-        if not transcription.text:
+        if not plan.responds:
+            result.success = not transcription.error
+            await self._emit_transcription(transcription, True)
+            return result
+        
+        if not transcription.text and not self._pending_text:
             logger.info("No speech detected or transcription failed")
+            await self._emit_transcription(transcription, True)
+            return result
+        
+        # Step 2: Decide whether the user has finished their turn
+        user_text = " ".join(t for t in (self._pending_text, transcription.text) if t)
+        language = transcription.language or self._pending_language
+        
+        started = time.perf_counter()
+        delay = await self.turn_detector.endpointing_delay(
+            audio_data,
+            user_text,
+            min_delay=self.min_endpointing_delay,
+            max_delay=self.max_endpointing_delay
+        )
+        result.timings["turn_detection"] = time.perf_counter() - started
+        
+        if delay > 0:
+            logger.info(f"Turn incomplete, waiting up to {delay:.2f}s for more speech")
+            self._pending_text = user_text
+            self._pending_language = language
+            self._pending_plan = plan
+            result.turn_complete = False
+            result.endpointing_delay = delay
+            await self._emit_transcription(transcription, False)
+            return result
+        
+        self._clear_pending()
+        await self._emit_transcription(transcription, True)
+        return await self._respond(user_text, language, result, plan)
+    
+    async def complete_pending_turn(self) -> TurnResult:
+        """Respond to held-back speech once the endpointing delay has elapsed"""
+        result = TurnResult()
+        
+        if not self._pending_text:
             return result
         
-        # Step 2: Process with LLM
-        logger.info(f"Adding user message to context: {transcription.text}")
-        self.chat_ctx.add_message("user", transcription.text)
+        user_text, language, plan = self._pending_text, self._pending_language, self._pending_plan
+        self._clear_pending()
+        return await self._respond(user_text, language, result, plan)
+    
+    async def process_text(self, text: str, plan: OutputPlan = OutputPlan.BOTH) -> TurnResult:
+        """Process text input (without audio)
+        
+        With OutputPlan.TEXT no audio is synthesized, filler included.
+        """
+        result = TurnResult()
+        if not plan.responds:
+            result.success = True
+            return result
+        
+        # Typed input ends any spoken turn still in progress
+        if self._pending_text:
+            text = f"{self._pending_text} {text}"
+            self._clear_pending()
         
-        llm_response = await self.llm.generate_response(self.chat_ctx)
-        result["llm_response"] = llm_response
+        return await self._respond(text, None, result, plan)
+    
+    async def _respond(self,
+                      user_text: str,
+                      language: Optional[str],
+                      result: TurnResult,
+                      plan: OutputPlan) -> TurnResult:
+        """Run the LLM and, if the plan needs audio, TTS stages for a completed user turn"""
+        call = current_call.set(ProviderCall(self.session_id, time.monotonic() + self.turn_budget))
+        try:
+            return await self._run_response(user_text, language, result, plan)
+        finally:
+            current_call.reset(call)
+    
+    async def _run_response(self,
+                            user_text: str,
+                            language: Optional[str],
+                            result: TurnResult,
+                            plan: OutputPlan) -> TurnResult:
+        result.language = language
         
-        # Add assistant response to context
+        # Speak in the detected language unless the session pinned one
+        options = self.tts_options
+        if not options.language and language:
+            options = options.model_copy(update={"language": language})
+        
+        # Process with LLM
+        logger.info(f"Adding user message to context: {user_text}")
+        self.chat_ctx.add_message("user", user_text)
+        
+        started = time.perf_counter()
+        first_text = asyncio.Event()
+        llm_task = asyncio.ensure_future(self._generate(first_text, result, plan.shows_text))
+        try:
+            if plan.speaks:
+                await self._send_filler_if_slow(llm_task, first_text, options, result)
+            llm_response = await llm_task
+        finally:
+            llm_task.cancel()
+        result.timings["llm"] = time.perf_counter() - started
+        result.llm_response = llm_response
+        
+        # Add assistant response to context; the filler never enters it
         self.chat_ctx.add_message("assistant", llm_response.text)
         
-        # Step 3: Convert to speech
+        if not plan.speaks:
+            result.success = True
+            return result
+        
+        # Convert to speech, sending each chunk on as it arrives if streaming
+        started = time.perf_counter()
+        stream = self.stream_audio and self.on_event is not None
+        audio_chunks = []
         try:
-            tts_result = await self.tts.synthesize(llm_response.text)
-            result["audio_response"] = tts_result
-            result["success"] = True
+            async for chunk in self.tts.synthesize_stream(llm_response.text, options):
+                if not audio_chunks:
+                    result.timings["tts_first_audio"] = time.perf_counter() - started
+                audio_chunks.append(chunk)
+                if stream:
+                    await self._emit_audio(chunk, options, final=False)
+            result.success = True
         except Exception as e:
             logger.error(f"TTS failed: {str(e)}")
-            result["success"] = False
+            result.success = False
+        result.timings["tts"] = time.perf_counter() - started
+        
+        # The joined clip is kept for the recorder and history either way
+        result.audio_response = TTSResult(
+            audio=b"".join(audio_chunks),
+            format=options.format,
+            sample_rate=options.sample_rate
+        ) if result.success else None
+        if stream and audio_chunks:
+            await self._emit_audio(b"", options, final=True)
+            result.audio_streamed = True
         
         return result
     
-    async def process_text(self, text: str) -> Dict[str, Any]:
-        """Process text input (without audio)"""
-        result = {
-            "success": False,
-            "llm_response": None,
-            "audio_response": None,
-        }
+    async def _transcribe(self, audio_data: AudioData, language: Optional[str]) -> TranscriptionResult:
+        """Transcribe, emitting "transcript_segments" events when the STT streams partial results"""
+        if self.on_event is None:
+            return await self.stt.transcribe(audio_data, language=language, segments=self.transcript_segments)
         
-        # Add user message to context
-        self.chat_ctx.add_message("user", text)
+        # A single part is the whole transcription, so only emit once there is a second one
+        parts = []
+        stream = self.stt.transcribe_stream(audio_data, language=language, segments=self.transcript_segments)
+        async for part in stream:
+            parts.append(part)
+            if len(parts) == 2:
+                await self._emit_segments(parts[0])
+            if len(parts) >= 2:
+                await self._emit_segments(part)
         
-        # Get LLM response
-        llm_response = await self.llm.generate_response(self.chat_ctx)
-        result["llm_response"] = llm_response
+        return parts[0] if len(parts) == 1 else merge_transcriptions(parts)
+    
+    async def _emit_transcription(self, transcription: TranscriptionResult, turn_complete: bool):
+        if self.on_event is None:
+            return
+        await self._emit("transcription", {
+            "text": transcription.text,
+            "language": transcription.language,
+            "turn_complete": turn_complete
+        })
+    
+    async def _emit_segments(self, part: TranscriptionResult):
+        await self._emit("transcript_segments", {
+            "text": part.text,
+            "segments": part.segments.to_list(),
+            "language": part.language
+        })
+    
+    async def _emit_audio(self, chunk: bytes, options: SynthesisOptions, final: bool):
+        audio = TTSResult(audio=chunk, format=options.format, sample_rate=options.sample_rate)
+        await self._emit("audio", {"audio": audio, "final": final})
+    
+    async def _emit(self, kind: str, event: Dict[str, Any]):
+        try:
+            await self.on_event(kind, event)
+        except Exception as e:
+            logger.warning(f"Failed to send {kind} event: {str(e)}")
+    
+    async def _generate(self, first_text: asyncio.Event, result: TurnResult, emit: bool = True) -> LLMResponse:
+        """Run the LLM, streaming text_delta events when there is someone to send them to
         
-        # Add assistant response to context
-        self.chat_ctx.add_message("assistant", llm_response.text)
+        With emit=False the response is still streamed, so the filler check
+        sees the first text, but no deltas are sent.
+        """
+        started = time.perf_counter()
+        if self.on_event is None:
+            response = await self.llm.generate_response(self.chat_ctx)
+            first_text.set()
+            return response
+        
+        batches = []
+        deltas = coalesce_deltas(
+            self.llm.stream_response(self.chat_ctx),
+            interval=self.delta_interval,
+            max_chars=self.delta_max_chars
+        )
+        async for batch in deltas:
+            if not batches:
+                result.timings["llm_first_text"] = time.perf_counter() - started
+                first_text.set()
+            batches.append(batch)
+            if emit:
+                await self._emit("text_delta", {"text": batch})
+        
+        first_text.set()
+        return LLMResponse(text="".join(batches))
+    
+    async def _send_filler_if_slow(self,
+                                   llm_task: asyncio.Future,
+                                   first_text: asyncio.Event,
+                                   options: SynthesisOptions,
+                                   result: TurnResult):
+        """Emit a cached filler clip if no response text has arrived within the threshold"""
+        if self.filler is None or self.on_event is None:
+            return
         
-        # Convert to speech
+        text_arrived = asyncio.ensure_future(first_text.wait())
         try:
-            tts_result = await self.tts.synthesize(llm_response.text)
-            result["audio_response"] = tts_result
-            result["success"] = True
-        except Exception as e:
-            logger.error(f"TTS failed: {str(e)}")
-            result["success"] = False
+            done, _ = await asyncio.wait(
+                {llm_task, text_arrived},
+                timeout=self.filler_threshold,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            text_arrived.cancel()
+        if done:
+            return
         
-        return result
+        clip = self.filler.get(options)
+        if clip is None:
+            return
+        
+        phrase, audio = clip
+        result.filler = phrase
+        await self._emit("filler", {"text": phrase, "audio": audio})
+    
+    def _clear_pending(self):
+        self._pending_text = ""
+        self._pending_language = None
+        self._pending_plan = OutputPlan.BOTH
     
     def clear_conversation(self):
         """Clear the conversation history"""
+        self._clear_pending()
+        self.language_prior.reset()
+        self.chat_ctx.metadata.pop("language", None)
         self.chat_ctx.clear()
-        
+    
     def update_system_prompt(self, prompt: str):
         """Update the system prompt"""
-        self.chat_ctx.system_prompt = prompt
\ No newline at end of file
+        self.chat_ctx.system_prompt = prompt
+    
+    def update_tts_options(self, **changes):
+        """Update this session's synthesis options (voice_id, language, speed, format)
+        
+        Raises ValueError (pydantic.ValidationError for malformed values),
+        leaving the options unchanged, if a value is invalid or the TTS
+        provider cannot produce it.
+        """
+        options = SynthesisOptions.model_validate({**self.tts_options.model_dump(), **changes})
+        self.tts.check_options(options)
+        self.tts_options = options
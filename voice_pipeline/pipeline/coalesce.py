@@ -0,0 +1,60 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+async def coalesce_deltas(deltas: AsyncIterator[str],
+                          interval: float = 0.05,
+                          max_chars: int = 64) -> AsyncIterator[str]:
+    """Batch a stream of text deltas into fewer, larger ones
+
+    The first delta is passed on straight away so the reply starts
+    rendering immediately. Later deltas are held until interval seconds
+    have passed since the oldest held one, or max_chars have built up,
+    whichever comes first; a stalled stream still flushes on time.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = deltas.__aiter__()
+    pending: List[str] = []
+    size = 0
+    deadline: Optional[float] = None
+    first = True
+    next_delta: Optional[asyncio.Future] = None
+
+    try:
+        while True:
+            if next_delta is None:
+                next_delta = asyncio.ensure_future(iterator.__anext__())
+
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({next_delta}, timeout=timeout)
+            if not done:
+                yield "".join(pending)
+                pending, size, deadline = [], 0, None
+                continue
+
+            try:
+                delta = next_delta.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                next_delta = None
+
+            if not delta:
+                continue
+            if first:
+                first = False
+                yield delta
+                continue
+
+            pending.append(delta)
+            size += len(delta)
+            if deadline is None:
+                deadline = loop.time() + interval
+            if size >= max_chars:
+                yield "".join(pending)
+                pending, size, deadline = [], 0, None
+
+        if pending:
+            yield "".join(pending)
+    finally:
+        if next_delta is not None:
+            next_delta.cancel()
@@ -0,0 +1,82 @@
+import asyncio
+import itertools
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from voice_pipeline.core.interfaces import TTSInterface
+from voice_pipeline.core.models import SynthesisOptions, TTSResult
+
+logger = logging.getLogger(__name__)
+
+# Short acknowledgements played while the LLM is still thinking
+DEFAULT_PHRASES: Dict[str, List[str]] = {
+    "en": ["Mm-hm.", "Let me check.", "One moment."],
+    "es": ["Mm-hm.", "Déjame ver.", "Un momento."],
+    "fr": ["Mm-hm.", "Je regarde.", "Un instant."],
+    "de": ["Mm-hm.", "Moment mal.", "Einen Augenblick."],
+    "it": ["Mm-hm.", "Vediamo.", "Un momento."],
+}
+
+CacheKey = Tuple[Optional[str], str, Optional[float], str]
+
+class FillerCache:
+    """Filler clips synthesized once per voice and language and kept in memory
+
+    Clips for the default voice are synthesized at startup with warm().
+    A voice or language seen for the first time is synthesized in the
+    background, and get() returns nothing for it until that finishes, so a
+    turn never waits on or pays for a filler synthesis.
+    """
+
+    def __init__(self,
+                tts: TTSInterface,
+                phrases: Dict[str, List[str]] = DEFAULT_PHRASES,
+                max_voices: int = 32):
+        """Initialize the cache
+
+        Args:
+            tts: Provider used to synthesize the clips
+            phrases: Filler phrases per base language code
+            max_voices: Maximum voice/language combinations to keep clips for
+        """
+        self.tts = tts
+        self.phrases = phrases
+        self.max_voices = max_voices
+        self._clips: Dict[CacheKey, List[Tuple[str, TTSResult]]] = {}
+        self._rotation: Dict[CacheKey, itertools.cycle] = {}
+        self._loading: Dict[CacheKey, asyncio.Task] = {}
+
+    async def warm(self, options: Iterable[SynthesisOptions]):
+        """Synthesize clips for the given voices and languages ahead of time"""
+        await asyncio.gather(*(self._load(self._key(o), o) for o in options))
+
+    def get(self, options: SynthesisOptions) -> Optional[Tuple[str, TTSResult]]:
+        """Return the next (phrase, clip) for these options, if already cached"""
+        key = self._key(options)
+        if key in self._rotation:
+            return next(self._rotation[key])
+
+        if key not in self._loading and len(self._clips) + len(self._loading) < self.max_voices:
+            self._loading[key] = asyncio.create_task(self._load(key, options))
+        return None
+
+    def _key(self, options: SynthesisOptions) -> CacheKey:
+        language = (options.language or "en").split("-")[0].lower()
+        return options.voice_id, language, options.speed, options.format
+
+    async def _load(self, key: CacheKey, options: SynthesisOptions):
+        phrases = self.phrases.get(key[1])
+        if not phrases:
+            return
+
+        try:
+            clips = []
+            for phrase in phrases:
+                clips.append((phrase, await self.tts.synthesize(phrase, options)))
+            self._clips[key] = clips
+            self._rotation[key] = itertools.cycle(clips)
+            logger.info(f"Cached {len(clips)} filler clips for {key}")
+        except Exception as e:
+            logger.error(f"Failed to synthesize filler clips for {key}: {str(e)}")
+        finally:
+            self._loading.pop(key, None)
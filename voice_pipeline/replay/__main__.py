@@ -0,0 +1,97 @@
+"""Replay recorded sessions and compare per-stage latencies against a baseline
+
+Usage:
+    python -m voice_pipeline.replay recordings/ --write-baseline baseline.json
+    python -m voice_pipeline.replay recordings/ --baseline baseline.json --stt whisper
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import List
+
+from voice_pipeline.components.turn_detector.eou import EOUTurnDetector
+from voice_pipeline.components.vad.simple import SimpleEndpointingVAD
+from voice_pipeline.pipeline.agent import VoicePipelineAgent
+from voice_pipeline.replay.harness import (
+    RecordedLLM, RecordedSTT, RecordedTTS, compare, load_turns, replay_session, summarize
+)
+
+logger = logging.getLogger(__name__)
+
+def find_recordings(paths: List[str]) -> List[str]:
+    """Expand directories into the session recordings they contain"""
+    recordings = []
+    for path in paths:
+        if os.path.isdir(path):
+            recordings.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(".vprec")
+            ))
+        else:
+            recordings.append(path)
+    return recordings
+
+async def run(args) -> int:
+    stt = None
+    if args.stt == "whisper":
+        from voice_pipeline.components.stt.whisper import FasterWhisperSTT
+        stt = FasterWhisperSTT(model_size=args.model_size)
+
+    timings = []
+    for path in find_recordings(args.recordings):
+        turns = load_turns(path)
+        agent = VoicePipelineAgent(
+            vad=SimpleEndpointingVAD(),
+            stt=stt or RecordedSTT(turns, args.simulate_latency),
+            llm=RecordedLLM(turns, args.simulate_latency),
+            tts=RecordedTTS(turns, args.simulate_latency),
+            turn_detector=EOUTurnDetector()
+        )
+        session_timings = await replay_session(path, agent, realtime=args.realtime)
+        logger.info(f"Replayed {path}: {len(session_timings)} agent calls")
+        timings.extend(session_timings)
+
+    summary = summarize(timings)
+    for stage, stats in summary.items():
+        print(f"{stage:>15}  n={stats['count']:<5} mean={stats['mean'] * 1000:8.1f}ms  "
+              f"p50={stats['p50'] * 1000:8.1f}ms  p95={stats['p95'] * 1000:8.1f}ms")
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Wrote baseline to {args.write_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recordings", nargs="+", help="Recording files or directories")
+    parser.add_argument("--realtime", action="store_true", help="Replay with the original message timing")
+    parser.add_argument("--stt", choices=["recorded", "whisper"], default="recorded",
+                        help="Use recorded transcripts or a local Whisper model")
+    parser.add_argument("--model-size", default="base", help="Whisper model size for --stt whisper")
+    parser.add_argument("--simulate-latency", action="store_true",
+                        help="Make stand-in providers take their recorded time")
+    parser.add_argument("--baseline", help="Baseline summary to compare against")
+    parser.add_argument("--write-baseline", help="Write this run's summary as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown before a stage counts as regressed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import statistics
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from voice_pipeline.core.interfaces import LLMInterface, STTInterface, TTSInterface
+from voice_pipeline.core.models import (
+    AudioData, ConversationContext, LLMResponse, OutputPlan, SynthesisOptions, TranscriptionResult, TTSResult,
+    TurnResult
+)
+from voice_pipeline.pipeline.agent import VoicePipelineAgent
+from voice_pipeline.replay.recorder import AUDIO_KINDS, TEXT_IN, TURN, read_recording
+
+logger = logging.getLogger(__name__)
+
+class RecordedSTT(STTInterface):
+    """Local STT stand-in that returns a recording's transcripts in order"""
+
+    def __init__(self, turns: List[Dict[str, Any]], simulate_latency: bool = False):
+        self._turns = deque(t for t in turns if t["transcript"] is not None)
+        self.simulate_latency = simulate_latency
+
+    async def transcribe(self,
+                         audio_data: AudioData,
+                         language: Optional[str] = None,
+                         segments: bool = True) -> TranscriptionResult:
+        turn = self._turns.popleft() if self._turns else {"transcript": "", "language": None, "timings": {}}
+        if self.simulate_latency:
+            await asyncio.sleep(turn["timings"].get("stt", 0.0))
+        return TranscriptionResult(
+            text=turn["transcript"],
+            language=language or turn["language"],
+            language_probability=1.0 if turn["language"] else None
+        )
+
+class RecordedLLM(LLMInterface):
+    """Local LLM stand-in that returns a recording's responses in order"""
+
+    def __init__(self, turns: List[Dict[str, Any]], simulate_latency: bool = False):
+        self._turns = deque(t for t in turns if t["response"] is not None)
+        self.simulate_latency = simulate_latency
+
+    async def generate_response(self,
+                               context: ConversationContext,
+                               temperature: float = 0.7) -> LLMResponse:
+        turn = self._turns.popleft() if self._turns else {"response": "", "timings": {}}
+        if self.simulate_latency:
+            await asyncio.sleep(turn["timings"].get("llm", 0.0))
+        return LLMResponse(text=turn["response"])
+
+class RecordedTTS(TTSInterface):
+    """Local TTS stand-in that returns silence of the recorded size"""
+
+    def __init__(self, turns: List[Dict[str, Any]], simulate_latency: bool = False):
+        self._turns = deque(t for t in turns if t["audio_bytes"])
+        self.simulate_latency = simulate_latency
+
+    async def synthesize(self, text: str, options: Optional[SynthesisOptions] = None) -> TTSResult:
+        turn = self._turns.popleft() if self._turns else {"audio_bytes": 0, "audio_format": "mp3", "timings": {}}
+        if self.simulate_latency:
+            await asyncio.sleep(turn["timings"].get("tts", 0.0))
+        return TTSResult(audio=bytes(turn["audio_bytes"]), format=turn["audio_format"] or "mp3")
+
+def load_turns(path: str) -> List[Dict[str, Any]]:
+    """Return the recorded turn outcomes of a session"""
+    return [record.json() for record in read_recording(path) if record.kind == TURN]
+
+async def replay_session(path: str, agent: VoicePipelineAgent, realtime: bool = False) -> List[Dict[str, float]]:
+    """Feed a recorded session's inbound messages through an agent
+
+    Each turn runs with the output plan the live session used, resolved from
+    the recorded messages the way the server does, so text-only turns replay
+    without filler and TTS.
+
+    Args:
+        path: Session recording to replay
+        agent: Agent to drive, typically built on stand-in providers
+        realtime: Reproduce the original message pacing instead of running flat out
+
+    Returns:
+        List[Dict[str, float]]: Per-stage timings of each agent call
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    timings: List[Dict[str, float]] = []
+    pending_deadline: Optional[float] = None
+    audio_plan = OutputPlan.BOTH
+    pending_plan = audio_plan
+
+    async def wait_until(offset: float):
+        if realtime:
+            await asyncio.sleep(max(0.0, started + offset - loop.time()))
+
+    async def run(call) -> TurnResult:
+        call_started = loop.time()
+        result = await call
+        timings.append({**result.timings, "total": loop.time() - call_started})
+        return result
+
+    for record in read_recording(path):
+        if record.kind not in AUDIO_KINDS and record.kind != TEXT_IN:
+            continue
+
+        # Let a held-back turn complete if its endpointing delay ran out first
+        if pending_deadline is not None and record.offset >= pending_deadline:
+            await wait_until(pending_deadline)
+            await run(agent.complete_pending_turn())
+            pending_deadline = None
+
+        await wait_until(record.offset)
+
+        if record.kind in AUDIO_KINDS:
+            # Speech after a completed turn starts a new one, with the plan configured then
+            if not agent.has_pending_turn:
+                pending_plan = audio_plan
+            result = await run(agent.process_audio(record.audio(), pending_plan))
+            if not result.turn_complete:
+                pending_deadline = record.offset + result.endpointing_delay
+            continue
+
+        # Plain text messages are only ever answered in text
+        text = record.payload.decode()
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = {"type": "text_input", "text": text, "output": OutputPlan.TEXT.value}
+        if not isinstance(data, dict):
+            data = {"type": "text_input", "text": text, "output": OutputPlan.TEXT.value}
+
+        if data.get("type") == "text_input" and data.get("text"):
+            await run(agent.process_text(data["text"], OutputPlan.from_message(data, OutputPlan.BOTH)))
+            pending_deadline = None
+        elif data.get("type") == "config":
+            config = data.get("config", {})
+            audio_plan = OutputPlan.from_message(config, audio_plan)
+            if "system_prompt" in config:
+                agent.update_system_prompt(config["system_prompt"])
+        elif data.get("type") == "history" and data.get("action") == "clear":
+            agent.clear_conversation()
+
+    if agent.has_pending_turn:
+        if pending_deadline is not None:
+            await wait_until(pending_deadline)
+        await run(agent.complete_pending_turn())
+
+    return timings
+
+def summarize(timings: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Aggregate per-stage timings into count, mean, p50 and p95"""
+    stages: Dict[str, List[float]] = {}
+    for call in timings:
+        for stage, seconds in call.items():
+            stages.setdefault(stage, []).append(seconds)
+
+    summary = {}
+    for stage, values in sorted(stages.items()):
+        values.sort()
+        summary[stage] = {
+            "count": len(values),
+            "mean": statistics.fmean(values),
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+        }
+    return summary
+
+def compare(summary: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            tolerance: float = 0.2,
+            min_delta: float = 0.005) -> List[str]:
+    """List stages whose p50 or p95 regressed beyond tolerance against a baseline
+
+    Differences smaller than min_delta seconds are ignored as noise.
+    """
+    regressions = []
+    for stage, stats in summary.items():
+        if stage not in baseline:
+            continue
+        for metric in ("p50", "p95"):
+            before, after = baseline[stage][metric], stats[metric]
+            if after > before * (1 + tolerance) and after - before > min_delta:
+                regressions.append(
+                    f"{stage} {metric}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms "
+                    f"(+{(after / before - 1) * 100 if before else float('inf'):.0f}%)"
+                )
+    return regressions
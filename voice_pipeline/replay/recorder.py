@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import struct
+import time
+from typing import Any, BinaryIO, Dict, Iterator, NamedTuple, Optional
+
+from voice_pipeline.core.models import AudioData, TurnResult
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, then records of HEADER (kind, seconds since start,
+# payload length) followed by the payload. AUDIO_FRAME payloads are
+# AUDIO_HEADER (the length of a JSON object giving the format, sample_rate
+# and channels) followed by that object and the raw inbound bytes; older
+# recordings have AUDIO_IN records of bare WAV bytes instead. Everything
+# else is UTF-8 JSON or text.
+MAGIC = b"VPREC\x01"
+HEADER = struct.Struct("<BdI")
+AUDIO_HEADER = struct.Struct("<H")
+
+# Record kinds
+META = 0
+AUDIO_IN = 1
+TEXT_IN = 2
+TURN = 3
+AUDIO_FRAME = 4
+
+AUDIO_KINDS = (AUDIO_IN, AUDIO_FRAME)
+
+class Record(NamedTuple):
+    """One recorded session event"""
+    kind: int
+    offset: float
+    payload: bytes
+
+    def json(self) -> Dict[str, Any]:
+        """Decode a JSON payload"""
+        return json.loads(self.payload)
+
+    def audio(self) -> AudioData:
+        """Decode an audio payload into the AudioData that was received"""
+        if self.kind == AUDIO_IN:
+            return AudioData(self.payload, format="wav")
+        (length,) = AUDIO_HEADER.unpack_from(self.payload)
+        start = AUDIO_HEADER.size + length
+        return AudioData(self.payload[start:], **json.loads(self.payload[AUDIO_HEADER.size:start]))
+
+class SessionRecorder:
+    """Append-only recorder for one websocket session
+
+    Captures inbound audio frames and text messages with their arrival time,
+    and each turn's transcript, response and per-stage timings, so the
+    session can be replayed later with its original pacing.
+    """
+
+    def __init__(self, directory: str, session_id: str):
+        """Open a new recording for the session in the given directory"""
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{session_id}-{int(time.time())}.vprec")
+        self._file: Optional[BinaryIO] = open(self.path, "wb")
+        self._file.write(MAGIC)
+        self._started = time.monotonic()
+        self._write(META, json.dumps({"session_id": session_id, "started_at": time.time()}).encode())
+        logger.info(f"Recording session {session_id} to {self.path}")
+
+    def record_audio(self, audio: AudioData):
+        """Record an inbound audio frame with its encoding"""
+        header = json.dumps({
+            "format": audio.format,
+            "sample_rate": audio.sample_rate,
+            "channels": audio.channels,
+        }).encode()
+        self._write(AUDIO_FRAME, b"".join((AUDIO_HEADER.pack(len(header)), header, audio.data)))
+
+    def record_text(self, text: str):
+        """Record an inbound text or control message"""
+        self._write(TEXT_IN, text.encode())
+
+    def record_turn(self, result: TurnResult):
+        """Record the outcome of one agent call"""
+        transcription = result.transcription
+        llm_response = result.llm_response
+        audio_response = result.audio_response
+
+        turn = {
+            "transcript": transcription.text if transcription else None,
+            "language": transcription.language if transcription else None,
+            "response": llm_response.text if llm_response else None,
+            "audio_bytes": len(audio_response.audio) if audio_response else 0,
+            "audio_format": audio_response.format if audio_response else None,
+            "turn_complete": result.turn_complete,
+            "endpointing_delay": result.endpointing_delay,
+            "timings": result.timings,
+        }
+        self._write(TURN, json.dumps(turn).encode())
+
+    def close(self):
+        """Flush and close the recording"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, kind: int, payload: bytes):
+        if self._file is None:
+            return
+        try:
+            self._file.write(HEADER.pack(kind, time.monotonic() - self._started, len(payload)))
+            self._file.write(payload)
+        except OSError as e:
+            logger.error(f"Stopping recording {self.path}: {str(e)}")
+            self.close()
+
+def read_recording(path: str) -> Iterator[Record]:
+    """Iterate over the records of a session recording"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a session recording: {path}")
+
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            kind, offset, length = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                logger.warning(f"Truncated record at end of {path}")
+                return
+            yield Record(kind, offset, payload)
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SessionQueue:
+    """Bounded per-session inbound message queue
+
+    When the queue is full, or its audio would exceed max_audio_bytes, the
+    oldest queued audio is shed to make room, and audio that has waited
+    longer than max_audio_age is dropped when dequeued, since answering a
+    stale utterance only adds to the backlog. Text and control messages are
+    never shed; they are rejected only when the queue is full of them.
+    Priority messages are dequeued ahead of everything else, in the order
+    they were queued. A finished queue takes no more messages but still
+    hands out the queued ones; a closed queue discards them.
+    """
+
+    def __init__(self, maxsize: int = 8, max_audio_age: float = 10.0, max_audio_bytes: int = 24 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_audio_age = max_audio_age
+        self.max_audio_bytes = max_audio_bytes
+        self.shed = 0
+        self.audio_bytes = 0
+        self._items: Deque[Tuple[str, Any, float]] = deque()
+        self._priority: Deque[Tuple[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._finished = False
+
+    def __len__(self) -> int:
+        return len(self._items) + len(self._priority)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def put_nowait(self, kind: str, payload: Any, priority: bool = False) -> bool:
+        """Queue a message, shedding stale audio if needed
+
+        Args:
+            kind: Message kind ('audio', 'text', ...)
+            payload: Message payload
+            priority: Dequeue ahead of other messages, for control messages
+
+        Returns:
+            bool: False if the queue is full and nothing could be shed
+        """
+        if self._closed or self._finished:
+            return False
+
+        if priority:
+            if len(self._priority) >= self.maxsize:
+                return False
+            self._priority.append((kind, payload))
+            self._ready.set()
+            return True
+
+        if len(self._items) >= self.maxsize and not self._shed_oldest_audio():
+            return False
+
+        if kind == "audio":
+            size = len(payload.data)
+            while self.audio_bytes + size > self.max_audio_bytes:
+                if not self._shed_oldest_audio():
+                    return False
+            self.audio_bytes += size
+
+        self._items.append((kind, payload, time.monotonic()))
+        self._ready.set()
+        return True
+
+    async def get(self) -> Optional[Tuple[str, Any]]:
+        """Wait for the next message, or return None once the queue is closed"""
+        while True:
+            if self._closed:
+                return None
+
+            if self._priority:
+                item = self._priority.popleft()
+                if not self._items and not self._priority:
+                    self._ready.clear()
+                return item
+
+            if self._items:
+                kind, payload, enqueued_at = self._items.popleft()
+                if not self._items and not self._priority:
+                    self._ready.clear()
+                if kind == "audio":
+                    self.audio_bytes -= len(payload.data)
+                if kind == "audio" and time.monotonic() - enqueued_at > self.max_audio_age:
+                    self.shed += 1
+                    logger.warning("Dropping stale queued audio")
+                    continue
+                return kind, payload
+
+            if self._finished:
+                return None
+            await self._ready.wait()
+
+    def finish(self):
+        """Stop taking messages; get returns the queued ones, then None"""
+        self._finished = True
+        self._ready.set()
+
+    def close(self):
+        """Close the queue and wake any waiting consumer"""
+        self._closed = True
+        self._items.clear()
+        self._priority.clear()
+        self.audio_bytes = 0
+        self._ready.set()
+
+    def _shed_oldest_audio(self) -> bool:
+        for i, (kind, payload, _) in enumerate(self._items):
+            if kind == "audio":
+                del self._items[i]
+                self.audio_bytes -= len(payload.data)
+                self.shed += 1
+                logger.warning("Session queue full, shedding oldest queued audio")
+                return True
+        return False
+
+class AdmissionController:
+    """Per-worker limits on concurrent sessions and in-flight turns"""
+
+    def __init__(self,
+                max_sessions: int = 100,
+                max_inflight_turns: int = 8,
+                max_queued_messages: int = 8,
+                max_audio_age: float = 10.0,
+                max_queued_audio_bytes: int = 24 * 1024 * 1024,
+                retry_after: int = 5):
+        """Initialize admission limits
+
+        Args:
+            max_sessions: Maximum concurrent websocket sessions
+            max_inflight_turns: Maximum turns processed concurrently by this worker
+            max_queued_messages: Maximum queued inbound messages per session
+            max_audio_age: Seconds after which queued audio is considered stale
+            max_queued_audio_bytes: Maximum bytes of queued inbound audio per session
+            retry_after: Seconds a rejected client is told to wait before retrying
+        """
+        self.max_sessions = max_sessions
+        self.max_inflight_turns = max_inflight_turns
+        self.max_queued_messages = max_queued_messages
+        self.max_audio_age = max_audio_age
+        self.max_queued_audio_bytes = max_queued_audio_bytes
+        self.retry_after = retry_after
+        self._sessions = 0
+        self._inflight = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._shed = 0
+        self.draining = False
+        self._turn_slots = asyncio.Semaphore(max_inflight_turns)
+        self._queues: Dict[int, SessionQueue] = {}
+
+    def try_admit(self) -> bool:
+        """Reserve a session slot, or return False if the worker is full"""
+        if not self.accepting:
+            self._rejected += 1
+            return False
+        self._sessions += 1
+        return True
+
+    def release(self, queue: Optional[SessionQueue] = None):
+        """Release a session slot and stop tracking its queue"""
+        self._sessions -= 1
+        if queue is not None:
+            self._queues.pop(id(queue), None)
+            self._shed += queue.shed
+
+    def create_queue(self) -> SessionQueue:
+        """Create a tracked inbound queue for an admitted session"""
+        queue = SessionQueue(
+            maxsize=self.max_queued_messages,
+            max_audio_age=self.max_audio_age,
+            max_audio_bytes=self.max_queued_audio_bytes
+        )
+        self._queues[id(queue)] = queue
+        return queue
+
+    def drain(self):
+        """Stop admitting sessions and input, ending active sessions once their queued input is answered"""
+        self.draining = True
+        for queue in list(self._queues.values()):
+            queue.finish()
+
+    def undrain(self):
+        """Admit sessions again; sessions ended by the drain still close"""
+        self.draining = False
+
+    @asynccontextmanager
+    async def turn(self):
+        """Hold one of the worker's in-flight turn slots"""
+        self._waiting += 1
+        try:
+            await self._turn_slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            self._turn_slots.release()
+
+    @property
+    def accepting(self) -> bool:
+        """Whether the worker has room for another session"""
+        return not self.draining and self._sessions < self.max_sessions
+
+    def load(self) -> Dict[str, Any]:
+        """Return current load figures for upstream balancers"""
+        return {
+            "accepting": self.accepting,
+            "draining": self.draining,
+            "sessions": self._sessions,
+            "max_sessions": self.max_sessions,
+            "inflight_turns": self._inflight,
+            "waiting_turns": self._waiting,
+            "max_inflight_turns": self.max_inflight_turns,
+            "queued_messages": sum(len(q) for q in self._queues.values()),
+            "queued_audio_bytes": sum(q.audio_bytes for q in self._queues.values()),
+            "shed_messages": self._shed + sum(q.shed for q in self._queues.values()),
+            "rejected_sessions": self._rejected,
+            "utilization": round(max(
+                self._sessions / self.max_sessions,
+                (self._inflight + self._waiting) / self.max_inflight_turns
+            ), 3),
+        }
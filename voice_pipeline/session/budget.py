@@ -0,0 +1,129 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from voice_pipeline.core.models import ConversationContext, TurnResult
+from voice_pipeline.session.admission import SessionQueue
+
+logger = logging.getLogger(__name__)
+
+class SessionBudget:
+    """Memory one session holds, and the limits on it
+
+    Three things grow with a session: inbound audio waiting in its queue
+    (capped by the queue itself), its conversation history, and the
+    response of the turn being sent. Oversized inbound frames are rejected
+    before they are decoded, and a client that keeps sending them is
+    disconnected. History is trimmed to max_history_messages and
+    max_history_bytes after every turn. If the total still exceeds
+    max_session_bytes, the session should be closed.
+    """
+
+    def __init__(self,
+                 session_id: str,
+                 queue: SessionQueue,
+                 context: ConversationContext,
+                 max_frame_bytes: int = 10 * 1024 * 1024,
+                 max_rejected_frames: int = 3,
+                 max_history_messages: Optional[int] = 200,
+                 max_history_bytes: Optional[int] = 256 * 1024,
+                 max_session_bytes: int = 48 * 1024 * 1024):
+        self.session_id = session_id
+        self.queue = queue
+        self.context = context
+        self.max_frame_bytes = max_frame_bytes
+        self.max_rejected_frames = max_rejected_frames
+        self.max_history_messages = max_history_messages
+        self.max_history_bytes = max_history_bytes
+        self.max_session_bytes = max_session_bytes
+        self.response_bytes = 0
+        self.rejected_frames = 0
+        self.trimmed_messages = 0
+        self.closed: Optional[str] = None
+
+    def check_frame(self, size: int) -> bool:
+        """Whether an inbound frame of size bytes may be accepted"""
+        if size <= self.max_frame_bytes:
+            return True
+        self.rejected_frames += 1
+        logger.warning(f"Session {self.session_id}: rejected {size} byte frame")
+        return False
+
+    @property
+    def too_many_rejected_frames(self) -> bool:
+        return self.rejected_frames >= self.max_rejected_frames
+
+    def hold(self, result: TurnResult):
+        """Count a turn's response while it is being sent"""
+        self.response_bytes = (
+            (len(result.audio_response.audio) if result.audio_response else 0)
+            + (len(result.llm_response.text) if result.llm_response else 0)
+        )
+
+    def release(self):
+        """Stop counting the sent response and trim the history it was added to"""
+        self.response_bytes = 0
+        trimmed = self.context.trim(self.max_history_messages, self.max_history_bytes)
+        if trimmed:
+            self.trimmed_messages += trimmed
+            logger.info(f"Session {self.session_id}: trimmed {trimmed} messages from history")
+
+    def total(self) -> int:
+        return self.queue.audio_bytes + self.context.size() + self.response_bytes
+
+    def exceeded(self) -> Optional[str]:
+        """Why the session must be closed, or None while it is within its limits"""
+        if self.too_many_rejected_frames:
+            return f"More than {self.max_rejected_frames - 1} oversized frames"
+        if self.total() > self.max_session_bytes:
+            return "Session memory limit exceeded"
+        return None
+
+    def usage(self) -> Dict[str, Any]:
+        history_bytes = self.context.size()
+        return {
+            "queued_audio_bytes": self.queue.audio_bytes,
+            "history_bytes": history_bytes,
+            "history_messages": len(self.context.messages),
+            "response_bytes": self.response_bytes,
+            "total_bytes": self.queue.audio_bytes + history_bytes + self.response_bytes,
+            "rejected_frames": self.rejected_frames,
+            "trimmed_messages": self.trimmed_messages,
+        }
+
+class SessionAccounting:
+    """Per-worker registry of session budgets, all created with the same limits"""
+
+    def __init__(self, **limits):
+        """Initialize with the keyword limits of SessionBudget"""
+        self.limits = limits
+        self.closed_sessions = 0
+        self._budgets: Dict[str, SessionBudget] = {}
+
+    def create_budget(self, session_id: str, queue: SessionQueue, context: ConversationContext) -> SessionBudget:
+        budget = SessionBudget(session_id, queue, context, **self.limits)
+        self._budgets[session_id] = budget
+        return budget
+
+    def release(self, budget: SessionBudget):
+        """Stop tracking a session's budget"""
+        if self._budgets.get(budget.session_id) is budget:
+            del self._budgets[budget.session_id]
+        if budget.closed:
+            self.closed_sessions += 1
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        """Usage of every tracked session, largest first"""
+        usage = [{"session_id": session_id, **budget.usage()} for session_id, budget in self._budgets.items()]
+        return sorted(usage, key=lambda item: item["total_bytes"], reverse=True)
+
+    def load(self) -> Dict[str, Any]:
+        """Aggregate figures across sessions"""
+        totals = [budget.total() for budget in self._budgets.values()]
+        return {
+            "sessions": len(totals),
+            "total_bytes": sum(totals),
+            "largest_session_bytes": max(totals, default=0),
+            "max_session_bytes": self.limits.get("max_session_bytes"),
+            "rejected_frames": sum(budget.rejected_frames for budget in self._budgets.values()),
+            "closed_sessions": self.closed_sessions,
+        }
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from voice_pipeline.core.models import ConversationContext
+
+logger = logging.getLogger(__name__)
+
+class SQLiteSessionBackend:
+    """Persistent session tier backed by a local SQLite database
+
+    Every save bumps the session's version, so processes sharing the
+    database can tell whether a context they hold is still current.
+    """
+
+    def __init__(self, path: str = "sessions.db"):
+        """Open (or create) the session database at the given path"""
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, "
+            "context TEXT NOT NULL, "
+            "updated_at REAL NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def load(self, session_id: str) -> Optional[Tuple[str, int]]:
+        """Return the serialized context for a session and its version, if stored"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT context, version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def version(self, session_id: str) -> Optional[int]:
+        """Return the stored version of a session, if stored"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save(self, session_id: str, payload: str, updated_at: float) -> int:
+        """Insert or replace the serialized context for a session, returning its new version"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO sessions (session_id, context, updated_at, version) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT(session_id) DO UPDATE SET "
+                    "context = excluded.context, updated_at = excluded.updated_at, version = version + 1",
+                    (session_id, payload, updated_at)
+                )
+                version = self._conn.execute(
+                    "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return version
+
+    def delete(self, session_id: str):
+        """Remove a session from disk"""
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def purge(self, older_than: float) -> int:
+        """Remove sessions not updated since the given timestamp"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (older_than,))
+        return cursor.rowcount
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+class _Entry:
+    __slots__ = ("context", "size", "last_access", "version")
+
+    def __init__(self, context: ConversationContext, size: int, last_access: float, version: int = 0):
+        self.context = context
+        self.size = size
+        self.last_access = last_access
+        self.version = version
+
+class SessionStore:
+    """Two-tier store for conversation contexts
+
+    Contexts live in an in-memory LRU bounded by session count and serialized
+    bytes, and are written through to a persistent backend after every update
+    so a reconnecting client can resume by session ID after eviction or a
+    dropped connection.
+
+    Workers may share the backend, and a session can move between them, so
+    a context found in memory is only used while its version matches the
+    backend's; otherwise the newer one is loaded. Callers get their own
+    copy of a context, never one another connection holds.
+    """
+
+    def __init__(self,
+                backend: Optional[SQLiteSessionBackend] = None,
+                max_sessions: int = 1000,
+                max_bytes: int = 64 * 1024 * 1024,
+                idle_timeout: float = 1800.0,
+                retention: float = 7 * 24 * 3600.0):
+        """Initialize the store
+
+        Args:
+            backend: Persistent tier, or None to keep sessions in memory only
+            max_sessions: Maximum number of contexts held in memory
+            max_bytes: Maximum serialized size of contexts held in memory
+            idle_timeout: Seconds without access before a context leaves memory
+            retention: Seconds without update before a context is purged from disk
+        """
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.retention = retention
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+
+    async def get(self, session_id: str) -> Optional[ConversationContext]:
+        """Return a copy of the session's context from memory, or from disk if newer"""
+        entry = self._entries.get(session_id)
+        if entry is not None and self.backend is not None:
+            # Another worker sharing the backend may have updated the session since
+            stored = await asyncio.to_thread(self.backend.version, session_id)
+            if stored != entry.version:
+                self._remove(session_id)
+                entry = None
+
+        if entry is not None:
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(session_id)
+            return entry.context.model_copy(deep=True)
+
+        if self.backend is None:
+            return None
+
+        row = await asyncio.to_thread(self.backend.load, session_id)
+        if row is None:
+            return None
+        payload, version = row
+
+        try:
+            context = ConversationContext.model_validate_json(payload)
+        except Exception as e:
+            logger.error(f"Discarding unreadable session {session_id}: {str(e)}")
+            return None
+
+        self._insert(session_id, context, len(payload), version)
+        return context.model_copy(deep=True)
+
+    async def put(self, session_id: str, context: ConversationContext):
+        """Store a context in memory and write it through to disk"""
+        payload = context.model_dump_json()
+        version = 0
+        if self.backend is not None:
+            version = await asyncio.to_thread(self.backend.save, session_id, payload, time.time())
+        self._insert(session_id, context, len(payload), version)
+
+    async def delete(self, session_id: str):
+        """Forget a session in both tiers"""
+        self._remove(session_id)
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.delete, session_id)
+
+    def evict_idle(self) -> int:
+        """Drop contexts idle longer than idle_timeout from memory"""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [sid for sid, entry in self._entries.items() if entry.last_access < cutoff]
+        for session_id in idle:
+            self._remove(session_id)
+        self._evictions += len(idle)
+        return len(idle)
+
+    async def purge_expired(self) -> int:
+        """Remove sessions past the retention period from disk"""
+        if self.backend is None:
+            return 0
+        return await asyncio.to_thread(self.backend.purge, time.time() - self.retention)
+
+    async def run_maintenance(self, interval: float = 60.0):
+        """Periodically evict idle contexts and purge expired ones"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = self.evict_idle()
+                purged = await self.purge_expired()
+                if evicted or purged:
+                    logger.info(f"Session store: evicted {evicted} idle, purged {purged} expired")
+            except Exception as e:
+                logger.error(f"Session store maintenance failed: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return memory-tier occupancy figures"""
+        return {
+            "sessions": len(self._entries),
+            "bytes": self._bytes,
+            "evictions": self._evictions,
+        }
+
+    def _insert(self, session_id: str, context: ConversationContext, size: int, version: int = 0):
+        self._remove(session_id)
+        self._entries[session_id] = _Entry(context, size, time.monotonic(), version)
+        self._bytes += size
+
+        # Enforce LRU limits, always keeping the entry just inserted
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.max_sessions or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._evictions += 1
+
+    def _remove(self, session_id: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
@@ -0,0 +1,104 @@
+"""Benchmark Whisper settings on this host and write the recommended ones for the server
+
+Usage:
+    python -m voice_pipeline.tune --model-sizes base,small,large --streams 4
+    python -m voice_pipeline.tune recordings/ clips/ --output stt_tuning.json
+
+The server and model host load the output file (STT_TUNING_FILE, default
+stt_tuning.json) at startup.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from voice_pipeline.tune.benchmark import candidates, recommend, run_candidates, to_tuning
+from voice_pipeline.tune.corpus import fixture_corpus, load_corpus
+
+logger = logging.getLogger(__name__)
+
+def _powers_of_two(limit: int) -> str:
+    values, value = [], 1
+    while value <= limit:
+        values.append(str(value))
+        value *= 2
+    return ",".join(values)
+
+def _list(value: str, kind=str):
+    return [kind(item) for item in value.split(",") if item]
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", nargs="*",
+                        help="WAV files, session recordings or directories of them (default: built-in fixtures)")
+    parser.add_argument("--model-sizes", default="base,small,medium,large")
+    parser.add_argument("--compute-types", default="int8,float32")
+    parser.add_argument("--cpu-threads", default=_powers_of_two(cpu_count), help="Threads per worker to try")
+    parser.add_argument("--workers", default=_powers_of_two(min(cpu_count, 4)), help="Worker counts to try")
+    parser.add_argument("--beam-sizes", default="1,5")
+    parser.add_argument("--streams", type=int, default=4, help="Concurrent streams to measure throughput at")
+    parser.add_argument("--language", help="Language of the corpus, to skip language detection")
+    parser.add_argument("--oversubscribe", action="store_true",
+                        help="Also try settings with more threads than cores")
+    parser.add_argument("--max-rtf", type=float, default=float(os.getenv("STT_MAX_RTF", 0.5)),
+                        help="Highest real-time factor under load to accept")
+    parser.add_argument("--max-queue-wait", type=float, default=float(os.getenv("STT_MAX_QUEUE_WAIT", 1.0)),
+                        help="Highest p95 queue wait under load to accept")
+    parser.add_argument("--max-memory-mb", type=float, help="Highest peak memory to accept")
+    parser.add_argument("--results", help="Also write every measurement to this JSON file")
+    parser.add_argument("--output", default=os.getenv("STT_TUNING_FILE", "stt_tuning.json"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    clips = load_corpus(args.corpus) if args.corpus else fixture_corpus()
+    if not clips:
+        print("No usable audio in the corpus")
+        sys.exit(1)
+    if not args.corpus:
+        logger.info("Using the built-in fixtures; pass recorded speech for more representative figures")
+
+    settings = candidates(
+        _list(args.model_sizes),
+        _list(args.compute_types),
+        _list(args.cpu_threads, int),
+        _list(args.workers, int),
+        cpu_count=cpu_count,
+        oversubscribe=args.oversubscribe
+    )
+    logger.info(f"Benchmarking {len(settings)} settings x {len(_list(args.beam_sizes))} beam sizes "
+                f"on {len(clips)} clips ({sum(clip.duration for clip in clips):.1f}s of audio)")
+    results = run_candidates(settings, _list(args.beam_sizes, int), clips, args.streams, language=args.language)
+
+    print(f"{'model':>10} {'compute':>8} {'workers':>7} {'threads':>7} {'beam':>4} "
+          f"{'rtf':>6} {'load rtf':>8} {'x realtime':>10} {'wait p95':>8} {'lat p95':>8} {'peak MB':>8}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['model_size']:>10} {result['compute_type']:>8} {result['num_workers']:>7} "
+                  f"{result['cpu_threads']:>7} {result['beam_size']:>4}  failed: {result['error']}")
+            continue
+        print(f"{result['model_size']:>10} {result['compute_type']:>8} {result['num_workers']:>7} "
+              f"{result['cpu_threads']:>7} {result['beam_size']:>4} {result['rtf']:>6.3f} {result['load_rtf']:>8.3f} "
+              f"{result['throughput']:>10.2f} {result['queue_wait_p95']:>8.2f} {result['latency_p95']:>8.2f} "
+              f"{result['peak_rss_mb']:>8.0f}")
+
+    if args.results:
+        with open(args.results, "w") as f:
+            json.dump(results, f, indent=2)
+
+    best = recommend(results, max_rtf=args.max_rtf, max_queue_wait=args.max_queue_wait,
+                     max_memory_mb=args.max_memory_mb)
+    if best is None:
+        print("Every setting failed; no recommendation written")
+        sys.exit(1)
+
+    tuning = to_tuning(best, args.streams)
+    with open(args.output, "w") as f:
+        f.write(tuning.model_dump_json(indent=2))
+    print(f"Recommended {tuning.model_size} ({tuning.compute_type}), beam {tuning.beam_size}, "
+          f"{tuning.num_workers} workers x {tuning.cpu_threads} threads; wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
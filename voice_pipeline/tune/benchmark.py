@@ -0,0 +1,209 @@
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from voice_pipeline.components.stt.profiles import WhisperTuning, model_rank
+from voice_pipeline.tune.corpus import Clip
+
+logger = logging.getLogger(__name__)
+
+class Candidate(NamedTuple):
+    """Settings that need their own model load; beam sizes share one"""
+    model_size: str
+    compute_type: str
+    cpu_threads: int
+    num_workers: int
+
+def candidates(model_sizes: Sequence[str],
+               compute_types: Sequence[str],
+               cpu_threads: Sequence[int],
+               num_workers: Sequence[int],
+               cpu_count: Optional[int] = None,
+               oversubscribe: bool = False) -> List[Candidate]:
+    """Every combination, less those that need more cores than the host has"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return [
+        Candidate(model_size, compute_type, threads, workers)
+        for model_size in model_sizes
+        for compute_type in compute_types
+        for threads in cpu_threads
+        for workers in num_workers
+        if oversubscribe or threads * workers <= cpu_count
+    ]
+
+def run_candidates(candidates: Sequence[Candidate],
+                   beam_sizes: Sequence[int],
+                   clips: Sequence[Clip],
+                   streams: int,
+                   language: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Measure each candidate in a fresh process, so memory figures are its own
+
+    A candidate whose process fails (for example by running out of memory)
+    is reported with its error rather than stopping the run.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for candidate in candidates:
+        logger.info(f"Measuring {_describe(candidate)}")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                measured = pool.submit(measure, candidate, beam_sizes, clips, streams, language).result()
+            except Exception as e:
+                logger.error(f"{_describe(candidate)} failed: {str(e)}")
+                measured = [{**candidate._asdict(), "beam_size": beam_size, "error": str(e)} for beam_size in beam_sizes]
+        results.extend(measured)
+    return results
+
+def measure(candidate: Candidate,
+            beam_sizes: Sequence[int],
+            clips: Sequence[Clip],
+            streams: int,
+            language: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load one model and measure it at each beam size
+
+    For each beam size this reports the real-time factor (decode time /
+    audio duration) of clips decoded one at a time, and then, with streams
+    clients each sending the clips back to back through num_workers decode
+    threads as the STT does, the throughput in audio seconds per second,
+    the mean real-time factor, and the 95th percentile queue wait and
+    latency. Memory is the process's peak resident set size.
+    """
+    from faster_whisper import WhisperModel
+
+    started = time.perf_counter()
+    model = WhisperModel(
+        candidate.model_size,
+        device="cpu",
+        compute_type=candidate.compute_type,
+        cpu_threads=candidate.cpu_threads,
+        num_workers=candidate.num_workers
+    )
+    load_seconds = time.perf_counter() - started
+
+    results = []
+    for beam_size in beam_sizes:
+        def decode(clip: Clip) -> float:
+            started = time.perf_counter()
+            segments, _ = model.transcribe(clip.samples, beam_size=beam_size, language=language)
+            list(segments)
+            return time.perf_counter() - started
+
+        # The first decode pays for lazy initialisation, so leave it out
+        decode(min(clips, key=lambda clip: clip.duration))
+
+        single_rtf = sum(decode(clip) for clip in clips) / sum(clip.duration for clip in clips)
+        concurrent = _run_streams(decode, clips, streams, candidate.num_workers)
+
+        results.append({
+            **candidate._asdict(),
+            "beam_size": beam_size,
+            "load_seconds": round(load_seconds, 2),
+            "rtf": round(single_rtf, 3),
+            **concurrent,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        })
+        logger.info(f"{_describe(candidate)} beam {beam_size}: rtf {single_rtf:.3f}, "
+                    f"{concurrent['throughput']:.2f}x realtime at {streams} streams")
+    return results
+
+def recommend(results: Sequence[Dict[str, Any]],
+              max_rtf: float = 0.5,
+              max_queue_wait: float = 1.0,
+              max_memory_mb: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Pick the most accurate settings that keep up with the benchmarked load
+
+    Settings qualify when, at the benchmarked number of streams, their mean
+    real-time factor and p95 queue wait stay under the thresholds the STT
+    profile controller steps down at, so the deployment starts on them
+    without immediately degrading. Larger models are preferred, then larger
+    beams, then higher throughput. If nothing qualifies, the settings with
+    the highest throughput are returned.
+    """
+    measured = [result for result in results if "error" not in result]
+    if not measured:
+        return None
+
+    qualifying = [
+        result for result in measured
+        if result["load_rtf"] <= max_rtf
+        and result["queue_wait_p95"] <= max_queue_wait
+        and (max_memory_mb is None or result["peak_rss_mb"] <= max_memory_mb)
+    ]
+    if not qualifying:
+        logger.warning("No settings keep up with the benchmarked load; recommending the fastest")
+        return max(measured, key=lambda result: result["throughput"])
+
+    return max(qualifying, key=lambda result: (
+        model_rank(result["model_size"]), result["beam_size"], result["throughput"]
+    ))
+
+def to_tuning(result: Dict[str, Any], streams: int) -> WhisperTuning:
+    """Turn a benchmark result into the settings file the server loads"""
+    return WhisperTuning(
+        model_size=result["model_size"],
+        compute_type=result["compute_type"],
+        beam_size=result["beam_size"],
+        cpu_threads=result["cpu_threads"],
+        num_workers=result["num_workers"],
+        measured={
+            key: result[key]
+            for key in ("rtf", "load_rtf", "throughput", "queue_wait_p95", "latency_p95", "peak_rss_mb")
+        },
+        host={
+            "cpu_count": os.cpu_count(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "streams": streams,
+            "created_at": time.time(),
+        }
+    )
+
+def _run_streams(decode, clips: Sequence[Clip], streams: int, num_workers: int) -> Dict[str, float]:
+    """Decode every clip once per stream, with streams clients sharing num_workers threads"""
+    pool = ThreadPoolExecutor(max_workers=num_workers)
+    rtfs: List[float] = []
+    waits: List[float] = []
+    latencies: List[float] = []
+
+    def timed(clip: Clip, submitted: float):
+        waits.append(time.perf_counter() - submitted)
+        elapsed = decode(clip)
+        rtfs.append(elapsed / clip.duration)
+
+    def client(offset: int):
+        # Each client starts at a different clip so they are not in lockstep
+        for index in range(len(clips)):
+            clip = clips[(index + offset) % len(clips)]
+            submitted = time.perf_counter()
+            pool.submit(timed, clip, submitted).result()
+            latencies.append(time.perf_counter() - submitted)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=streams) as clients:
+        list(clients.map(client, range(streams)))
+    wall = time.perf_counter() - started
+    pool.shutdown()
+
+    return {
+        "streams": streams,
+        "throughput": round(streams * sum(clip.duration for clip in clips) / wall, 3),
+        "load_rtf": round(float(np.mean(rtfs)), 3),
+        "queue_wait_p95": round(float(np.percentile(waits, 95)), 3),
+        "latency_p95": round(float(np.percentile(latencies, 95)), 3),
+    }
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+def _describe(candidate: Candidate) -> str:
+    return (f"{candidate.model_size} ({candidate.compute_type}), "
+            f"{candidate.num_workers} workers x {candidate.cpu_threads} threads")
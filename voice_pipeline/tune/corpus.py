@@ -0,0 +1,102 @@
+import logging
+import os
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from voice_pipeline.core.utils import decode_wav
+from voice_pipeline.replay.recorder import AUDIO_KINDS, read_recording
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Clip lengths of the built-in corpus, spread over typical spoken turns
+FIXTURE_DURATIONS = (1.5, 3.0, 5.0, 8.0, 12.0, 20.0)
+
+class Clip(NamedTuple):
+    """One benchmark input, as 16 kHz mono float32 samples"""
+    name: str
+    samples: np.ndarray
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / SAMPLE_RATE
+
+def fixture_corpus(durations: Sequence[float] = FIXTURE_DURATIONS, seed: int = 0) -> List[Clip]:
+    """Deterministic speech-like clips for when no recorded audio is given
+
+    Each clip is voiced syllables (a glottal pulse train shaped by moving
+    vowel formants, at a natural syllable rate) separated by short pauses,
+    over a low noise floor. Whisper's encoder cost depends only on the
+    audio length, but decoder cost depends on what it hears, so recorded
+    speech from the deployment gives more representative figures.
+    """
+    rng = np.random.default_rng(seed)
+    formants = [(730, 1090), (270, 2290), (530, 1840), (300, 870), (640, 1190)]
+    clips = []
+    for duration in durations:
+        samples = np.zeros(int(duration * SAMPLE_RATE), dtype=np.float32)
+        position = int(0.3 * SAMPLE_RATE)
+        while position < len(samples) - SAMPLE_RATE // 4:
+            length = int(rng.uniform(0.12, 0.3) * SAMPLE_RATE)
+            t = np.arange(length) / SAMPLE_RATE
+            pitch = rng.uniform(100, 220)
+            first, second = formants[rng.integers(len(formants))]
+
+            # Harmonics of the pitch, weighted by their distance to the two formants
+            syllable = np.zeros(length)
+            for harmonic in range(1, int(3500 / pitch)):
+                frequency = harmonic * pitch
+                weight = np.exp(-((frequency - first) / 120) ** 2) + 0.5 * np.exp(-((frequency - second) / 180) ** 2)
+                syllable += weight * np.sin(2 * np.pi * frequency * t)
+            syllable *= np.hanning(length) * 0.3 / max(np.abs(syllable).max(), 1e-6)
+
+            end = min(position + length, len(samples))
+            samples[position:end] += syllable[:end - position]
+
+            # Mostly back-to-back syllables, with a word or phrase gap now and then
+            position = end + int(rng.choice([0.02, 0.08, 0.35], p=[0.6, 0.3, 0.1]) * SAMPLE_RATE)
+
+        samples += rng.normal(0, 0.002, len(samples)).astype(np.float32)
+        clips.append(Clip(f"fixture-{duration:g}s", samples))
+    return clips
+
+def load_corpus(paths: Iterable[str]) -> List[Clip]:
+    """Load WAV files and the inbound audio of session recordings
+
+    Directories are searched for .wav and .vprec files.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith((".wav", ".vprec"))
+            ))
+        else:
+            files.append(path)
+
+    clips = []
+    for path in files:
+        if path.endswith(".vprec"):
+            # Only WAV frames can be decoded here; compressed frames are skipped
+            frames = [record.audio() for record in read_recording(path) if record.kind in AUDIO_KINDS]
+            clips.extend(
+                _clip(f"{path}#{index}", bytes(frame.data))
+                for index, frame in enumerate(frames) if frame.format == "wav"
+            )
+        else:
+            with open(path, "rb") as f:
+                clips.append(_clip(path, f.read()))
+    return [clip for clip in clips if clip is not None and clip.duration > 0.2]
+
+def _clip(name: str, data: bytes) -> Optional[Clip]:
+    try:
+        samples, sample_rate = decode_wav(data)
+    except Exception as e:
+        logger.warning(f"Skipping {name}: {str(e)}")
+        return None
+    if sample_rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), sample_rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return Clip(name, samples.astype(np.float32))